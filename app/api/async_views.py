@@ -0,0 +1,112 @@
+"""
+Async-версии чтения рецептов через API (`GET /api/recipes/`, `GET /api/recipes/<id>`) для ASGI (`food.asgi_urls`).
+
+DRF 3.14 не поддерживает async view, поэтому аутентификация, права и throttling берутся у обычных view
+(`APIView.initial`, в потоке `sync_to_async` - аутентификаторы ходят в базу), фильтры и сериализаторы -
+тоже их, а страница, счетчики и рецепт читаются через async ORM. Данные и ключи кэша те же, что
+у синхронных view, ответ - JSON (`ORJSONRenderer`) или MessagePack по `Accept`, без `Last-Modified` (его функции читают базу
+синхронно), ETag прежний. `Vary: Accept`, который синхронным view ставит DRF, здесь ставит `vary_on_headers`. Остальные методы (POST, PUT, PATCH, DELETE, OPTIONS) выполняют синхронные view.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+from rest_framework.exceptions import APIException
+from rest_framework.utils.urls import remove_query_param
+
+from app.cache import aget_or_set, list_cache_key, recipe_cache_key
+from app.conditional import recipe_etag, recipe_list_etag
+from app.replica import replica_reads
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .views import RecipeListCreateAPIView, DetailRecipeGenericAPIView
+
+READ_METHODS = ("GET", "HEAD")
+
+recipe_list_sync = RecipeListCreateAPIView.as_view()
+recipe_detail_sync = DetailRecipeGenericAPIView.as_view()
+
+
+def _setup(view_class, request, kwargs: dict):
+    """Экземпляр DRF view как в `APIView.dispatch`: запрос DRF и проверки `initial` (или ответ-ошибка)."""
+    view = view_class()
+    view.args, view.kwargs = (), kwargs
+    view.request = view.initialize_request(request, **kwargs)
+    view.headers = view.default_response_headers
+    try:
+        view.initial(view.request, **kwargs)
+    except Exception as exc:
+        return view, _error_response(view, exc)
+    return view, None
+
+
+def _error_response(view, exc: Exception) -> HttpResponse:
+    """Ошибка в том же виде, что у синхронного view (`handle_exception` и выбранный рендерер)."""
+    return view.finalize_response(view.request, view.handle_exception(exc)).render()
+
+
+def _render(view, data) -> HttpResponse:
+    # Browsable API нужен полный цикл ответа DRF, поэтому для HTML - тоже JSON
+    renderer = view.request.accepted_renderer
+    if not isinstance(renderer, MessagePackRenderer):
+        renderer = ORJSONRenderer()
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type)
+
+
+@csrf_exempt  # CSRF проверяет `SessionAuthentication` синхронного view, как и без ASGI
+@replica_reads
+async def recipe_list(request):
+    if request.method not in READ_METHODS:
+        return await sync_to_async(recipe_list_sync)(request)
+    view, error = await sync_to_async(_setup)(RecipeListCreateAPIView, request, {})
+    if error is not None:
+        return error
+    return await _recipe_list(request, view)
+
+
+@vary_on_headers("Accept")  # Снаружи: и у ответа 304 (ETag зависит от `Accept`)
+@condition(etag_func=recipe_list_etag)
+async def _recipe_list(request, view):
+    url = request.build_absolute_uri()
+    facets_url = remove_query_param(remove_query_param(url, "cursor"), "ordering")
+    try:
+        # Фильтры только строят запрос, к базе обращается `aget_or_set` при промахе кэша
+        queryset = view.filter_queryset(view.get_queryset())
+        data = await aget_or_set(list_cache_key("api-list", url), lambda: _list_data(view, queryset))
+        facets = await aget_or_set(list_cache_key("api-facets", facets_url), queryset.afacets)
+    except APIException as exc:
+        return await sync_to_async(_error_response)(view, exc)
+    return _render(view, {**data, "facets": facets})
+
+
+async def _list_data(view, queryset) -> dict:
+    """Как `ListModelMixin.list`: страница, сериализация и ссылки пагинации."""
+    page = await view.paginator.apaginate_queryset(queryset, view.request, view)
+    serializer = view.get_serializer(page, many=True)
+    return view.get_paginated_response(serializer.data).data
+
+
+@csrf_exempt
+@replica_reads
+async def recipe_detail(request, pk: int):
+    if request.method not in READ_METHODS:
+        return await sync_to_async(recipe_detail_sync)(request, pk=pk)
+    view, error = await sync_to_async(_setup)(DetailRecipeGenericAPIView, request, {"pk": pk})
+    if error is not None:
+        return error
+    return await _recipe_detail(request, pk, view)
+
+
+@vary_on_headers("Accept")
+@condition(etag_func=recipe_etag)
+async def _recipe_detail(request, pk: int, view):
+    async def get_data():
+        recipe = await aget_object_or_404(view.get_queryset(), pk=pk)
+        return view.get_serializer(instance=recipe).data
+
+    try:
+        data = await aget_or_set(recipe_cache_key("api-detail", pk), get_data)
+    except Http404 as exc:
+        return await sync_to_async(_error_response)(view, exc)
+    return _render(view, data)
@@ -0,0 +1,48 @@
+import django_filters
+from django import forms
+from rest_framework.filters import SearchFilter
+
+from app.models import Recipe
+
+
+class RecipeSearchFilter(SearchFilter):
+    """
+    Полнотекстовый поиск по сохраненному `Recipe.search_vector` вместо `to_tsvector` по каждой строке.
+    Реагирует на тот же (query) параметр `search`, результаты упорядочены по релевантности.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        return queryset.search(" ".join(search_terms))
+
+
+class IntegerFilter(django_filters.NumberFilter):
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(django_filters.BaseInFilter, IntegerFilter):
+    """Список чисел через запятую: `?ingredients_all=1,5,7`."""
+
+
+class RecipeFilter(django_filters.FilterSet):
+    """
+    Фильтры списка рецептов. У каждого есть индекс:
+    категория - `(category, created_at, id)`, время и калорийность - `(поле, id)`, автор - FK,
+    ингредиенты - GIN по `ingredient_ids` (`@>` для "все", `&&` для "любой"). "Ни один из" - отрицание
+    `&&`, индекс его не ускоряет, но условие проверяется по массиву в строке рецепта без JOIN.
+    """
+    category = django_filters.MultipleChoiceFilter(choices=Recipe.Category.choices)
+    time_min = IntegerFilter(field_name="time_minutes", lookup_expr="gte")
+    time_max = IntegerFilter(field_name="time_minutes", lookup_expr="lte")
+    kcal_min = django_filters.NumberFilter(field_name="total_kcal", lookup_expr="gte")
+    kcal_max = django_filters.NumberFilter(field_name="total_kcal", lookup_expr="lte")
+    author = IntegerFilter(field_name="user_id")
+    ingredients_all = IntegerInFilter(field_name="ingredient_ids", lookup_expr="contains")
+    ingredients_any = IntegerInFilter(field_name="ingredient_ids", lookup_expr="overlap")
+    ingredients_none = IntegerInFilter(field_name="ingredient_ids", lookup_expr="overlap", exclude=True)
+
+    class Meta:
+        model = Recipe
+        fields = []
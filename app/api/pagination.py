@@ -0,0 +1,77 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from app.pagination import KeysetPaginator, InvalidCursor
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Курсорная пагинация без `COUNT(*)` и `OFFSET` (см. `app.pagination.KeysetPaginator`).
+
+    Сортировка берется из `OrderingFilter` view (параметр `ordering`), если он есть и поле разрешено,
+    иначе используется `ordering` модели. Курсор кодирует значение именно этого поля и `id`.
+    """
+    page_size = 20
+    cursor_query_param = "cursor"
+    ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        paginator = self._get_paginator(queryset, request, view)
+        try:
+            self.page = paginator.get_page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return self.page.object_list
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` для async view (`app.api.async_views`): страница читается через async ORM."""
+        paginator = self._get_paginator(queryset, request, view)
+        try:
+            self.page = await paginator.aget_page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return self.page.object_list
+
+    def _get_paginator(self, queryset, request, view) -> KeysetPaginator:
+        self.request = request
+        self.ordering_param = self.get_ordering(request, queryset, view)
+        return KeysetPaginator(queryset, self.ordering_param, self.page_size)
+
+    def get_ordering(self, request, queryset, view) -> str:
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    # Курсор строится по одному ключу; остальные поля сортировки игнорируются.
+                    return ordering[0]
+        if "rank" in queryset.query.annotations:
+            # Результаты полнотекстового поиска без явной сортировки - по релевантности.
+            return "-rank"
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self._get_link(self.page.next_cursor),
+            "previous": self._get_link(self.page.previous_cursor),
+            "results": data,
+        })
+
+    def _get_link(self, cursor: str | None) -> str | None:
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,64 @@
+"""
+Быстрые рендереры и парсер API.
+
+`ORJSONRenderer`/`ORJSONParser` - тот же JSON, что у `JSONRenderer`/`JSONParser` DRF, но через `orjson`
+(в несколько раз быстрее на больших страницах списка). Типы, которых `orjson` не знает (`Decimal`,
+ленивые строки перевода), и даты (DRF обрезает их до миллисекунд и пишет UTC как "Z") преобразует
+`JSONEncoder` DRF, поэтому ответ совпадает с прежним.
+
+`MessagePackRenderer` - `application/msgpack` по заголовку `Accept` (подключается в настройках,
+только если установлен `msgpack`: `poetry install -E msgpack`).
+"""
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import msgpack
+except ImportError:  # Необязательная зависимость (extra "msgpack")
+    msgpack = None
+
+_default = encoders.JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Для `COMPACT_JSON = False` (пробелы после `:` и `,`) - стандартный рендерер.
+        # NaN и бесконечность `orjson` пишет как `null`, а не отказывается кодировать, как `STRICT_JSON`.
+        if not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2  # Другой ширины отступа `orjson` не умеет
+        ret = orjson.dumps(data, default=_default, option=options)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:  # Как у DRF: JSON без U+2028/U+2029 для JavaScript
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Даты, `Decimal` и ленивые строки - так же, как в JSON (`JSONEncoder` DRF)
+        return msgpack.packb(data, default=_default, datetime=False)
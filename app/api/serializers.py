@@ -1,7 +1,22 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from app.models import Recipe, Ingredient
+from app.instrumentation import timed
+from app.models import Recipe, Ingredient, Favorite, RecipeIngredient, ingredient_key
+from app.signals import invalidate_recipes
+
+
+class TimedDataMixin:
+    """Время построения `.data` попадает в метрику `serializer` запроса (заголовок Server-Timing)."""
+
+    @property
+    def data(self):
+        with timed("serializer"):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
 
 
 class CategoryField(serializers.ChoiceField):
@@ -19,13 +34,17 @@ class ShortUserSerializer(serializers.ModelSerializer):
 
 
 class IngredientSerializer(serializers.ModelSerializer):
+    # Количество в составе рецепта (граммы), только при записи. Не указано - 100 г.
+    quantity = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False,
+                                        write_only=True)
+
     class Meta:
         model = Ingredient
-        fields = ["id", "name"]
+        fields = ["id", "name", "quantity"]
         read_only_fields = ["id"]
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedDataMixin, serializers.ModelSerializer):
     ingredients = IngredientSerializer(many=True)  # 'many=True' - несколько значений
     user = ShortUserSerializer(read_only=True)  # 'source' не указываем так как 'user' совпадает с названием модели
     category = CategoryField(choices=Recipe.Category.choices)
@@ -34,8 +53,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ["id", "name", "preview_image", "description", "created_at", "time_minutes", "ingredients", "category",
-                  "user", "v_category"]
-        read_only_fields = ["id", "created_at", "user"]
+                  "user", "v_category", *Recipe.TOTAL_FIELDS]
+        read_only_fields = ["id", "created_at", "user", *Recipe.TOTAL_FIELDS]
         write_only_fields = ["name", "preview_image", "description", "time_minutes", "ingredients", "category"]
 
     def create(self, validated_data) -> Recipe:
@@ -43,39 +62,95 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop("ingredients")
 
         recipe = Recipe.objects.create(**validated_data)
+        self._set_ingredients(recipe, ingredients)
 
-        ingredients_objects: list[Ingredient] = []
-        for ingredient in ingredients:
-            obj, created = Ingredient.objects.get_or_create(name=ingredient["name"])
-            ingredients_objects.append(obj)
+        return recipe
 
-        recipe.ingredients.set(ingredients_objects)
+    def update(self, instance: Recipe, validated_data) -> Recipe:
+        # При частичном обновлении (PATCH) ингредиентов может не быть - тогда состав не меняем.
+        ingredients = validated_data.pop("ingredients", None)
 
-        return recipe
+        recipe = super().update(instance, validated_data)
+        if ingredients is not None:
+            self._set_ingredients(recipe, ingredients)
 
+        return recipe
 
-class RecipeListSerializer(serializers.ModelSerializer):
-    ingredients = IngredientSerializer(many=True)
-    user = ShortUserSerializer(read_only=True)
-    category = CategoryField(choices=Recipe.Category.choices)
+    @staticmethod
+    def _set_ingredients(recipe: Recipe, ingredients: list[dict]) -> None:
+        # Все ингредиенты - двумя запросами (SELECT + INSERT ... ON CONFLICT), а не get_or_create на каждый.
+        ids = Ingredient.objects.resolve_ids(ingredient["name"] for ingredient in ingredients)
+        quantities = {
+            ids[ingredient_key(ingredient["name"])]: ingredient.get("quantity", RecipeIngredient.DEFAULT_QUANTITY)
+            for ingredient in ingredients if ingredient["name"].strip()
+        }
+        # Состав меняется разницей: лишние строки удаляются, новые и измененные - одним upsert.
+        # Итоги рецепта пересчитывают триггеры в базе (миграция 0009) только по этим строкам.
+        RecipeIngredient.objects.filter(recipe=recipe).exclude(ingredient_id__in=quantities).delete()
+        RecipeIngredient.objects.bulk_create(
+            [RecipeIngredient(recipe=recipe, ingredient_id=pk, quantity=quantity) for pk, quantity in quantities.items()],
+            update_conflicts=True, unique_fields=["recipe", "ingredient"], update_fields=["quantity"],
+        )
+        # `bulk_create` не отправляет `m2m_changed`
+        invalidate_recipes([recipe.pk], touch=True)
+        getattr(recipe, "_prefetched_objects_cache", {}).pop("ingredients", None)
+        recipe.refresh_from_db(fields=Recipe.TOTAL_FIELDS)
+
+
+class RecipeListSerializer(TimedDataMixin, serializers.ModelSerializer):
+    # Автор, ингредиенты и название категории - готовые из карточки (`Recipe.objects.for_list()`)
+    ingredients = serializers.ReadOnlyField(source="card.ingredients")
+    user = serializers.ReadOnlyField(source="card.author")
+    category = serializers.ReadOnlyField(source="card.category_label")
 
     class Meta:
         model = Recipe
-        fields = ["id", "name", "preview_image", "created_at", "time_minutes", "user", "ingredients", "category"]
+        fields = ["id", "name", "preview_image", "created_at", "time_minutes", "user", "ingredients", "category",
+                  *Recipe.TOTAL_FIELDS]
+        list_serializer_class = TimedListSerializer
+
+
+class FavoriteSerializer(TimedDataMixin, serializers.ModelSerializer):
+    recipe = RecipeListSerializer(read_only=True)
+
+    class Meta:
+        model = Favorite
+        fields = ["id", "recipe", "created_at"]
+        list_serializer_class = TimedListSerializer
+
+
+class FavoriteBulkSerializer(serializers.Serializer):
+    # id рецептов для добавления в избранное или удаления из него одним запросом
+    recipes = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+
+
+class PantrySerializer(serializers.Serializer):
+    # id ингредиентов, которые есть у пользователя
+    ingredients = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                        max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+    min_coverage = serializers.FloatField(min_value=0, max_value=1, default=0)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    type = serializers.ChoiceField(choices=["recipes", "ingredients"], default="recipes")
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=10)
+    offset = serializers.IntegerField(min_value=0, max_value=100, default=0)
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class RecipeCreateSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ["name", "preview_image", "description", "time_minutes", "ingredients", "category"]
 
 
-class RecipeDetailSerializer(serializers.ModelSerializer):
+class RecipeDetailSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ["id", "name", "preview_image", "description", "created_at", "time_minutes", "ingredients",
                   "category",
-                  "user"]
+                  "user", *Recipe.TOTAL_FIELDS]
 
 
 class ImageSerializer(serializers.Serializer):
@@ -10,4 +10,7 @@ urlpatterns = [
     # Классы представлений указываем через вызов метода `as_view`
     path("", views.RecipeListCreateAPIView.as_view(), name="recipes-list-create"),
     path("<int:pk>", views.DetailRecipeGenericAPIView.as_view(), name="recipe"),
+    path("favorites/", views.FavoriteRecipesAPIView.as_view(), name="favorites"),
+    path("pantry/", views.PantryRecipesAPIView.as_view(), name="pantry"),
+    path("autocomplete/", views.AutocompleteAPIView.as_view(), name="autocomplete"),
 ]
@@ -4,28 +4,48 @@ from rest_framework.generics import GenericAPIView, ListCreateAPIView, RetrieveU
 from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
 from rest_framework.serializers import ModelSerializer
-from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.pagination import PageNumberPagination
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.conf import settings
+from rest_framework.filters import OrderingFilter
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django_filters.rest_framework import DjangoFilterBackend
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 
-from app.models import Recipe
+from app.autocomplete import suggest
+from app.cache import get_or_set, list_cache_key, recipe_cache_key
+from app.conditional import recipe_etag, recipe_last_modified, recipe_list_etag, recipe_list_last_modified
+from app.favorite_service import FavoriteRecipesService
+from app.images import store_image
+from app.pantry import find_recipes
+from app.replica import replica_reads
+from app.models import Recipe, Favorite
+from .filters import RecipeSearchFilter, RecipeFilter
+from .pagination import KeysetCursorPagination
 from .permissions import IsOwnerOrReadOnly
-from .serializers import RecipeListSerializer, RecipeCreateSerializer, RecipeDetailSerializer, RecipeSerializer, ImageSerializer
+from .serializers import (
+    RecipeListSerializer, RecipeCreateSerializer, RecipeDetailSerializer, RecipeSerializer, ImageSerializer,
+    FavoriteSerializer, FavoriteBulkSerializer, PantrySerializer, AutocompleteSerializer,
+)
 
 
+# Проверка `If-None-Match`/`If-Modified-Since` до выборки и сериализации рецептов
+@method_decorator(replica_reads, name="get")
+@method_decorator(condition(etag_func=recipe_list_etag, last_modified_func=recipe_list_last_modified), name="get")
 class RecipeListCreateAPIView(ListCreateAPIView):
     """
     Класс API view, для endpoint'a просмотра перечня рецептов и создания новых.
     """
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.for_list()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [SearchFilter, OrderingFilter]  # Реагирует на (query) параметр `search`
-    search_fields = ['@name', '@description']
-    # Используем полнотекстовый поиск Postgres через '@' (т.е. убираем окончания и т.д.)
-    ordering_fields = ["created_at", "time_minutes", "user_username"]
-    pagination_class = PageNumberPagination
+    filter_backends = [RecipeSearchFilter, DjangoFilterBackend, OrderingFilter]  # Реагирует на (query) параметр `search`
+    # Полнотекстовый поиск Postgres по индексированному `search_vector` (см. `RecipeSearchFilter`)
+    # Категория, время, калорийность, автор, ингредиенты - см. `RecipeFilter`
+    filterset_class = RecipeFilter
+    # Для `created_at` и `time_minutes` есть индексы `(поле, id)` под курсорную пагинацию.
+    ordering_fields = ["created_at", "time_minutes", "total_kcal", "user__username"]
+    pagination_class = KeysetCursorPagination
 
     def get_serializer_class(self):
         """В зависимости от метода HTTP возвращает соответствующий класс для создания сериализатора"""
@@ -33,6 +53,21 @@ class RecipeListCreateAPIView(ListCreateAPIView):
             return RecipeSerializer
         return RecipeListSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Страница списка кэшируется по версии каталога и полному URL (фильтры, сортировка, курсор)"""
+        url = request.build_absolute_uri()
+        data = get_or_set(list_cache_key("api-list", url), lambda: self._list_data(request, *args, **kwargs))
+        # Счетчики не зависят от страницы и сортировки: один расчет на набор фильтров.
+        facets_url = remove_query_param(remove_query_param(url, "cursor"), "ordering")
+        facets = get_or_set(list_cache_key("api-facets", facets_url), lambda: self._facets(request))
+        return Response({**data, "facets": facets})
+
+    def _list_data(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs).data
+
+    def _facets(self, request) -> dict:
+        return self.filter_queryset(self.get_queryset()).facets()
+
     def perform_create(self, serializer):
         """Во время создания рецепта добавляем владельца"""
         serializer.save(user=self.request.user)
@@ -42,7 +77,7 @@ class RecipeDetailAPIView(RetrieveUpdateDestroyAPIView):
     """
     Класс API view, для endpoint'a просмотра, изменения и удаления конкретного рецепта.
     """
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.for_detail()
     serializer_class = RecipeSerializer
     lookup_field = 'pk'  # По какому (уникальному) полю модели будет найден рецепт.
     lookup_url_kwarg = 'pk'  # Какой параметр указать в urlpatterns, для поиска рецепта.
@@ -53,7 +88,7 @@ class RecipeListCreateGenericAPIView(GenericAPIView):
     """
     Класс API view, для endpoint'a просмотра перечня рецептов и создания новых.
     """
-    queryset = Recipe.objects.all()  # Как и где достать наши объекты
+    queryset = Recipe.objects.for_list()  # Как и где достать наши объекты
 
     def get_serializer_class(self):
         """В зависимости от метода HTTP возвращает соответствующий класс для создания сериализатора"""
@@ -84,17 +119,24 @@ class DetailRecipeGenericAPIView(GenericAPIView):
     """
     Класс API view, для endpoint'a просмотра, изменения и удаления конкретного рецепта.
     """
-    queryset = Recipe.objects.all()  # Как и где достать наш объект
+    queryset = Recipe.objects.for_detail()  # Как и где достать наш объект
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeDetailSerializer
-        return RecipeCreateSerializer
+        # Ингредиенты передаются списком названий, новые создаются (см. `RecipeSerializer.update`)
+        return RecipeSerializer
 
+    @method_decorator(replica_reads)
+    @method_decorator(condition(etag_func=recipe_etag, last_modified_func=recipe_last_modified))
     def get(self, request, pk: int, *args, **kwargs):
+        # Данные рецепта кэшируются по его версии, которая меняется при любом изменении рецепта.
+        return Response(get_or_set(recipe_cache_key("api-detail", pk), lambda: self._get_data(pk)))
+
+    def _get_data(self, pk: int):
         recipe = get_object_or_404(self.get_queryset(), pk=pk)
         serializer = self.get_serializer(instance=recipe)
-        return Response(serializer.data)
+        return serializer.data
 
     def put(self, request, pk: int, *args, **kwargs):
         recipe = get_object_or_404(self.get_queryset(), pk=pk)
@@ -118,18 +160,127 @@ class DetailRecipeGenericAPIView(GenericAPIView):
         return Response(status=204)
 
 
+class FavoriteRecipesAPIView(GenericAPIView):
+    """
+    Избранное текущего пользователя: GET - список (новые сверху, курсорная пагинация),
+    POST/DELETE `{"recipes": [id, ...]}` - добавить/удалить несколько рецептов одним запросом.
+    """
+    serializer_class = FavoriteSerializer
+    pagination_class = KeysetCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        return (
+            Favorite.objects.filter(user_id=self.request.user.pk)  # `TokenUser` у JWT - не модель
+            .select_related("recipe__card")  # Автор и ингредиенты - из карточки, тем же запросом
+            .defer("recipe__description", "recipe__search_vector")
+        )
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def post(self, request, *args, **kwargs):
+        recipe_ids = self._get_recipe_ids(request)
+        return Response({"added": FavoriteRecipesService(request).add_many(recipe_ids)})
+
+    def delete(self, request, *args, **kwargs):
+        recipe_ids = self._get_recipe_ids(request)
+        return Response({"removed": FavoriteRecipesService(request).remove_many(recipe_ids)})
+
+    @staticmethod
+    def _get_recipe_ids(request) -> list[int]:
+        serializer = FavoriteBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data["recipes"]
+
+
+class PantryRecipesAPIView(GenericAPIView):
+    """
+    "Что приготовить": `?ingredients=1,5,7[&limit=20&min_coverage=0.5]` - рецепты по доле ингредиентов,
+    которые есть у пользователя, с недостающими ингредиентами. Подбор - по индексу в памяти (`app.pantry`),
+    из базы читаются только найденные рецепты.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = []
+    throttle_scope = "pantry"
+
+    def get(self, request, *args, **kwargs):
+        serializer = PantrySerializer(data={
+            "ingredients": [pk for pk in request.query_params.get("ingredients", "").split(",") if pk.strip()],
+            **{name: request.query_params[name] for name in ("limit", "min_coverage") if name in request.query_params},
+        })
+        serializer.is_valid(raise_exception=True)
+        pantry = set(serializer.validated_data["ingredients"])
+
+        matches, stats = find_recipes(pantry, serializer.validated_data["limit"],
+                                      serializer.validated_data["min_coverage"])
+        recipes = Recipe.objects.for_list().in_bulk([match.recipe_id for match in matches])
+        # Рецепт мог быть удален после построения индекса
+        matches = [match for match in matches if match.recipe_id in recipes]
+        data = RecipeListSerializer([recipes[match.recipe_id] for match in matches], many=True).data
+        return Response({
+            "results": [
+                {
+                    "recipe": recipe,
+                    "coverage": round(match.coverage, 4),
+                    "matched": match.matched,
+                    "total": match.total,
+                    "missing": [
+                        ingredient for ingredient in recipes[match.recipe_id].card.ingredients
+                        if ingredient["id"] not in pantry
+                    ],
+                }
+                for match, recipe in zip(matches, data)
+            ],
+            "index": stats,
+        })
+
+
+class AutocompleteAPIView(GenericAPIView):
+    """
+    Подсказки для поиска и выбора ингредиентов: `?q=бор&type=recipes|ingredients[&limit=10&offset=0]`.
+    Ищет по индексу в памяти (`app.autocomplete`), ответ - только id и названия, не больше `limit`.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = []
+    throttle_scope = "autocomplete"
+
+    def get(self, request, *args, **kwargs):
+        serializer = AutocompleteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        # На одну подсказку больше, чтобы понять, есть ли следующая страница
+        suggestions = suggest(params["type"], params["q"], params["limit"] + 1, params["offset"])
+        has_more = len(suggestions) > params["limit"]
+        response = Response({
+            "results": [
+                {"id": suggestion.id, "name": suggestion.name, "fuzzy": suggestion.fuzzy}
+                for suggestion in suggestions[:params["limit"]]
+            ],
+            "next": replace_query_param(request.build_absolute_uri(), "offset", params["offset"] + params["limit"])
+            if has_more and params["offset"] + params["limit"] <= 100 else None,
+        })
+        # Подсказки одинаковы для всех пользователей и почти не меняются: браузер повторно не спрашивает
+        patch_cache_control(response, max_age=60)
+        return response
+
+
 @api_view()  # Это только для функций
 def list_create_recipe_api_view(request):
     res = []
-    for recipe in Recipe.objects.all():
+    for recipe in Recipe.objects.with_ingredients().defer("description"):
         object_dict = {
             "id": recipe.id,
             "name": recipe.name,
-            "preview_image": recipe.preview_image.url,
+            "preview_image": recipe.preview_image,
             "created_at": recipe.created_at,
             "time_minutes": recipe.time_minutes,
-            "user": recipe.user.id,
-            "ingredients": recipe.ingredients.all().values_list("name", flat=True),
+            "user": recipe.user_id,  # Без запроса пользователя
+            # `.all()` берет ингредиенты из prefetch, `.values_list()` сделал бы запрос на каждый рецепт
+            "ingredients": [ingredient.name for ingredient in recipe.ingredients.all()],
             "category": recipe.category
         }
         res.append(object_dict)
@@ -139,16 +290,16 @@ def list_create_recipe_api_view(request):
 
 @api_view()  # Это только для функций
 def detail_recipe_api_view(request, pk: int):
-    recipe = get_object_or_404(Recipe, id=pk)
+    recipe = get_object_or_404(Recipe.objects.with_ingredients(), id=pk)
     object_dict = {
         "id": recipe.id,
         "name": recipe.name,
         "description": recipe.description,
-        "preview_image": recipe.preview_image.url,
+        "preview_image": recipe.preview_image,
         "created_at": recipe.created_at,
         "time_minutes": recipe.time_minutes,
-        "user": recipe.user.id,
-        "ingredients": recipe.ingredients.all().values_list("name", flat=True),
+        "user": recipe.user_id,
+        "ingredients": [ingredient.name for ingredient in recipe.ingredients.all()],
         "category": recipe.category
     }
     return Response(object_dict)
@@ -160,7 +311,6 @@ class UploadImageAPIView(GenericAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        image: InMemoryUploadedFile = serializer.validated_data["image"]
-        with open(f"{settings.MEDIA_ROOT}/images/{image.name}", "bw") as image_file:
-            image_file.write(image.read())
-        return Response({"name": image.name, "url": "images/" + image.name})
+        image: UploadedFile = serializer.validated_data["image"]
+        # `url` - путь относительно MEDIA_ROOT, его передают в `preview_image` рецепта
+        return Response({"name": image.name, "url": store_image(image)})
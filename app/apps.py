@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (подключаем обработчики сигналов)
@@ -0,0 +1,70 @@
+"""
+Async-версии страниц для чтения (главная, рецепт, избранное). Подключаются под ASGI (`food.asgi_urls`).
+
+Рецепты читаются через async ORM: пока запрос ждет базу, процесс обслуживает другие соединения,
+без воркера на каждое. Шаблоны, ETag и контекстные процессоры синхронные, поэтому пользователь
+и избранное загружаются заранее (`with_user`), а дальше берутся из запроса без обращений к базе.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, render
+from django.views.decorators.http import condition
+
+from .cache import aget_or_set, list_cache_key, recipe_cache_key
+from .conditional import recipe_page_etag
+from .favorite_service import SESSION_KEY, FavoriteRecipesService, merge_session_favorites
+from .models import Recipe
+from .pagination import InvalidCursor, KeysetPaginator
+from .replica import replica_reads
+from .views import favorites_paginator, home_paginator
+
+
+def with_user(view):
+    """
+    Загружает пользователя (`request.auser()`) и id избранного до view: ETag, меню и шаблоны читают
+    `request.user` и избранное синхронно, а синхронные запросы к базе в async view запрещены.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        request.user = await request.auser()  # Сессия загружается здесь же, в потоке `sync_to_async`
+        if request.user.is_authenticated and SESSION_KEY in request.session:
+            # Избранное анонимной сессии еще не перенесено в таблицу (обычно это делает вход)
+            await sync_to_async(merge_session_favorites)(request, request.user)
+        await FavoriteRecipesService(request).afavorites_ids()
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def _get_page(paginator: KeysetPaginator, request):
+    try:
+        return await paginator.aget_page(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Некорректный курсор")
+
+
+@replica_reads
+@with_user
+async def home(request):
+    paginator = home_paginator(request)
+    page = await aget_or_set(list_cache_key("home", request.get_full_path()), lambda: _get_page(paginator, request))
+    return render(request, "home.html", {"recipes": page.object_list, "page": page})
+
+
+@replica_reads
+@with_user
+@condition(etag_func=recipe_page_etag)
+async def show_recipe(request, recipe_id: int):
+    recipe: Recipe = await aget_or_set(
+        recipe_cache_key("recipe", recipe_id),
+        lambda: aget_object_or_404(Recipe.objects.for_detail(), id=recipe_id),
+    )
+    return render(request, "recipe/recipe.html", {"recipe": recipe})
+
+
+@with_user
+async def favorite_recipes(request):
+    page = await _get_page(favorites_paginator(request), request)
+    return render(request, "home.html", {"recipes": page.object_list, "page": page})
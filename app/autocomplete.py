@@ -0,0 +1,206 @@
+"""
+Автодополнение названий рецептов и ингредиентов.
+
+Индекс в памяти процесса (`app.memory_index`), без запросов к базе на каждое нажатие клавиши:
+- отсортированный список названий - совпадение с начала названия (`bisect`);
+- слова названий -> позиции названий - совпадение с начала любого слова ("дом" найдет "Суп домашний");
+- триграммы слов - исправление опечаток в словах запроса ("борш" -> "борщ").
+Названия хранятся отсортированными, поэтому внутри одного уровня совпадения выдача идет по алфавиту.
+"""
+import copy
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+
+from .memory_index import MemoryIndex
+from .models import Recipe, Ingredient
+
+WORD_RE = re.compile(r"\w+")
+# Сколько слов словаря подставлять вместо одного слова запроса (по началу слова / по опечатке)
+MAX_PREFIX_WORDS = 200
+MAX_FUZZY_WORDS = 5
+MIN_SIMILARITY = 0.3
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е").strip()
+
+
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class Suggestion:
+    id: int
+    name: str
+    fuzzy: bool = False
+
+
+class NameIndex:
+    def __init__(self, rows=()):
+        """`rows` - пары `(id, название)`."""
+        entries = sorted((normalize(name), pk, name) for pk, name in rows if name and name.strip())
+        self.keys = [key for key, _, _ in entries]
+        self.ids = [pk for _, pk, _ in entries]
+        self.names = [name for _, _, name in entries]
+        self.positions = {pk: position for position, pk in enumerate(self.ids)}
+        self.removed: set[int] = set()  # позиции удаленных и измененных названий
+
+        self.words: dict[str, list[int]] = {}
+        for position, key in enumerate(self.keys):
+            for word in set(WORD_RE.findall(key)):
+                self.words.setdefault(word, []).append(position)
+        self._index_vocabulary()
+
+        self.extra: list[Suggestion] = []  # добавленные после построения (до перестройки)
+
+    def _index_vocabulary(self) -> None:
+        self.vocabulary = sorted(self.words)
+        self.word_trigrams: dict[str, list[str]] = {}
+        for word in self.vocabulary:
+            for trigram in trigrams(word):
+                self.word_trigrams.setdefault(trigram, []).append(word)
+
+    def __len__(self) -> int:
+        return len(self.positions) - len(self.removed) + len(self.extra)
+
+    def copy(self) -> "NameIndex":
+        """Копия для `update`: построенные списки и словари общие, копируются только изменения."""
+        index = copy.copy(self)
+        index.removed, index.extra = set(self.removed), list(self.extra)
+        return index
+
+    def update(self, pk: int, name: str | None) -> None:
+        """Изменение до перестройки: старая запись скрывается, новая ищется простым перебором `extra`."""
+        position = self.positions.get(pk)
+        if position is not None:
+            self.removed.add(position)
+        self.extra = [item for item in self.extra if item.id != pk]
+        if name:
+            self.extra.append(Suggestion(pk, name))
+
+    def _prefix_words(self, prefix: str) -> list[str]:
+        start = bisect_left(self.vocabulary, prefix)
+        words = []
+        for word in self.vocabulary[start:start + MAX_PREFIX_WORDS]:
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def _fuzzy_words(self, word: str) -> list[str]:
+        query = trigrams(word)
+        shared = Counter(chain.from_iterable(self.word_trigrams.get(trigram, ()) for trigram in query))
+        scored = (
+            (count / (len(query) + len(trigrams(candidate)) - count), candidate)
+            for candidate, count in shared.most_common(50)
+        )
+        return [candidate for similarity, candidate in heapq.nlargest(MAX_FUZZY_WORDS, scored)
+                if similarity >= MIN_SIMILARITY]
+
+    def _positions(self, words: list[str]) -> set[int]:
+        return set(chain.from_iterable(self.words[word] for word in words))
+
+    def _word_matches(self, terms: list[str], fuzzy: bool) -> set[int] | None:
+        """Позиции названий, где есть все слова запроса. `None` - опечаток исправлять не пришлось."""
+        found, corrected = None, False
+        for number, term in enumerate(terms):
+            if number == len(terms) - 1:
+                words = self._prefix_words(term)  # последнее слово еще набирается
+            else:
+                words = [term] if term in self.words else []
+            if fuzzy and not words and len(term) >= 3:
+                words, corrected = self._fuzzy_words(term), True
+            positions = self._positions(words)
+            found = positions if found is None else found & positions
+            if not found:
+                break
+        if fuzzy and not corrected:
+            return None
+        return found
+
+    def search(self, text: str, limit: int = 10, offset: int = 0) -> list[Suggestion]:
+        """
+        Уровни совпадения: начало названия; все слова запроса в названии (последнее - начало слова);
+        то же с исправлением опечаток. Внутри уровня - по алфавиту.
+        """
+        query = normalize(text)
+        terms = WORD_RE.findall(query)
+        if not terms:
+            return []
+        wanted = offset + limit
+        results: list[Suggestion] = []
+        seen: set[int] = set()
+
+        def take(positions, fuzzy: bool = False) -> None:
+            for position in positions:
+                if len(results) >= wanted:
+                    return
+                if position not in self.removed and self.ids[position] not in seen:
+                    seen.add(self.ids[position])
+                    results.append(Suggestion(self.ids[position], self.names[position], fuzzy))
+
+        def take_extra(match) -> None:
+            for item in self.extra:
+                if len(results) < wanted and item.id not in seen and match(normalize(item.name)):
+                    seen.add(item.id)
+                    results.append(item)
+
+        position = bisect_left(self.keys, query)
+        while position < len(self.keys) and len(results) < wanted and self.keys[position].startswith(query):
+            take([position])
+            position += 1
+        take_extra(lambda key: key.startswith(query))
+
+        for fuzzy in (False, True):
+            if len(results) >= wanted:
+                break
+            found = self._word_matches(terms, fuzzy)
+            if found:
+                take(heapq.nsmallest(wanted + len(self.removed) + len(seen), found), fuzzy)
+            if not fuzzy:
+                take_extra(lambda key: all(any(word.startswith(term) for word in WORD_RE.findall(key))
+                                           for term in terms))
+        return results[offset:wanted]
+
+    def stats(self) -> dict:
+        return {"names": len(self), "words": len(self.vocabulary)}
+
+
+def _recipe_names():
+    return NameIndex(Recipe.objects.values_list("id", "name").iterator(chunk_size=5000))
+
+
+def _refresh_recipes(index: NameIndex, recipe_ids: list[int]) -> NameIndex:
+    names = dict(Recipe.objects.filter(pk__in=recipe_ids).values_list("id", "name"))
+    index = index.copy()
+    for recipe_id in recipe_ids:
+        index.update(recipe_id, names.get(recipe_id))
+    return index
+
+
+def _ingredient_names():
+    return NameIndex(Ingredient.objects.values_list("id", "name").iterator(chunk_size=5000))
+
+
+def _refresh_ingredients(index: NameIndex, ingredient_ids: list[int]) -> NameIndex:
+    names = dict(Ingredient.objects.filter(pk__in=ingredient_ids).values_list("id", "name"))
+    index = index.copy()
+    for ingredient_id in ingredient_ids:
+        index.update(ingredient_id, names.get(ingredient_id))
+    return index
+
+
+recipe_names = MemoryIndex(_recipe_names, _refresh_recipes)
+ingredient_names = MemoryIndex(_ingredient_names, _refresh_ingredients)
+
+INDEXES = {"recipes": recipe_names, "ingredients": ingredient_names}
+
+
+def suggest(kind: str, text: str, limit: int = 10, offset: int = 0) -> list[Suggestion]:
+    return INDEXES[kind].get().search(text, limit, offset)
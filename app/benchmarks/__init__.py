@@ -0,0 +1,98 @@
+"""
+Бенчмарки "горячих" view внутри процесса (`manage.py benchmark`).
+
+Каждый сценарий - один HTTP-запрос через `django.test.Client`. Для сценария замеряются задержка
+(p50/p95), число SQL-запросов и пик памяти Python (`tracemalloc`) за один запрос.
+Результаты сохраняются в JSON, который можно сравнить с замером другого коммита (`--compare`).
+"""
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from app.cache import get_cache
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Делает один запрос; случайность (id рецепта и т.п.) - только через переданный `rng`.
+    request: Callable[[Client, random.Random], object]
+    expected_status: int = 200
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def run_scenario(scenario: Scenario, client: Client, iterations: int = 50, warmup: int = 5,
+                 cold_cache: bool = True, seed: int = 1) -> dict:
+    """
+    `cold_cache=True` - кэш очищается перед каждым запросом, замеряется сама работа view.
+    Иначе - повторные запросы, в основном попадания в кэш.
+    """
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        _call(scenario, client, rng, cold_cache)
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        if cold_cache:
+            get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            _check(scenario, scenario.request(client, rng))
+            timings.append(time.perf_counter() - started)
+        queries.append(len(context))
+
+    # Отдельный запрос под `tracemalloc`: трассировка замедляет код и исказила бы задержки.
+    tracemalloc.start()
+    try:
+        _call(scenario, client, rng, cold_cache)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "queries": statistics.median_low(queries),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _call(scenario: Scenario, client: Client, rng: random.Random, cold_cache: bool) -> None:
+    if cold_cache:
+        get_cache().clear()
+    _check(scenario, scenario.request(client, rng))
+
+
+def _check(scenario: Scenario, response) -> None:
+    if response.status_code != scenario.expected_status:
+        raise AssertionError(f"{scenario.name}: статус {response.status_code}, ожидался {scenario.expected_status}")
+
+
+def compare(previous: dict, current: dict) -> list[tuple[str, str, float, float, float]]:
+    """Строки сравнения `(сценарий, метрика, было, стало, изменение в %)` для общих сценариев."""
+    rows = []
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "queries", "peak_kib"):
+            old, new = before[metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((name, metric, old, new, round(change, 1)))
+    return rows
@@ -0,0 +1,115 @@
+"""
+Синтетический каталог для бенчмарков: пользователи, ингредиенты и рецепты с русскими текстами.
+
+Генерация детерминирована (`seed`), поэтому замеры разных коммитов сравнимы. Строки вставляются
+пачками через `bulk_create`, каталог в сотни тысяч рецептов создается за минуты.
+"""
+import random
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from app.cache import bump_catalogue_version
+from app.models import Recipe, RecipeCard, Ingredient, Favorite
+
+BATCH_SIZE = 2000
+
+# `favorites_count` по вставленному избранному - одним UPDATE (счетчик обычно ведут сигналы)
+FAVORITES_COUNT_SQL = """
+    UPDATE {recipe} AS recipe SET favorites_count = recipe.favorites_count + counts.total
+    FROM (SELECT recipe_id, count(*) AS total FROM {favorite} WHERE user_id = ANY(%s) GROUP BY recipe_id) AS counts
+    WHERE recipe.id = counts.recipe_id
+"""
+
+DISHES = ["Суп", "Борщ", "Салат", "Омлет", "Каша", "Пирог", "Запеканка", "Рагу", "Плов", "Котлеты", "Блины",
+          "Оладьи", "Жаркое", "Гуляш", "Сырники", "Пельмени", "Вареники", "Щи", "Солянка", "Голубцы"]
+QUALIFIERS = ["домашний", "быстрый", "праздничный", "летний", "осенний", "бабушкин", "постный", "сытный",
+              "легкий", "пряный", "деревенский", "острый", "нежный", "простой", "воскресный"]
+PRODUCTS = ["соль", "сахар", "мука", "яйцо", "молоко", "масло", "картофель", "морковь", "лук", "чеснок", "капуста",
+            "свекла", "томат", "огурец", "перец", "рис", "гречка", "курица", "говядина", "свинина", "сметана",
+            "творог", "сыр", "укроп", "петрушка", "грибы", "фасоль", "горох", "яблоко", "лимон"]
+PRODUCT_KINDS = ["", "свежий", "молотый", "сушеный", "копченый", "отварной", "мелкий", "крупный", "домашний",
+                 "фермерский"]
+SENTENCES = [
+    "Нарежьте овощи небольшими кубиками.",
+    "Доведите воду до кипения и посолите.",
+    "Обжарьте лук до золотистого цвета.",
+    "Добавьте специи и тушите под крышкой.",
+    "Подавайте горячим со сметаной и зеленью.",
+    "Выпекайте в разогретой духовке около получаса.",
+    "Тщательно перемешайте все ингредиенты.",
+    "Дайте блюду настояться несколько минут.",
+]
+
+
+@dataclass
+class Catalogue:
+    user_ids: list[int]
+    ingredient_ids: list[int]
+    recipe_ids: list[int]
+    favorites: dict[int, list[int]] = field(default_factory=dict)  # id пользователя -> id рецептов
+
+
+def ingredient_names(count: int) -> list[str]:
+    names = []
+    for number in range(count):
+        product = PRODUCTS[number % len(PRODUCTS)]
+        kind = PRODUCT_KINDS[number // len(PRODUCTS) % len(PRODUCT_KINDS)]
+        name = f"{product} {kind}".strip().capitalize()
+        repeat = number // (len(PRODUCTS) * len(PRODUCT_KINDS))
+        names.append(f"{name} {repeat + 1}" if repeat else name)
+    return names
+
+
+def generate_catalogue(recipes: int = 1000, users: int = 20, ingredients: int = 300,
+                       ingredients_per_recipe: int = 8, favorites_per_user: int = 50, seed: int = 1) -> Catalogue:
+    rng = random.Random(seed)
+    User = get_user_model()
+
+    created_users = User.objects.bulk_create(
+        [User(username=f"bench_user_{seed}_{number}", email=f"user{number}@example.com") for number in range(users)]
+    )
+    user_ids = [user.id for user in created_users]
+    ingredient_ids = list(Ingredient.objects.resolve_ids(ingredient_names(ingredients)).values())
+    Ingredient.objects.bulk_update([
+        Ingredient(id=pk, kcal=rng.randint(10, 900), protein=rng.randint(0, 30), fat=rng.randint(0, 90),
+                   carbs=rng.randint(0, 80))
+        for pk in ingredient_ids
+    ], ["kcal", "protein", "fat", "carbs"], batch_size=BATCH_SIZE)
+
+    recipe_ids = []
+    through = Recipe.ingredients.through
+    for start in range(0, recipes, BATCH_SIZE):
+        batch = [
+            Recipe(
+                name=f"{rng.choice(DISHES)} {rng.choice(QUALIFIERS)} №{number}",
+                description="".join(f"<p>{rng.choice(SENTENCES)}</p>" for _ in range(rng.randint(2, 6))),
+                preview_image="",
+                time_minutes=rng.randint(5, 180),
+                category=rng.choice(Recipe.Category.values),
+                user_id=rng.choice(user_ids),
+            )
+            for number in range(start, min(start + BATCH_SIZE, recipes))
+        ]
+        Recipe.objects.bulk_create(batch)
+        recipe_ids.extend(recipe.id for recipe in batch)
+        per_recipe = min(ingredients_per_recipe, len(ingredient_ids))
+        through.objects.bulk_create([
+            through(recipe_id=recipe.id, ingredient_id=ingredient_id, quantity=rng.choice((20, 50, 100, 150, 250)))
+            for recipe in batch
+            for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+        ])
+        RecipeCard.objects.refresh(recipe.id for recipe in batch)
+
+    favorites = {}
+    for user_id in user_ids:
+        favorites[user_id] = rng.sample(recipe_ids, min(favorites_per_user, len(recipe_ids)))
+        Favorite.objects.bulk_create([Favorite(user_id=user_id, recipe_id=pk) for pk in favorites[user_id]])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            FAVORITES_COUNT_SQL.format(recipe=Recipe._meta.db_table, favorite=Favorite._meta.db_table), [user_ids]
+        )
+
+    bump_catalogue_version()  # `bulk_create` не отправляет сигналы
+    return Catalogue(user_ids, ingredient_ids, recipe_ids, favorites)
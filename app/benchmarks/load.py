@@ -0,0 +1,101 @@
+"""
+Нагрузочный замер запущенного сервера (`manage.py loadtest`): много одновременных клиентов на одном asyncio.
+
+Каждый клиент держит keep-alive соединение и делает запросы подряд. "Медленный" клиент (`slow`)
+отправляет заголовки запроса с паузой - как клиент на плохой сети: пока запрос не дочитан,
+синхронный воркер (WSGI) занят, а ASGI-сервер в это время обслуживает другие соединения.
+"""
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from app.benchmarks import percentile
+
+
+@dataclass
+class LoadResult:
+    timings: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def summary(self, duration: float) -> dict:
+        if not self.timings:
+            return {"requests": 0, "errors": self.errors}
+        return {
+            "requests": len(self.timings),
+            "rps": round(len(self.timings) / duration, 1),
+            "p50_ms": round(percentile(self.timings, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.timings, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.timings, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(self.timings) * 1000, 2),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": self.errors,
+        }
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """Читает ответ целиком, возвращает статус и можно ли продолжать соединение."""
+    status_line = await reader.readuntil(b"\r\n")
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readuntil(b"\r\n")
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        await reader.read()  # Тело до закрытия соединения
+        return status, False
+    return status, headers.get("connection") != "close"
+
+
+async def _client(host: str, port: int, paths: list[str], headers: str, deadline: float, slow: float,
+                  rng: random.Random, result: LoadResult) -> None:
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n{headers}".encode())
+            if slow:
+                await writer.drain()
+                await asyncio.sleep(slow)
+            writer.write(b"\r\n")
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            result.errors += 1
+            keep_alive = False
+        else:
+            result.timings.append(time.perf_counter() - started)
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url: str, paths: list[str], concurrency: int, duration: float, slow: float = 0.0,
+                   headers: dict[str, str] | None = None, seed: int = 1) -> dict:
+    """`concurrency` клиентов в течение `duration` секунд; `slow` - пауза посреди заголовков запроса."""
+    parts = urlsplit(url)
+    header_lines = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    result = LoadResult()
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(parts.hostname, parts.port or 80, paths, header_lines, started + duration, slow,
+                random.Random(seed + number), result)
+        for number in range(concurrency)
+    ))
+    return {"concurrency": concurrency, **result.summary(time.perf_counter() - started)}
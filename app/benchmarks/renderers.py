@@ -0,0 +1,50 @@
+"""
+Скорость рендереров API (`manage.py benchmark --renderers`): стандартный `JSONRenderer` DRF против
+`ORJSONRenderer` и `MessagePackRenderer` на одних и тех же данных - большой странице списка
+(`RecipeListSerializer`) и рецептах целиком (`RecipeSerializer`). Сериализаторы выполняются один раз,
+замеряется только кодирование.
+"""
+import statistics
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from app.api.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from app.api.serializers import RecipeListSerializer, RecipeSerializer
+from app.benchmarks import percentile
+from app.models import Recipe
+
+
+def renderers() -> dict:
+    result = {"json": JSONRenderer(), "orjson": ORJSONRenderer()}
+    if msgpack is not None:
+        result["msgpack"] = MessagePackRenderer()
+    return result
+
+
+def payloads(items: int) -> dict:
+    return {
+        "list": {"results": RecipeListSerializer(Recipe.objects.for_list()[:items], many=True).data},
+        "detail": RecipeSerializer(Recipe.objects.for_detail()[:max(items // 10, 1)], many=True).data,
+    }
+
+
+def run_renderers(items: int = 500, iterations: int = 50) -> dict:
+    """`{данные: {рендерер: {p50_ms, mean_ms, bytes, mb_s}}}`."""
+    results = {}
+    for name, data in payloads(items).items():
+        results[name] = {}
+        for renderer_name, renderer in renderers().items():
+            body = renderer.render(data)  # И прогрев
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                renderer.render(data)
+                timings.append(time.perf_counter() - started)
+            results[name][renderer_name] = {
+                "p50_ms": round(percentile(timings, 50) * 1000, 3),
+                "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+                "bytes": len(body),
+                "mb_s": round(len(body) / statistics.fmean(timings) / 1024 / 1024, 1),
+            }
+    return results
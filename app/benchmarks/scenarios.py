@@ -0,0 +1,69 @@
+"""Сценарии `manage.py benchmark`: главная, страница рецепта, избранное, API (список в JSON и MessagePack,
+рецепт, поиск, фильтры, подбор по ингредиентам, подсказки), создание, страницы анонимного посетителя
+без сессии и с сессией."""
+from django.test import Client
+
+from app.api.renderers import msgpack
+from app.benchmarks import Scenario
+from app.benchmarks.catalogue import Catalogue, DISHES, ingredient_names
+
+SEARCH_TERMS = ["суп", "каша домашний", "борщ", "пирог OR запеканка", "салат летний"]
+
+
+def default_scenarios(catalogue: Catalogue) -> list[Scenario]:
+    recipe_ids = catalogue.recipe_ids
+    names = ingredient_names(len(catalogue.ingredient_ids))
+
+    def api_filter(client, rng):
+        return client.get("/api/recipes/", {
+            "category": rng.choice("BDS"),
+            "time_max": rng.choice((30, 60, 120)),
+            "ingredients_all": ",".join(map(str, rng.sample(catalogue.ingredient_ids, 2))),
+            "ingredients_none": rng.choice(catalogue.ingredient_ids),
+        })
+
+    def api_pantry(client, rng):
+        pantry = rng.sample(catalogue.ingredient_ids, min(30, len(catalogue.ingredient_ids)))
+        return client.get("/api/recipes/pantry/", {"ingredients": ",".join(map(str, pantry))})
+
+    def api_autocomplete(client, rng):
+        # Как при наборе: первые 2-5 букв названия блюда
+        word = rng.choice(DISHES).lower()
+        return client.get("/api/recipes/autocomplete/", {"q": word[:rng.randint(2, 5)]})
+
+    # Анонимные посетители: новый (без cookie сессии) и с избранным в сессии - ее чтение на каждый запрос
+    # зависит от `SESSION_ENGINE` (`manage.py benchmark --session-engine`).
+    anonymous, with_session = Client(), Client()
+    with_session.post(f"/recipe/favorite/{recipe_ids[0]}", {"favorite": "yes"})
+
+    def create_recipe(client, rng):
+        return client.post("/api/recipes/", {
+            "name": f"{rng.choice(DISHES)} новый",
+            "description": "<p>Смешайте и подавайте.</p>",
+            "preview_image": "images/bench.jpg",
+            "time_minutes": rng.randint(5, 60),
+            "category": "D",
+            "ingredients": [{"name": name} for name in rng.sample(names, min(10, len(names)))],
+        }, content_type="application/json")
+
+    return [
+        Scenario("home", lambda client, rng: client.get("/")),
+        Scenario("home_search", lambda client, rng: client.get("/", {"search": rng.choice(SEARCH_TERMS)})),
+        Scenario("show_recipe", lambda client, rng: client.get(f"/recipe/{rng.choice(recipe_ids)}")),
+        Scenario("favorites", lambda client, rng: client.get("/recipe/favorites")),
+        Scenario("api_list", lambda client, rng: client.get("/api/recipes/")),
+        # `MessagePackRenderer` подключен, только если установлен `msgpack`
+        *([Scenario("api_list_msgpack",
+                    lambda client, rng: client.get("/api/recipes/", HTTP_ACCEPT="application/msgpack"))]
+          if msgpack is not None else []),
+        Scenario("api_detail", lambda client, rng: client.get(f"/api/recipes/{rng.choice(recipe_ids)}")),
+        Scenario("api_search",
+                 lambda client, rng: client.get("/api/recipes/", {"search": rng.choice(SEARCH_TERMS)})),
+        Scenario("api_filter", api_filter),
+        Scenario("api_pantry", api_pantry),
+        Scenario("api_autocomplete", api_autocomplete),
+        Scenario("anon_recipe", lambda client, rng: anonymous.get(f"/recipe/{rng.choice(recipe_ids)}")),
+        Scenario("anon_session",
+                 lambda client, rng: with_session.get(f"/recipe/{rng.choice(recipe_ids)}")),
+        Scenario("create_recipe", create_recipe, expected_status=201),
+    ]
@@ -0,0 +1,117 @@
+"""
+Версионированный кэш рецептов.
+
+Ключи кэшированных данных содержат "версию": общую версию каталога (для списков)
+или версию конкретного рецепта (для страниц рецепта). При изменении данных версия
+меняется сигналами (см. `app.signals`), и старые записи просто перестают читаться,
+пока их не вытеснит LRU. Поэтому после правки рецепта устаревших ответов не бывает.
+
+Версия - случайный токен, а не счетчик: если запись версии вытеснена из кэша,
+новая версия не совпадет ни с одной старой.
+
+Async view (`app.async_views`) вызывают кэш синхронно: это LRU в памяти процесса, без ввода-вывода,
+а `sync_to_async` на каждое чтение стоил бы переключения потока.
+"""
+import hashlib
+import time
+import uuid
+from datetime import datetime
+
+from django.utils import timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+CATALOGUE_VERSION_KEY = "recipes:catalogue:version"
+RECIPE_VERSION_KEY = "recipes:recipe:{}:version"
+CATALOGUE_DELETED_AT_KEY = "recipes:catalogue:deleted-at"
+LAST_WRITE_KEY = "recipes:catalogue:written-at"
+_MISSING = object()
+
+
+def get_cache():
+    return caches[settings.RECIPES_CACHE_ALIAS]
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _get_version(key: str) -> str:
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # `add` не перезапишет версию, если ее успел создать параллельный запрос.
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_catalogue_version() -> str:
+    return _get_version(CATALOGUE_VERSION_KEY)
+
+
+def get_recipe_version(recipe_id: int) -> str:
+    return _get_version(RECIPE_VERSION_KEY.format(recipe_id))
+
+
+def bump_catalogue_version() -> tuple[str | None, str]:
+    """Меняет версию каталога, возвращает прежнюю и новую."""
+    cache, version = get_cache(), _new_version()
+    previous = cache.get(CATALOGUE_VERSION_KEY)
+    cache.set_many({CATALOGUE_VERSION_KEY: version, LAST_WRITE_KEY: time.time()}, timeout=None)
+    return previous, version
+
+
+def bump_recipe_versions(recipe_ids, catalogue: bool = True) -> tuple[str | None, str] | None:
+    """
+    Инвалидирует рецепты и все списки (в них тоже есть эти рецепты), возвращает смену версии каталога.
+    `catalogue=False` - изменились данные, которых нет в списках (например, счетчик избранного).
+    """
+    versions = {RECIPE_VERSION_KEY.format(pk): _new_version() for pk in recipe_ids}
+    get_cache().set_many({**versions, LAST_WRITE_KEY: time.time()}, timeout=None)
+    if catalogue:
+        return bump_catalogue_version()
+    return None
+
+
+def get_last_write() -> float | None:
+    """Время (`time.time()`) последнего изменения рецептов, известного этому кэшу (см. `app.replica`)."""
+    return get_cache().get(LAST_WRITE_KEY)
+
+
+def record_catalogue_deletion() -> None:
+    get_cache().set(CATALOGUE_DELETED_AT_KEY, timezone.now(), timeout=None)
+
+
+def get_catalogue_deletion() -> datetime | None:
+    """Время последнего удаления рецепта (известное этому кэшу)."""
+    return get_cache().get(CATALOGUE_DELETED_AT_KEY)
+
+
+def _digest(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def list_cache_key(kind: str, url: str) -> str:
+    """Ключ страницы списка: версия каталога + полный URL (фильтры, сортировка, курсор)."""
+    return f"recipes:{kind}:{get_catalogue_version()}:{_digest(url)}"
+
+
+def recipe_cache_key(kind: str, recipe_id: int) -> str:
+    return f"recipes:{kind}:{recipe_id}:{get_recipe_version(recipe_id)}"
+
+
+def get_or_set(key: str, default):
+    """Значение из кэша или результат `default()`, сохраненный на `RECIPES_CACHE_TIMEOUT` секунд."""
+    return get_cache().get_or_set(key, default, timeout=settings.RECIPES_CACHE_TIMEOUT)
+
+
+async def aget_or_set(key: str, default):
+    """`get_or_set` для async view: `default` - корутинная функция (async ORM)."""
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = await default()
+        cache.add(key, value, timeout=settings.RECIPES_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,64 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+# Объем записей по имени кэша (как `_caches` в `locmem`: общий для всех потоков процесса).
+_usage = {}
+
+
+class _Usage:
+    def __init__(self):
+        self.sizes: dict[str, int] = {}
+        self.total = 0
+
+
+class BoundedLocMemCache(LocMemCache):
+    """
+    `LocMemCache` (вытеснение давно не использованных записей - LRU), который ограничивает
+    не только число записей (`MAX_ENTRIES`), но и их суммарный объем в байтах (`OPTIONS["MAX_BYTES"]`).
+
+    Страницы списка рецептов намного больше остальных записей, поэтому лимит только по количеству
+    не защищает процесс от роста памяти.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_bytes = int(params.get("OPTIONS", {}).get("MAX_BYTES", 0))
+        self._usage = _usage.setdefault(name, _Usage())
+
+    def _set(self, key, value, timeout=None):
+        self._forget(key)
+        super()._set(key, value, timeout)
+        self._usage.sizes[key] = len(value)
+        self._usage.total += len(value)
+        # Вытесняем с "холодного" конца, но только что записанное значение оставляем.
+        while self._max_bytes and self._usage.total > self._max_bytes and len(self._cache) > 1:
+            self._pop_oldest()
+
+    def _delete(self, key):
+        self._forget(key)
+        return super()._delete(key)
+
+    def _cull(self):
+        if self._cull_frequency == 0:
+            self._clear()
+            return
+        for _ in range(len(self._cache) // self._cull_frequency):
+            self._pop_oldest()
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._cache.clear()
+        self._expire_info.clear()
+        self._usage.sizes.clear()
+        self._usage.total = 0
+
+    def _pop_oldest(self):
+        key, _ = self._cache.popitem()
+        self._expire_info.pop(key, None)
+        self._forget(key)
+
+    def _forget(self, key):
+        # `incr` меняет значение в обход `_set`; счетчики маленькие, поэтому учитываем размер при записи.
+        self._usage.total -= self._usage.sizes.pop(key, 0)
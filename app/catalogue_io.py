@@ -0,0 +1,59 @@
+"""
+Форматы файлов для `manage.py import_recipes` / `manage.py export_recipes`.
+
+JSONL - один рецепт (JSON-объект) на строку. CSV - те же поля, ингредиенты в одной колонке через "|".
+Файлы читаются и пишутся построчно, поэтому размер каталога на расход памяти не влияет.
+"""
+import csv
+import json
+from pathlib import Path
+from typing import IO, Iterator
+
+FORMATS = ("jsonl", "csv")
+FIELDS = ["id", "name", "description", "preview_image", "time_minutes", "category", "user", "ingredients",
+          "created_at"]
+INGREDIENTS_SEPARATOR = "|"
+
+
+def detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    suffix = Path(path).suffix.lstrip(".").lower()
+    return "csv" if suffix == "csv" else "jsonl"
+
+
+def read_records(file: IO[str], fmt: str) -> Iterator[tuple[int, dict]]:
+    """Рецепты из файла вместе с номером строки (для сообщений об ошибках)."""
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            ingredients = record.get("ingredients") or ""
+            record["ingredients"] = [name for name in ingredients.split(INGREDIENTS_SEPARATOR) if name.strip()]
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_number, {"_error": f"некорректный JSON: {exc}"}
+                continue
+            if not isinstance(record, dict):
+                record = {"_error": f"ожидался JSON-объект, а не {type(record).__name__}"}
+            yield line_number, record
+
+
+class RecordWriter:
+    def __init__(self, file: IO[str], fmt: str):
+        self._file = file
+        self._fmt = fmt
+        if fmt == "csv":
+            self._csv = csv.DictWriter(file, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record: dict) -> None:
+        if self._fmt == "csv":
+            self._csv.writerow({**record, "ingredients": INGREDIENTS_SEPARATOR.join(record["ingredients"])})
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,64 @@
+"""
+Валидаторы для условных GET-запросов (`django.views.decorators.http.condition`).
+
+Функции вызываются до view: если клиент прислал совпадающий `If-None-Match`/`If-Modified-Since`,
+ответ `304 Not Modified` отдается без запросов рецептов и сериализации.
+ETag строится из версий кэша (см. `app.cache`), поэтому для его проверки база не нужна.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Max
+
+from .cache import (
+    get_or_set, get_catalogue_version, get_recipe_version, get_catalogue_deletion, recipe_cache_key, list_cache_key
+)
+from .favorite_service import FavoriteRecipesService
+from .models import Recipe
+
+
+def _etag(*parts) -> str:
+    return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+
+def recipe_etag(request, pk: int, *args, **kwargs) -> str:
+    # Один URL может отдавать разные представления (JSON, Browsable API) - учитываем `Accept`.
+    return _etag(get_recipe_version(pk), request.META.get("HTTP_ACCEPT", ""))
+
+
+def recipe_last_modified(request, pk: int, *args, **kwargs) -> datetime | None:
+    return get_or_set(
+        recipe_cache_key("updated-at", pk),
+        lambda: Recipe.objects.filter(pk=pk).values_list("updated_at", flat=True).first(),
+    )
+
+
+def recipe_list_etag(request, *args, **kwargs) -> str:
+    return _etag(get_catalogue_version(), request.get_full_path(), request.META.get("HTTP_ACCEPT", ""))
+
+
+def recipe_list_last_modified(request, *args, **kwargs) -> datetime | None:
+    """
+    Самое свежее `updated_at` каталога (по индексу) - для любых фильтров это не раньше реального изменения.
+    Удаление рецепта `updated_at` не меняет, поэтому учитываем и время последнего удаления.
+    """
+    newest = get_or_set(
+        list_cache_key("updated-at", ""),
+        lambda: Recipe.objects.aggregate(newest=Max("updated_at"))["newest"],
+    )
+    deleted_at = get_catalogue_deletion()
+    return max(filter(None, [newest, deleted_at]), default=None)
+
+
+def recipe_page_etag(request, recipe_id: int, *args, **kwargs) -> str:
+    """
+    ETag HTML-страницы рецепта: кроме версии рецепта, страница зависит от пользователя
+    (меню, кнопка "В избранное") и CSRF-cookie в форме.
+    """
+    return _etag(
+        get_recipe_version(recipe_id),
+        request.user.pk,
+        sorted(FavoriteRecipesService(request).favorites_ids),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    )
@@ -1,37 +1,143 @@
-from django.core.handlers.wsgi import WSGIRequest
+"""
+Избранные рецепты.
 
-from .models import Recipe
+У авторизованных пользователей избранное хранится в таблице `Favorite`: добавление и удаление -
+один `INSERT ... ON CONFLICT DO NOTHING` / `DELETE` без чтения и перезаписи всей сессии, поэтому
+две вкладки не затирают изменения друг друга. У анонимных пользователей - список id в сессии,
+при входе он переносится в таблицу (`merge_session_favorites`).
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
 
+from .cache import bump_recipe_versions
+from .models import Favorite, Recipe
 
-class FavoriteRecipesService:
+SESSION_KEY = "favorites"
 
-    def __init__(self, request: WSGIRequest):
-        self._session = request.session
+_INSERT_SQL = """
+    INSERT INTO {favorite} (user_id, recipe_id, created_at)
+    SELECT %s, id, NOW() FROM {recipe} WHERE id = ANY(%s) ORDER BY id
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+    RETURNING recipe_id
+"""
+_DELETE_SQL = "DELETE FROM {favorite} WHERE user_id = %s AND recipe_id = ANY(%s) RETURNING recipe_id"
 
-        # Если у сессии пользователя нет ключа `favorites`, то мы его создаем
-        self._session.setdefault("favorites", [])
 
-        # Если вдруг это был не список, то задаем его явно.
-        if not isinstance(self._session["favorites"], list):
-            self._session["favorites"] = []
+class FavoriteRecipesService:
+
+    def __init__(self, request: HttpRequest, user=None):
+        self._request = request
+        self._session = request.session
+        # `user` передают, когда `request.user` еще не выставлен (сигнал `user_logged_in`).
+        self._user = user or request.user
+        if self._user.is_authenticated and SESSION_KEY in self._session:
+            merge_session_favorites(request, self._user)
 
     def add_favorite(self, recipe: Recipe) -> None:
-        if recipe.id not in self._session["favorites"]:
-            self._session["favorites"].append(recipe.id)
-            self._session.save()  # Сохраняем в backend сессий
+        self.add_many([recipe.id])
 
     def remove_favorite(self, recipe_id: int) -> None:
-        try:
-            self._session["favorites"].remove(recipe_id)
-        except ValueError:
-            pass
-        else:
-            self._session.save()  # Сохраняем в backend сессий
+        self.remove_many([recipe_id])
+
+    def add_many(self, recipe_ids) -> list[int]:
+        """Добавляет рецепты в избранное и возвращает id тех, которых там еще не было (по возрастанию)."""
+        recipe_ids = _unique_ids(recipe_ids)
+        if not self._user.is_authenticated:
+            favorites = self._session_ids()
+            added = [pk for pk in Recipe.objects.filter(pk__in=recipe_ids).order_by("id").values_list("id", flat=True)
+                     if pk not in favorites]
+            if added:  # Без изменений сессия не сохраняется (и не создается у нового посетителя)
+                self._save_session(list(favorites) + added)
+            return added
+
+        added = self._execute(_INSERT_SQL, recipe_ids)
+        self._update_counts(added, 1)
+        return added
+
+    def remove_many(self, recipe_ids) -> list[int]:
+        """Удаляет рецепты из избранного и возвращает id тех, которые там были (по возрастанию)."""
+        recipe_ids = _unique_ids(recipe_ids)
+        if not self._user.is_authenticated:
+            favorites = self._session_ids()
+            removed = sorted(pk for pk in recipe_ids if pk in favorites)
+            if removed:
+                self._save_session([pk for pk in favorites if pk not in removed])
+            return removed
+
+        removed = self._execute(_DELETE_SQL, recipe_ids)
+        self._update_counts(removed, -1)
+        return removed
 
     @property
-    def favorites_ids(self) -> list[int]:
-        return self._session["favorites"]
+    def favorites_ids(self) -> set[int]:
+        # Несколько обращений за запрос (ETag, меню, шаблон) - одно чтение из базы.
+        if not hasattr(self._request, "_favorites_ids"):
+            if self._user.is_authenticated:
+                ids = Favorite.objects.filter(user_id=self._user.pk).values_list("recipe_id", flat=True)
+            else:
+                ids = self._session_ids()
+            self._request._favorites_ids = set(ids)
+        return self._request._favorites_ids
+
+    async def afavorites_ids(self) -> set[int]:
+        """`favorites_ids` для async view: запрос через async ORM, результат запоминается в запросе так же."""
+        if not hasattr(self._request, "_favorites_ids"):
+            if self._user.is_authenticated:
+                ids = [pk async for pk in Favorite.objects.filter(user_id=self._user.pk).values_list("recipe_id", flat=True)]
+            else:
+                ids = self._session_ids()
+            self._request._favorites_ids = set(ids)
+        return self._request._favorites_ids
+
+    def _session_ids(self) -> dict[int, None]:
+        # Упорядоченное множество: порядок добавления сохраняется, проверка `in` - O(1).
+        favorites = self._session.get(SESSION_KEY)
+        if not isinstance(favorites, list):
+            return {}
+        return dict.fromkeys(favorites)
+
+    def _save_session(self, ids: list[int]) -> None:
+        # Присваивание помечает сессию измененной, `SessionMiddleware` сохранит ее один раз в конце запроса.
+        self._session[SESSION_KEY] = ids
+        self._forget_cached_ids()
+
+    def _execute(self, sql: str, recipe_ids: list[int]) -> list[int]:
+        if not recipe_ids:
+            return []
+        query = sql.format(favorite=Favorite._meta.db_table, recipe=Recipe._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(query, [self._user.pk, recipe_ids])
+            # Порядок строк `RETURNING` не гарантирован
+            changed = sorted(row[0] for row in cursor.fetchall())
+        self._forget_cached_ids()
+        return changed
+
+    def _update_counts(self, recipe_ids: list[int], delta: int) -> None:
+        if not recipe_ids:
+            return
+        Recipe.objects.filter(pk__in=recipe_ids).update(favorites_count=F("favorites_count") + delta)
+        # Счетчик есть только на странице рецепта, списки каталога не инвалидируем.
+        transaction.on_commit(lambda: bump_recipe_versions(recipe_ids, catalogue=False))
+
+    def _forget_cached_ids(self) -> None:
+        if hasattr(self._request, "_favorites_ids"):
+            del self._request._favorites_ids
+
+
+def _unique_ids(recipe_ids) -> list[int]:
+    return list(dict.fromkeys(int(pk) for pk in recipe_ids))
+
+
+def merge_session_favorites(request: HttpRequest, user) -> None:
+    """Переносит избранное анонимной сессии в таблицу после входа пользователя."""
+    session_ids = request.session.pop(SESSION_KEY, None)
+    if isinstance(session_ids, list) and session_ids:
+        with transaction.atomic():
+            FavoriteRecipesService(request, user).add_many(session_ids)
 
 
-def favorite_service_preprocessor(request: WSGIRequest) -> dict[str, list[int]]:
-    return {"favorites_ids": FavoriteRecipesService(request).favorites_ids}
+def favorite_service_preprocessor(request: HttpRequest) -> dict[str, set[int]]:
+    # Лениво: сессия и таблица избранного читаются, только если шаблон обращается к `favorites_ids`.
+    return {"favorites_ids": SimpleLazyObject(lambda: FavoriteRecipesService(request).favorites_ids)}
@@ -1,7 +1,10 @@
 from django import forms
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Value
+from django.db.models.functions import Lower, Trim
 from ckeditor.fields import CKEditorWidget
+from .images import store_image
+from .widgets import AutocompleteSelectMultiple
 from .models import Recipe, Ingredient
 
 
@@ -13,30 +16,33 @@ class RecipeForm(forms.ModelForm):
         fields = ["name", "preview_image", "time_minutes", "category", "ingredients", "description"]
         widgets = {
             "description": CKEditorWidget(),
+            # В HTML только выбранные ингредиенты, остальные - подсказками из API
+            "ingredients": AutocompleteSelectMultiple("ingredients"),
         }
 
     def save(self, commit=True):
-        image: InMemoryUploadedFile = self.cleaned_data["preview_image"]
-
-        image_folder_path = settings.MEDIA_ROOT / "images"
-        image_folder_path.mkdir(parents=True, exist_ok=True)
-
-        with (image_folder_path / image.name).open("bw") as image_file:
-            image_file.write(image.read())
-        self.instance.preview_image = f"images/{image.name}"
+        image: UploadedFile = self.cleaned_data["preview_image"]
+        # Файл пишется на диск по частям под хэшем содержимого (см. `app.images`)
+        self.instance.preview_image = store_image(image)
         return super().save(commit)
 
 
 class IngredientForm(forms.ModelForm):
     class Meta:
         model = Ingredient
-        fields = ["name", "calories_count", "description"]
+        fields = ["name", "kcal", "protein", "fat", "carbs", "description"]
         widgets = {
             "description": CKEditorWidget(),
         }
 
-    def ingredient_exist(self):
-        name = self.cleaned_data.get('name')
-        if name and Ingredient.objects.filter(name=name).exists():
+    # Вызывается при валидации поля `name` (метод `clean_` + название поля)
+    def clean_name(self):
+        name = self.cleaned_data.get('name', '').strip()
+        duplicates = (
+            Ingredient.objects.annotate(key=Lower(Trim("name")))
+            .filter(key=Lower(Value(name)))
+            .exclude(pk=self.instance.pk)
+        )
+        if name and duplicates.exists():  # Без учета регистра, как и уникальный индекс
             raise forms.ValidationError('Такой ингредиент уже существует')
         return name
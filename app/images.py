@@ -0,0 +1,163 @@
+"""
+Хранение картинок рецептов.
+
+Загрузка пишется на диск по частям (`chunks()`), не читая файл в память целиком, и сохраняется
+под именем из SHA-256 содержимого: `images/ab/ab12...ef.jpg`. Одинаковые файлы хранятся один раз,
+а файл с тем же именем больше не может затереть картинку другого рецепта. Расширение - по формату
+картинки, а не из имени файла у клиента.
+
+Уменьшенные копии (WebP и JPEG) для карточек, страницы рецепта и миниатюр создаются в фоновом
+потоке, чтобы не задерживать ответ. Пока копий нет, отдается оригинал. Готовы ли копии, запоминается
+в памяти процесса (`derivatives_ready`): при выводе списков диск не проверяется на каждую картинку.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = "images"
+
+# Максимальные размеры (ширина, высота) уменьшенных копий, пропорции сохраняются.
+DERIVATIVE_SIZES = {
+    "thumb": (160, 120),
+    "card": (480, 360),
+    "detail": (1200, 900),
+}
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# Расширение оригинала по формату Pillow, для остальных форматов - название формата
+IMAGE_SUFFIXES = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-derivatives")
+
+# Файл картинки -> время проверки (`None` - копии готовы, больше не проверяется). Копии создаются все сразу,
+# поэтому "копий еще нет" перепроверяется не чаще раза в `DERIVATIVES_RECHECK_SECONDS` (их мог
+# создать другой процесс или `manage.py generate_image_derivatives`).
+_derivatives_checked: dict[str, float | None] = {}
+DERIVATIVES_RECHECK_SECONDS = 30
+DERIVATIVES_MEMO_SIZE = 100_000
+
+
+def store_image(upload: UploadedFile) -> str:
+    """Сохраняет загрузку под хэшем содержимого и возвращает путь относительно `MEDIA_ROOT`."""
+    folder = Path(settings.MEDIA_ROOT) / IMAGES_DIR
+    folder.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    tmp = tempfile.NamedTemporaryFile(dir=folder, suffix=".part", delete=False)
+    try:
+        with tmp:
+            for chunk in upload.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+        with Image.open(tmp.name) as image:
+            image.verify()
+            suffix = IMAGE_SUFFIXES.get(image.format, f".{image.format.lower()}")
+    except BaseException:
+        os.remove(tmp.name)  # Недописанный файл или не картинка
+        raise
+
+    name = content_addressed_name(digest.hexdigest(), suffix)
+    target = Path(settings.MEDIA_ROOT) / name
+    if target.exists():
+        os.unlink(tmp.name)  # Такой файл уже есть
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp.name, target)  # Атомарно: файл не бывает виден частично записанным
+
+    schedule_derivatives(name)
+    return name
+
+
+def content_addressed_name(sha256: str, suffix: str) -> str:
+    suffix = suffix.lower() if suffix else ".jpg"
+    return f"{IMAGES_DIR}/{sha256[:2]}/{sha256}{suffix}"
+
+
+def is_content_addressed(name: str) -> bool:
+    path = Path(name)
+    return len(path.stem) == 64 and path.parent.name == path.stem[:2]
+
+
+def derivative_name(name: str, size: str, fmt: str) -> str:
+    path = Path(name)
+    return str(path.with_name(f"{path.stem}_{size}.{fmt}"))
+
+
+def schedule_derivatives(name: str) -> None:
+    if settings.IMAGE_DERIVATIVES_ASYNC:
+        _executor.submit(_generate_derivatives_safe, name)
+    else:
+        _generate_derivatives_safe(name)
+
+
+def _generate_derivatives_safe(name: str) -> None:
+    try:
+        generate_derivatives(name)
+    except Exception:
+        logger.exception("Не удалось создать уменьшенные копии для %s", name)
+
+
+def generate_derivatives(name: str, overwrite: bool = False) -> list[str]:
+    """Создает все уменьшенные копии картинки и возвращает имена созданных файлов."""
+    media_root = Path(settings.MEDIA_ROOT)
+    created = []
+    with Image.open(media_root / name) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for size, bounds in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail(bounds, Image.LANCZOS)  # Только уменьшает, маленькие картинки не растягивает
+        for fmt, (pil_format, options) in DERIVATIVE_FORMATS.items():
+            target = media_root / derivative_name(name, size, fmt)
+            if target.exists() and not overwrite:
+                continue
+            with tempfile.NamedTemporaryFile(dir=target.parent, suffix=".part", delete=False) as tmp:
+                resized.save(tmp, pil_format, **options)
+            os.replace(tmp.name, target)
+            created.append(derivative_name(name, size, fmt))
+    _remember_derivatives(media_root / name, None)
+    return created
+
+
+def _remember_derivatives(path: Path, checked_at: float | None) -> None:
+    if len(_derivatives_checked) >= DERIVATIVES_MEMO_SIZE:
+        _derivatives_checked.clear()
+    _derivatives_checked[str(path)] = checked_at
+
+
+def derivatives_ready(name: str) -> bool:
+    """Созданы ли уменьшенные копии картинки: диск проверяется одним `stat` последней из них."""
+    path = Path(settings.MEDIA_ROOT) / name
+    if str(path) in _derivatives_checked:
+        checked_at = _derivatives_checked[str(path)]
+        if checked_at is None:
+            return True
+        if time.monotonic() - checked_at < DERIVATIVES_RECHECK_SECONDS:
+            return False
+    size, fmt = list(DERIVATIVE_SIZES)[-1], list(DERIVATIVE_FORMATS)[-1]  # Создается последней
+    ready = (Path(settings.MEDIA_ROOT) / derivative_name(name, size, fmt)).exists()
+    _remember_derivatives(path, None if ready else time.monotonic())
+    return ready
+
+
+def image_url(name: str, size: str | None = None, fmt: str = "jpg") -> str | None:
+    """URL уменьшенной копии, если она уже создана. Без `size` - URL оригинала."""
+    if not name:
+        return None
+    if size is not None:
+        if not derivatives_ready(name):
+            return None
+        name = derivative_name(name, size, fmt)
+    return f"{settings.MEDIA_URL}{name}"
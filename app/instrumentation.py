@@ -0,0 +1,84 @@
+"""
+Метрики текущего запроса: SQL (число запросов и время), шаблоны, сериализаторы DRF.
+
+Метрики собирает `app.middleware.PerformanceMiddleware` и кладет в contextvar, а код, который
+хочет что-то замерить, пишет туда через `timed("...")`. Вне запроса (команды, тесты) замеры ничего не делают.
+
+SQL замеряет обертка `record_query`, которая ставится на каждое соединение при его открытии: async view
+ходят в базу из потоков `sync_to_async` со своими соединениями, а contextvar с метриками переходит
+в эти потоки вместе с контекстом.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Сколько SQL хранить для лога медленного запроса: больше не нужно, а память на запрос ограничена.
+MAX_RECORDED_QUERIES = 200
+
+
+@dataclass
+class RequestMetrics:
+    db_time: float = 0.0
+    query_count: int = 0
+    queries: list[tuple[float, str]] = field(default_factory=list)  # (длительность, SQL)
+    timings: dict[str, float] = field(default_factory=dict)
+    _depth: dict[str, int] = field(default_factory=dict)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка для `connection.execute_wrapper`: замеряет каждый SQL-запрос."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.db_time += elapsed
+            self.query_count += 1
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+    def slowest_queries(self, limit: int = 5) -> list[tuple[float, str]]:
+        return sorted(self.queries, key=lambda item: item[0], reverse=True)[:limit]
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка `connection.execute_wrappers`: пишет SQL в метрики текущего запроса, если они есть."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_metrics(connection) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request() -> tuple[RequestMetrics, object]:
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name: str):
+    """Добавляет время блока к метрике `name`. Вложенные блоки с тем же именем не считаются дважды."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    depth = metrics._depth.get(name, 0)
+    metrics._depth[name] = depth + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] = depth
+        if depth == 0:
+            metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - started
@@ -0,0 +1,140 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from app.benchmarks import compare, run_scenario
+from app.benchmarks.catalogue import generate_catalogue
+from app.benchmarks.renderers import run_renderers
+from app.benchmarks.scenarios import default_scenarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет основные view на синтетическом каталоге во временной тестовой базе: "
+        "p50/p95 задержки, число SQL-запросов, пик памяти. Результат - JSON для сравнения между коммитами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--ingredients", type=int, default=300)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--warm-cache", action="store_true",
+                            help="Не очищать кэш перед запросами (по умолчанию замеряется работа view без кэша).")
+        parser.add_argument("--session-engine", choices=["db", "cached_db", "signed_cookies"],
+                            help="Backend сессий на время замера (по умолчанию - из настроек).")
+        parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="Запустить только эти сценарии.")
+        parser.add_argument("--renderers", action="store_true",
+                            help="Еще сравнить рендереры API (JSON DRF, orjson, MessagePack) на странице из "
+                                 "--render-items рецептов.")
+        parser.add_argument("--render-items", type=int, default=500)
+        parser.add_argument("--output", default="benchmark.json", help="Куда записать результаты.")
+        parser.add_argument("--compare", metavar="PATH", help="JSON предыдущего замера для сравнения.")
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                previous = json.load(file)
+
+        # Как и тесты: отдельная база и DEBUG=False, рабочая база не затрагивается.
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        session_engine = settings.SESSION_ENGINE
+        if options["session_engine"]:
+            session_engine = f"django.contrib.sessions.backends.{options['session_engine']}"
+        try:
+            # Все запросы замера - от одного клиента: без лимитов частоты (`app.throttling`) ответы были бы 429
+            rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+            with override_settings(SESSION_ENGINE=session_engine, REST_FRAMEWORK=rest_framework):
+                report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+        if previous is not None:
+            if previous["meta"]["catalogue"] != report["meta"]["catalogue"]:
+                self.stdout.write(self.style.WARNING("Замеры сделаны на разных каталогах, сравнение условное."))
+            self.stdout.write(f"\n{'Сценарий':<16}{'Метрика':<10}{'Было':>12}{'Стало':>12}{'Изм., %':>10}")
+            for name, metric, old, new, change in compare(previous, report):
+                self.stdout.write(f"{name:<16}{metric:<10}{old:>12}{new:>12}{change:>+10.1f}")
+
+    def run(self, options) -> dict:
+        started = time.monotonic()
+        catalogue = generate_catalogue(
+            recipes=options["recipes"], users=options["users"], ingredients=options["ingredients"],
+            ingredients_per_recipe=options["ingredients_per_recipe"], seed=options["seed"],
+        )
+        self.stdout.write(f"Каталог: {options['recipes']} рецептов за {time.monotonic() - started:.1f} с")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")  # Статистика планировщика как на "живой" базе
+
+        client = Client()
+        client.force_login(get_user_model().objects.get(pk=catalogue.user_ids[0]))
+
+        scenarios = default_scenarios(catalogue)
+        if options["only"]:
+            unknown = set(options["only"]) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in options["only"]]
+
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(
+                scenario, client, iterations=options["iterations"], warmup=options["warmup"],
+                cold_cache=not options["warm_cache"], seed=options["seed"],
+            )
+            result = results[scenario.name]
+            self.stdout.write(
+                f"{scenario.name:<16} p50 {result['p50_ms']:>8.2f} мс  p95 {result['p95_ms']:>8.2f} мс  "
+                f"запросов {result['queries']:>3}  память {result['peak_kib']:>8.1f} КиБ"
+            )
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "cache": "warm" if options["warm_cache"] else "cold",
+                "session_engine": settings.SESSION_ENGINE,
+                "catalogue": {key: options[key] for key in
+                              ("recipes", "users", "ingredients", "ingredients_per_recipe", "seed")},
+            },
+            "results": results,
+        }
+        if options["renderers"]:
+            report["renderers"] = run_renderers(options["render_items"], options["iterations"])
+            for payload, by_renderer in report["renderers"].items():
+                for name, result in by_renderer.items():
+                    self.stdout.write(
+                        f"render {payload:<7}{name:<9} p50 {result['p50_ms']:>8.2f} мс  "
+                        f"{result['bytes'] / 1024:>8.1f} КиБ  {result['mb_s']:>7.1f} МиБ/с"
+                    )
+        return report
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Value
+
+from app.catalogue_io import FORMATS, RecordWriter, detect_format
+from app.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в JSONL или CSV, читая базу серверным курсором (память не зависит от размера каталога)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Файл для записи, '-' - stdout.")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию - по расширению файла (иначе JSONL).")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Строк за одно чтение из курсора.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = detect_format(path, options["format"])
+        rows = Recipe.objects.order_by("id").values(
+            "id", "name", "description", "preview_image", "time_minutes", "category", "created_at",
+            author=F("user__username"),
+            # Ингредиенты собираются в массив в том же запросе
+            ingredient_names=ArrayAgg(
+                "ingredients__name", filter=Q(ingredients__isnull=False), ordering="ingredients__name",
+                default=Value([]),
+            ),
+        )
+        if path == "-":
+            self.export(rows, sys.stdout, fmt, options["chunk_size"])
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                self.export(rows, file, fmt, options["chunk_size"])
+
+    def export(self, rows, file, fmt: str, chunk_size: int) -> None:
+        writer = RecordWriter(file, fmt)
+        started = time.monotonic()
+        count = 0
+        # `iterator()` в Postgres использует серверный курсор: строки приходят порциями по `chunk_size`.
+        for row in rows.iterator(chunk_size=chunk_size):
+            # Имена аннотаций не могут совпадать с полями модели, в файле - поля `user` и `ingredients`.
+            row["user"] = row.pop("author")
+            row["ingredients"] = row.pop("ingredient_names")
+            row["created_at"] = row["created_at"].isoformat()
+            writer.write(row)
+            count += 1
+            if count % 10_000 == 0:
+                self.stderr.write(f"Выгружено {count} рецептов ({count / (time.monotonic() - started):.0f}/с)")
+        self.stderr.write(self.style.SUCCESS(f"Выгружено рецептов: {count}"))
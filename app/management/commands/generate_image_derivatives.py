@@ -0,0 +1,70 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.images import content_addressed_name, generate_derivatives, is_content_addressed
+from app.models import Recipe
+from app.signals import invalidate_recipes
+
+
+class Command(BaseCommand):
+    help = "Создает уменьшенные копии (WebP/JPEG) для уже загруженных картинок рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rehash", action="store_true",
+                            help="Перенести старые картинки в хранилище по хэшу содержимого (с дедупликацией).")
+        parser.add_argument("--overwrite", action="store_true", help="Пересоздать уже существующие копии.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.exclude(preview_image="").values_list("preview_image", flat=True).distinct()
+        media_root = Path(settings.MEDIA_ROOT)
+
+        existing = []
+        for name in names.iterator():
+            if not (media_root / name).is_file():
+                self.stderr.write(f"Файл не найден: {name}")
+                continue
+            if options["rehash"] and not is_content_addressed(name):
+                name = self.rehash(name)
+            existing.append(name)
+
+        created = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {executor.submit(generate_derivatives, name, options["overwrite"]): name for name in existing}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    created += len(future.result())
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {exc}")
+                if done % 100 == 0:
+                    self.stdout.write(f"Обработано {done}/{len(existing)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Картинок: {len(existing)}, создано копий: {created}, ошибок: {failed}"
+        ))
+
+    def rehash(self, name: str) -> str:
+        source = Path(settings.MEDIA_ROOT) / name
+        digest = hashlib.sha256()
+        with source.open("rb") as file:
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                digest.update(chunk)
+
+        new_name = content_addressed_name(digest.hexdigest(), source.suffix)
+        target = Path(settings.MEDIA_ROOT) / new_name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            source.unlink()  # Дубликат уже лежит в хранилище
+        else:
+            os.replace(source, target)
+        recipes = Recipe.objects.filter(preview_image=name)
+        recipe_ids = list(recipes.values_list("id", flat=True))
+        recipes.update(preview_image=new_name)
+        invalidate_recipes(recipe_ids)  # `update()` не отправляет сигналы
+        return new_name
@@ -0,0 +1,176 @@
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app.cache import bump_catalogue_version
+from app.catalogue_io import FORMATS, detect_format, read_records
+from app.models import Recipe, RecipeCard, Ingredient, ingredient_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает рецепты из JSONL или CSV (см. `app.catalogue_io`). Файл читается потоком, рецепты "
+        "сохраняются пачками через `bulk_create`, каждая пачка - в своей транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл для чтения, '-' - stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="По умолчанию - по расширению файла (иначе JSONL).")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Рецептов в одной транзакции.")
+        parser.add_argument("--user", help="Автор для рецептов без поля `user` (username).")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = detect_format(path, options["format"])
+        self.default_user = None
+        if options["user"]:
+            try:
+                self.default_user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Пользователь {options['user']!r} не найден")
+
+        if path == "-":
+            self.import_file(sys.stdin, fmt, options["chunk_size"])
+        else:
+            with open(path, encoding="utf-8", newline="") as file:
+                self.import_file(file, fmt, options["chunk_size"])
+
+    def import_file(self, file, fmt: str, chunk_size: int) -> None:
+        records = read_records(file, fmt)
+        started = time.monotonic()
+        imported = skipped = 0
+        try:
+            while chunk := list(islice(records, chunk_size)):
+                with transaction.atomic():
+                    created, errors = self.import_chunk(chunk)
+                imported += created
+                skipped += errors
+                self.stderr.write(
+                    f"Загружено {imported} рецептов, пропущено {skipped} "
+                    f"({imported / (time.monotonic() - started):.0f}/с)"
+                )
+        finally:
+            # `bulk_create` не отправляет сигналы - инвалидируем кэш списков один раз.
+            if imported:
+                bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Загружено рецептов: {imported}, пропущено строк: {skipped}"))
+
+    def import_chunk(self, chunk: list[tuple[int, dict]]) -> tuple[int, int]:
+        users = self.resolve_users({record["user"] for _, record in chunk if isinstance(record.get("user"), str)})
+
+        recipes, ingredient_names, created, errors = [], [], [], 0
+        for line_number, record in chunk:
+            try:
+                recipe, names, created_at = self.build_recipe(record, users)
+            except ValueError as exc:
+                errors += 1
+                self.stderr.write(f"Строка {line_number}: {exc}")
+                continue
+            recipes.append(recipe)
+            ingredient_names.append(names)
+            created.append(created_at)
+
+        # Все ингредиенты пачки - одной выборкой и одним `INSERT ... ON CONFLICT` (см. `IngredientQuerySet.resolve_ids`)
+        ingredients = Ingredient.objects.resolve_ids(name for names in ingredient_names for name in names)
+        Recipe.objects.bulk_create(recipes)  # Postgres возвращает id созданных строк
+        # `auto_now_add` в `bulk_create` ставит текущее время - дату из файла возвращаем одним UPDATE
+        restored = []
+        for recipe, created_at in zip(recipes, created):
+            if created_at is not None:
+                recipe.created_at = created_at
+                restored.append(recipe)
+        Recipe.objects.bulk_update(restored, ["created_at"])
+
+        through = Recipe.ingredients.through
+        through.objects.bulk_create(
+            [
+                through(recipe_id=recipe.id, ingredient_id=ingredients[ingredient_key(name)])
+                for recipe, names in zip(recipes, ingredient_names)
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+        RecipeCard.objects.refresh(recipe.id for recipe in recipes)
+        return len(recipes), errors
+
+    def build_recipe(self, record: dict, users: dict) -> tuple[Recipe, list[str], datetime | None]:
+        if "_error" in record:
+            raise ValueError(record["_error"])
+        name = self.text(record, "name").strip()
+        if not name:
+            raise ValueError("нет названия рецепта")
+        preview_image = self.text(record, "preview_image")
+        # Длина проверяется здесь: `DataError` в базе отменил бы всю пачку
+        check_length(Recipe, "name", name)
+        check_length(Recipe, "preview_image", preview_image)
+        category = record.get("category")
+        if category not in Recipe.Category.values:
+            raise ValueError(f"неизвестная категория {category!r}")
+        try:
+            time_minutes = int(record.get("time_minutes") or 1)
+        except (TypeError, ValueError):
+            raise ValueError(f"некорректное время {record.get('time_minutes')!r}")
+        if time_minutes < 1:
+            raise ValueError("время приготовления меньше минуты")
+        created_at = self.parse_created_at(self.text(record, "created_at"))
+
+        username = self.text(record, "user")
+        user = users.get(username) if username else self.default_user
+        if user is None:
+            raise ValueError(f"автор {username!r} не найден" if username else "не указан автор (см. --user)")
+
+        names = record.get("ingredients") or []
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise ValueError("ингредиенты - не список строк")
+        names = [n for n in names if n.strip()]
+        for n in names:
+            check_length(Ingredient, "name", n.strip())
+
+        recipe = Recipe(
+            name=name,
+            description=self.text(record, "description"),
+            preview_image=preview_image,
+            time_minutes=time_minutes,
+            category=category,
+            user=user,
+        )
+        return recipe, names, created_at
+
+    @staticmethod
+    def text(record: dict, field: str) -> str:
+        value = record.get(field)
+        if value is None:
+            return ""
+        if not isinstance(value, str):
+            raise ValueError(f"поле {field!r} не строка: {value!r}")
+        return value
+
+    @staticmethod
+    def parse_created_at(value: str) -> datetime | None:
+        """Дата создания в ISO 8601 (как пишет `export_recipes`), без зоны - в текущей зоне."""
+        if not value:
+            return None
+        try:
+            created_at = parse_datetime(value)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise ValueError(f"некорректная дата создания {value!r}")
+        return timezone.make_aware(created_at) if timezone.is_naive(created_at) else created_at
+
+    @staticmethod
+    def resolve_users(usernames: set[str]) -> dict:
+        return {user.username: user for user in get_user_model().objects.filter(username__in=usernames)}
+
+
+def check_length(model, field: str, value: str) -> None:
+    max_length = model._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise ValueError(f"{model.__name__}.{field} длиннее {max_length} символов")
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.benchmarks.load import run_load
+from app.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузка на запущенный сервер: несколько уровней одновременных клиентов, пропускная способность "
+        "и p50/p95/p99. Для сравнения ASGI и WSGI запустите на той же базе, например: "
+        "`uvicorn food.asgi:application --port 8001` и `gunicorn food.wsgi:application -w 4 --port 8002` "
+        "(или `manage.py runserver --noreload 8002`), затем `loadtest --url http://127.0.0.1:8001` для каждого. "
+        "Все клиенты идут с одного адреса: лимиты `DEFAULT_THROTTLE_RATES` на время замера нужно поднять, "
+        "иначе часть ответов будет 429 (видно в `statuses`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Адрес сервера.")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+        parser.add_argument("--duration", type=float, default=10, help="Секунд на каждый уровень.")
+        parser.add_argument("--slow-ms", type=float, default=0,
+                            help="Пауза клиента посреди заголовков запроса (медленная сеть).")
+        parser.add_argument("--paths", nargs="+", metavar="PATH",
+                            help="Пути запросов. По умолчанию - главная, рецепты и API по id из базы.")
+        parser.add_argument("--token", help="DRF-токен (`Authorization: Token ...`): добавляет рецепты из API.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Куда записать результаты (JSON).")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or self.default_paths(bool(options["token"]))
+        if not paths:
+            raise CommandError("В базе нет рецептов: укажите --paths или заполните каталог.")
+        headers = {"Accept": "application/json, text/html"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        results = []
+        for concurrency in options["concurrency"]:
+            result = asyncio.run(run_load(
+                options["url"], paths, concurrency, options["duration"], options["slow_ms"] / 1000,
+                headers, options["seed"],
+            ))
+            results.append(result)
+            self.stdout.write(
+                f"клиентов {concurrency:>5}  запросов/с {result.get('rps', 0):>8.1f}  "
+                f"p50 {result.get('p50_ms', 0):>8.1f} мс  p95 {result.get('p95_ms', 0):>8.1f} мс  "
+                f"p99 {result.get('p99_ms', 0):>8.1f} мс  ошибок {result['errors']}"
+            )
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "url": options["url"],
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "duration": options["duration"],
+                    "slow_ms": options["slow_ms"],
+                    "paths": len(paths),
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Результаты записаны в {options['output']}"))
+
+    @staticmethod
+    def default_paths(with_api_detail: bool) -> list[str]:
+        # Id берутся из той же базы, с которой работает сервер (общие настройки)
+        recipe_ids = list(Recipe.objects.order_by("?").values_list("id", flat=True)[:200])
+        if not recipe_ids:
+            return []
+        paths = ["/", "/api/recipes/", "/api/recipes/?category=D", "/api/recipes/?ordering=time_minutes"]
+        paths += [f"/recipe/{pk}" for pk in recipe_ids]
+        if with_api_detail:  # Рецепт в API доступен только после входа
+            paths += [f"/api/recipes/{pk}" for pk in recipe_ids]
+        return paths
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from app.cache import bump_catalogue_version
+from app.models import Recipe, RecipeCard
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает карточки рецептов (`RecipeCard`) пачками - после изменений в базе в обход сигналов "
+        "(ручной SQL, `update()`)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        recipe_ids = list(Recipe.objects.order_by("id").values_list("id", flat=True))
+        batch_size = options["batch_size"]
+        for start in range(0, len(recipe_ids), batch_size):
+            RecipeCard.objects.refresh(recipe_ids[start:start + batch_size])
+        bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Карточек пересобрано: {len(recipe_ids)}"))
@@ -0,0 +1,157 @@
+"""
+Структуры в памяти процесса, построенные по данным из базы (подбор по ингредиентам, автодополнение).
+
+Структура строится при первом обращении. Изменения в этом процессе (`mark_stale` из
+`app.signals`) применяются точечно при следующем обращении, изменения из других процессов -
+полной перестройкой, когда сменилась версия каталога (не чаще раза в `MEMORY_INDEX_REBUILD_INTERVAL` секунд).
+Версии, которые сменил сам этот процесс вместе с `mark_stale` (`skip_version`), перестройки не требуют.
+
+Построенную структуру не меняют: `refresh` возвращает обновленную копию, перестройка - новую структуру,
+и обе подставляются под блокировкой. Читатели берут ссылку на текущую структуру и ищут в ней без
+блокировки, поэтому ни друг друга, ни обновление не ждут.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import get_catalogue_version
+
+# Сколько своих смен версии каталога помнить (хватает с запасом на интервал перестройки)
+MAX_LOCAL_VERSIONS = 1000
+
+
+class MemoryIndex:
+    _instances: list["MemoryIndex"] = []
+    # Версии каталога, которые сменил этот процесс: новая -> прежняя
+    _local_versions: dict[str, str] = {}
+    _local_versions_lock = threading.Lock()
+
+    def __init__(self, build, refresh=None):
+        """
+        `build()` возвращает новую структуру, `refresh(structure, ids)` - копию структуры с обновленными
+        записями с этими id (исходную структуру в это время читают другие потоки).
+        Без `refresh` устаревшие записи появятся только после перестройки.
+        """
+        self._build = build
+        self._refresh = refresh
+        self._lock = threading.RLock()
+        # Перестраивает один поток за раз
+        self._build_lock = threading.Lock()
+        self._generation = 0
+        self._structure = None
+        self._version = None
+        self._built_at = 0.0
+        self._stale_ids: set[int] = set()
+        MemoryIndex._instances.append(self)
+
+    def get(self):
+        """Текущая структура (с примененными `mark_stale`). Читать ее можно без блокировки."""
+        while True:
+            self._rebuild_if_outdated()
+            with self._lock:
+                structure = self._structure
+                if structure is None:  # `reset()` после перестройки
+                    continue
+                if not self._stale_ids or self._refresh is None:
+                    return structure
+                stale_ids = list(self._stale_ids)
+                self._stale_ids.clear()
+            try:
+                refreshed = self._refresh(structure, stale_ids)
+            except BaseException:
+                with self._lock:
+                    self._stale_ids.update(stale_ids)
+                raise
+            with self._lock:
+                if self._structure is structure:
+                    self._structure = refreshed
+                    return refreshed
+                # Пока обновляли, структуру заменил другой поток: обновим уже ее
+                self._stale_ids.update(stale_ids)
+
+    def _outdated(self, version) -> bool:
+        if self._structure is None:
+            return True
+        if version == self._version:
+            return False
+        if self._changed_locally(self._version, version):
+            # Каталог менял только этот процесс, изменения пришли через `mark_stale`
+            self._version = version
+            return False
+        return self.age >= getattr(settings, "MEMORY_INDEX_REBUILD_INTERVAL", 30)
+
+    def _rebuild_if_outdated(self) -> None:
+        """
+        Новая структура строится вне `_lock` и подставляется под ним. Если перестройку уже ведет
+        другой поток, ждем его, только когда структуры еще нет, иначе читаем прежнюю.
+        """
+        version = get_catalogue_version()
+        with self._lock:
+            if not self._outdated(version):
+                return
+            wait = self._structure is None
+        if not self._build_lock.acquire(blocking=wait):
+            return
+        try:
+            with self._lock:
+                if not self._outdated(version):  # Уже перестроил другой поток
+                    return
+                generation, built_ids = self._generation, set(self._stale_ids)
+            structure = self._build()
+            with self._lock:
+                if generation == self._generation:
+                    self._structure = structure
+                    self._version = version
+                    self._built_at = time.monotonic()
+                    # Помеченные во время перестройки могли не попасть в нее: их обновит `refresh`
+                    self._stale_ids -= built_ids
+        finally:
+            self._build_lock.release()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._built_at
+
+    def mark_stale(self, ids) -> None:
+        """Записи могли измениться: перечитать их при следующем обращении (после COMMIT)."""
+        ids = set(ids)
+
+        def mark():
+            with self._lock:
+                self._stale_ids.update(ids)
+
+        transaction.on_commit(mark)
+
+    @classmethod
+    def skip_version(cls, previous: str | None, version: str) -> None:
+        """
+        Версию каталога сменил этот процесс (`previous` -> `version`), и все, что изменилось,
+        уже передано индексам через `mark_stale`: перестраивать их из-за этой смены не нужно.
+        """
+        if previous is None:
+            return
+        with cls._local_versions_lock:
+            cls._local_versions[version] = previous
+            if len(cls._local_versions) > MAX_LOCAL_VERSIONS:
+                del cls._local_versions[next(iter(cls._local_versions))]
+
+    @classmethod
+    def _changed_locally(cls, since: str, version: str) -> bool:
+        """От `since` до `version` версию каталога меняли только записи этого процесса."""
+        with cls._local_versions_lock:
+            while version != since and version in cls._local_versions:
+                version = cls._local_versions[version]
+        return version == since
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._structure = None
+            self._stale_ids.clear()
+
+    @classmethod
+    def reset_all(cls) -> None:
+        for index in cls._instances:
+            index.reset()
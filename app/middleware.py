@@ -0,0 +1,100 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+from .instrumentation import finish_request, start_request
+
+logger = logging.getLogger("app.performance")
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет каждый запрос: общее время, SQL (число и время через `execute_wrapper`), рендеринг шаблонов
+    и сериализацию DRF (см. `app.instrumentation`).
+
+    Результат - заголовок `Server-Timing` (виден в DevTools браузера) и строка JSON в логе `app.performance`.
+    Запросы дольше `PERFORMANCE_SLOW_REQUEST_MS` логируются с самыми медленными SQL.
+    """
+
+    sync_capable = True
+    async_capable = True  # Под ASGI не переводит цепочку middleware в потоки (см. `food.asgi_urls`)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, metrics, time.perf_counter() - started)
+
+    @staticmethod
+    def report(request, response, metrics, total: float):
+        timings = {"db": metrics.db_time, **metrics.timings, "total": total}
+        if getattr(settings, "PERFORMANCE_SERVER_TIMING", True):
+            response["Server-Timing"] = ", ".join(
+                f'{name};dur={seconds * 1000:.1f}' + (f';desc="{metrics.query_count} queries"' if name == "db" else "")
+                for name, seconds in timings.items()
+            )
+
+        match = request.resolver_match
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": match.route if match else None,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "queries": metrics.query_count,
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in timings.items()},
+        }
+        if total * 1000 >= getattr(settings, "PERFORMANCE_SLOW_REQUEST_MS", 500):
+            record["slow_queries"] = [
+                {"ms": round(seconds * 1000, 1), "sql": sql} for seconds, sql in metrics.slowest_queries()
+            ]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+
+class StaticAwareGZipMiddleware(GZipMiddleware):
+    """
+    `GZipMiddleware`, который не трогает статику и медиа и уже сжатые форматы.
+
+    Статика сжата заранее при `collectstatic` (`app.staticfiles`), а картинки, архивы и woff2 повторное
+    сжатие не уменьшает - только тратит процессор на каждый ответ.
+    """
+
+    COMPRESSED_TYPES = ("image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip",
+                        "application/x-gzip", "application/pdf", "application/octet-stream")
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "")
+        if request.path.startswith(self.skipped_prefixes()) or content_type.startswith(self.COMPRESSED_TYPES):
+            return response
+        return super().process_response(request, response)
+
+    @staticmethod
+    def skipped_prefixes() -> tuple[str, ...]:
+        # `STATIC_URL`/`MEDIA_URL` после настройки Django всегда начинаются с "/"
+        return tuple(url for url in (settings.STATIC_URL, settings.MEDIA_URL) if url)
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:58
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор пересчитывается только при изменении названия или описания.
+# Описание хранит HTML из CKEditor, поэтому теги вырезаются перед индексацией.
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION app_recipe_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+       OR NEW.name IS DISTINCT FROM OLD.name
+       OR NEW.description IS DISTINCT FROM OLD.description THEN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('russian', regexp_replace(coalesce(NEW.description, ''), '<[^>]*>', ' ', 'g')), 'B');
+    ELSE
+        -- Django при `save()` пишет все колонки, не даем затереть вектор устаревшим значением.
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON app_recipe
+    FOR EACH ROW EXECUTE FUNCTION app_recipe_search_vector_update();
+
+UPDATE app_recipe SET search_vector =
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('russian', regexp_replace(coalesce(description, ''), '<[^>]*>', ' ', 'g')), 'B');
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS app_recipe_search_vector_trigger ON app_recipe;
+DROP FUNCTION IF EXISTS app_recipe_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_alter_recipe_preview_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='app_recipe_search_gin'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_recipe_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['created_at', 'id'], name='app_recipe_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['time_minutes', 'id'], name='app_recipe_time_id_idx'),
+        ),
+    ]
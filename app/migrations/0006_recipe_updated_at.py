@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_recipe_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        # Для уже существующих рецептов последнее изменение - момент создания.
+        migrations.RunSQL("UPDATE app_recipe SET updated_at = created_at", migrations.RunSQL.noop),
+    ]
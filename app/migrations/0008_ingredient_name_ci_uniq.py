@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Перед созданием уникального индекса объединяем дубликаты ("Соль", "соль "): рецепты переводятся
+# на ингредиент с наименьшим id, остальные копии удаляются.
+MERGE_DUPLICATES_SQL = [
+    """
+    CREATE TEMPORARY TABLE app_ingredient_duplicates ON COMMIT DROP AS
+    SELECT id, keep_id FROM (
+        SELECT id, MIN(id) OVER (PARTITION BY lower(btrim(name))) AS keep_id FROM app_ingredient
+    ) AS ingredients
+    WHERE id <> keep_id
+    """,
+    """
+    UPDATE app_recipe SET updated_at = NOW()
+    WHERE id IN (
+        SELECT recipe_id FROM app_recipe_ingredients
+        WHERE ingredient_id IN (SELECT id FROM app_ingredient_duplicates)
+    )
+    """,
+    """
+    INSERT INTO app_recipe_ingredients (recipe_id, ingredient_id)
+    SELECT DISTINCT link.recipe_id, duplicate.keep_id
+    FROM app_recipe_ingredients AS link JOIN app_ingredient_duplicates AS duplicate ON duplicate.id = link.ingredient_id
+    ON CONFLICT DO NOTHING
+    """,
+    "DELETE FROM app_recipe_ingredients WHERE ingredient_id IN (SELECT id FROM app_ingredient_duplicates)",
+    "DELETE FROM app_ingredient WHERE id IN (SELECT id FROM app_ingredient_duplicates)",
+    "UPDATE app_ingredient SET name = btrim(name) WHERE name <> btrim(name)",
+    # Отложенные проверки внешних ключей выполняются сейчас, иначе Postgres не даст создать индекс в этой транзакции.
+    "SET CONSTRAINTS ALL IMMEDIATE",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_favorite'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_DUPLICATES_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('name')), name='app_ingredient_name_ci_uniq', violation_error_message='Такой ингредиент уже существует'),
+        ),
+    ]
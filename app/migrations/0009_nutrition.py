@@ -0,0 +1,244 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:20
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+# Старое текстовое поле переносим, только если в нем число ("250", "52,5"), остальное - 0.
+COPY_CALORIES_SQL = r"""
+UPDATE app_ingredient SET kcal = replace(btrim(calories_count), ',', '.')::numeric
+WHERE calories_count ~ '^\s*\d{1,5}([.,]\d{1,2})?\s*$';
+"""
+
+# Итоги рецептов поддерживаются приращениями: при вставке/удалении/изменении строк состава
+# к рецепту прибавляется (или вычитается) вклад именно этих строк, при изменении пищевой ценности
+# ингредиента - разница между новым и старым вкладом. Полного пересчета по рецепту нет.
+# Вклад строки округляется до сотых одинаково при прибавлении и вычитании, поэтому итоги не "дрейфуют".
+#
+# Триггеры уровня оператора с таблицами переходов: `bulk_create` на тысячу строк - один UPDATE рецептов.
+# Django при `save()` рецепта пишет все колонки, поэтому итоги меняются только из триггеров
+# (флаг `app.recipe_totals`), иначе сохраняется старое значение - как и `search_vector` (миграция 0004).
+CREATE_TRIGGERS_SQL = """
+CREATE FUNCTION app_recipe_totals_guard() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app.recipe_totals', true) IS DISTINCT FROM 'on' THEN
+        NEW.total_kcal := OLD.total_kcal;
+        NEW.total_protein := OLD.total_protein;
+        NEW.total_fat := OLD.total_fat;
+        NEW.total_carbs := OLD.total_carbs;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipe_totals_guard
+    BEFORE UPDATE ON app_recipe
+    FOR EACH ROW
+    WHEN ((OLD.total_kcal, OLD.total_protein, OLD.total_fat, OLD.total_carbs)
+          IS DISTINCT FROM (NEW.total_kcal, NEW.total_protein, NEW.total_fat, NEW.total_carbs))
+    EXECUTE FUNCTION app_recipe_totals_guard();
+
+CREATE FUNCTION app_recipe_ingredients_totals() RETURNS trigger AS $$
+BEGIN
+    PERFORM set_config('app.recipe_totals', 'on', true);
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE app_recipe AS recipe SET
+            total_kcal = recipe.total_kcal + delta.kcal,
+            total_protein = recipe.total_protein + delta.protein,
+            total_fat = recipe.total_fat + delta.fat,
+            total_carbs = recipe.total_carbs + delta.carbs
+        FROM (
+            SELECT row.recipe_id,
+                   SUM(ROUND(ingredient.kcal * row.quantity / 100, 2)) AS kcal,
+                   SUM(ROUND(ingredient.protein * row.quantity / 100, 2)) AS protein,
+                   SUM(ROUND(ingredient.fat * row.quantity / 100, 2)) AS fat,
+                   SUM(ROUND(ingredient.carbs * row.quantity / 100, 2)) AS carbs
+            FROM new_rows AS row JOIN app_ingredient AS ingredient ON ingredient.id = row.ingredient_id
+            GROUP BY row.recipe_id
+        ) AS delta
+        WHERE recipe.id = delta.recipe_id;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE app_recipe AS recipe SET
+            total_kcal = recipe.total_kcal - delta.kcal,
+            total_protein = recipe.total_protein - delta.protein,
+            total_fat = recipe.total_fat - delta.fat,
+            total_carbs = recipe.total_carbs - delta.carbs
+        FROM (
+            SELECT row.recipe_id,
+                   SUM(ROUND(ingredient.kcal * row.quantity / 100, 2)) AS kcal,
+                   SUM(ROUND(ingredient.protein * row.quantity / 100, 2)) AS protein,
+                   SUM(ROUND(ingredient.fat * row.quantity / 100, 2)) AS fat,
+                   SUM(ROUND(ingredient.carbs * row.quantity / 100, 2)) AS carbs
+            FROM old_rows AS row JOIN app_ingredient AS ingredient ON ingredient.id = row.ingredient_id
+            GROUP BY row.recipe_id
+        ) AS delta
+        WHERE recipe.id = delta.recipe_id;
+    END IF;
+    PERFORM set_config('app.recipe_totals', 'off', true);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipe_ingredients_totals_insert
+    AFTER INSERT ON app_recipe_ingredients REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipe_ingredients_totals();
+CREATE TRIGGER app_recipe_ingredients_totals_update
+    AFTER UPDATE ON app_recipe_ingredients REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipe_ingredients_totals();
+CREATE TRIGGER app_recipe_ingredients_totals_delete
+    AFTER DELETE ON app_recipe_ingredients REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipe_ingredients_totals();
+
+CREATE FUNCTION app_ingredient_nutrition_totals() RETURNS trigger AS $$
+BEGIN
+    PERFORM set_config('app.recipe_totals', 'on', true);
+    UPDATE app_recipe AS recipe SET
+        total_kcal = recipe.total_kcal + delta.kcal,
+        total_protein = recipe.total_protein + delta.protein,
+        total_fat = recipe.total_fat + delta.fat,
+        total_carbs = recipe.total_carbs + delta.carbs
+    FROM (
+        SELECT row.recipe_id,
+               SUM(ROUND(changed.kcal * row.quantity / 100, 2) - ROUND(previous.kcal * row.quantity / 100, 2)) AS kcal,
+               SUM(ROUND(changed.protein * row.quantity / 100, 2) - ROUND(previous.protein * row.quantity / 100, 2)) AS protein,
+               SUM(ROUND(changed.fat * row.quantity / 100, 2) - ROUND(previous.fat * row.quantity / 100, 2)) AS fat,
+               SUM(ROUND(changed.carbs * row.quantity / 100, 2) - ROUND(previous.carbs * row.quantity / 100, 2)) AS carbs
+        FROM new_rows AS changed
+        JOIN old_rows AS previous ON previous.id = changed.id
+        JOIN app_recipe_ingredients AS row ON row.ingredient_id = changed.id
+        WHERE (changed.kcal, changed.protein, changed.fat, changed.carbs) IS DISTINCT FROM (previous.kcal, previous.protein, previous.fat, previous.carbs)
+        GROUP BY row.recipe_id
+    ) AS delta
+    WHERE recipe.id = delta.recipe_id;
+    PERFORM set_config('app.recipe_totals', 'off', true);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_ingredient_nutrition_totals
+    AFTER UPDATE ON app_ingredient REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_ingredient_nutrition_totals();
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS app_ingredient_nutrition_totals ON app_ingredient;
+DROP TRIGGER IF EXISTS app_recipe_ingredients_totals_insert ON app_recipe_ingredients;
+DROP TRIGGER IF EXISTS app_recipe_ingredients_totals_update ON app_recipe_ingredients;
+DROP TRIGGER IF EXISTS app_recipe_ingredients_totals_delete ON app_recipe_ingredients;
+DROP TRIGGER IF EXISTS app_recipe_totals_guard ON app_recipe;
+DROP FUNCTION IF EXISTS app_ingredient_nutrition_totals();
+DROP FUNCTION IF EXISTS app_recipe_ingredients_totals();
+DROP FUNCTION IF EXISTS app_recipe_totals_guard();
+"""
+
+# Начальные итоги для уже существующих рецептов (до создания триггеров).
+BACKFILL_TOTALS_SQL = """
+UPDATE app_recipe AS recipe SET
+    total_kcal = totals.kcal, total_protein = totals.protein, total_fat = totals.fat, total_carbs = totals.carbs
+FROM (
+    SELECT row.recipe_id,
+           SUM(ROUND(ingredient.kcal * row.quantity / 100, 2)) AS kcal,
+           SUM(ROUND(ingredient.protein * row.quantity / 100, 2)) AS protein,
+           SUM(ROUND(ingredient.fat * row.quantity / 100, 2)) AS fat,
+           SUM(ROUND(ingredient.carbs * row.quantity / 100, 2)) AS carbs
+    FROM app_recipe_ingredients AS row JOIN app_ingredient AS ingredient ON ingredient.id = row.ingredient_id
+    GROUP BY row.recipe_id
+) AS totals
+WHERE recipe.id = totals.recipe_id;
+"""
+
+NUTRIENT_VALIDATORS = [django.core.validators.MinValueValidator(0)]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_ingredient_name_ci_uniq'),
+    ]
+
+    operations = [
+        # Пищевая ценность ингредиента на 100 г вместо текстового `calories_count`.
+        migrations.AddField(
+            model_name='ingredient',
+            name='kcal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=7, validators=NUTRIENT_VALIDATORS, verbose_name='Калорийность, ккал на 100 г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='protein',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6, validators=NUTRIENT_VALIDATORS, verbose_name='Белки, г на 100 г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fat',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6, validators=NUTRIENT_VALIDATORS, verbose_name='Жиры, г на 100 г'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbs',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6, validators=NUTRIENT_VALIDATORS, verbose_name='Углеводы, г на 100 г'),
+        ),
+        migrations.RunSQL(COPY_CALORIES_SQL, migrations.RunSQL.noop),
+        migrations.RemoveField(
+            model_name='ingredient',
+            name='calories_count',
+        ),
+
+        # Автоматическая таблица M2M становится моделью `RecipeIngredient`: в базе таблица та же.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='RecipeIngredient',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.ingredient')),
+                        ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='app.recipe')),
+                    ],
+                    options={
+                        'db_table': 'app_recipe_ingredients',
+                        'unique_together': {('recipe', 'ingredient')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='ingredients',
+                    field=models.ManyToManyField(through='app.RecipeIngredient', to='app.ingredient', verbose_name='Ингредиенты'),
+                ),
+            ],
+        ),
+        # Для существующих строк состава количество неизвестно - считаем 100 г (итог равен сумме "на 100 г").
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='quantity',
+            field=models.DecimalField(decimal_places=2, default=Decimal('100'), max_digits=8, validators=NUTRIENT_VALIDATORS, verbose_name='Количество, г'),
+        ),
+
+        migrations.AddField(
+            model_name='recipe',
+            name='total_kcal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_protein',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_fat',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='total_carbs',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9),
+        ),
+        migrations.RunSQL(BACKFILL_TOTALS_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['total_kcal', 'id'], name='app_recipe_kcal_id_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:23
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+# `ingredient_ids` пересчитывается только у рецептов из таблиц переходов (одним UPDATE на оператор).
+# Изменение количества (UPDATE строк состава) массив не меняет, поэтому триггеры только на INSERT/DELETE.
+# Пишет массив только триггер: защита от `save()` из миграции 0009 расширена и на это поле.
+CREATE_TRIGGERS_SQL = """
+CREATE FUNCTION app_recipe_ingredient_ids_sync() RETURNS trigger AS $$
+BEGIN
+    PERFORM set_config('app.recipe_totals', 'on', true);
+    UPDATE app_recipe AS recipe SET ingredient_ids = ARRAY(
+        SELECT item.ingredient_id FROM app_recipe_ingredients AS item
+        WHERE item.recipe_id = recipe.id ORDER BY item.ingredient_id
+    )
+    WHERE recipe.id IN (SELECT recipe_id FROM changed_rows);
+    PERFORM set_config('app.recipe_totals', 'off', true);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipe_ingredient_ids_insert
+    AFTER INSERT ON app_recipe_ingredients REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipe_ingredient_ids_sync();
+CREATE TRIGGER app_recipe_ingredient_ids_delete
+    AFTER DELETE ON app_recipe_ingredients REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipe_ingredient_ids_sync();
+
+CREATE OR REPLACE FUNCTION app_recipe_totals_guard() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app.recipe_totals', true) IS DISTINCT FROM 'on' THEN
+        NEW.total_kcal := OLD.total_kcal;
+        NEW.total_protein := OLD.total_protein;
+        NEW.total_fat := OLD.total_fat;
+        NEW.total_carbs := OLD.total_carbs;
+        NEW.ingredient_ids := OLD.ingredient_ids;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER app_recipe_totals_guard ON app_recipe;
+CREATE TRIGGER app_recipe_totals_guard
+    BEFORE UPDATE ON app_recipe
+    FOR EACH ROW
+    WHEN ((OLD.total_kcal, OLD.total_protein, OLD.total_fat, OLD.total_carbs, OLD.ingredient_ids)
+          IS DISTINCT FROM (NEW.total_kcal, NEW.total_protein, NEW.total_fat, NEW.total_carbs, NEW.ingredient_ids))
+    EXECUTE FUNCTION app_recipe_totals_guard();
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS app_recipe_ingredient_ids_insert ON app_recipe_ingredients;
+DROP TRIGGER IF EXISTS app_recipe_ingredient_ids_delete ON app_recipe_ingredients;
+DROP FUNCTION IF EXISTS app_recipe_ingredient_ids_sync();
+
+DROP TRIGGER app_recipe_totals_guard ON app_recipe;
+CREATE OR REPLACE FUNCTION app_recipe_totals_guard() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('app.recipe_totals', true) IS DISTINCT FROM 'on' THEN
+        NEW.total_kcal := OLD.total_kcal;
+        NEW.total_protein := OLD.total_protein;
+        NEW.total_fat := OLD.total_fat;
+        NEW.total_carbs := OLD.total_carbs;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER app_recipe_totals_guard
+    BEFORE UPDATE ON app_recipe
+    FOR EACH ROW
+    WHEN ((OLD.total_kcal, OLD.total_protein, OLD.total_fat, OLD.total_carbs)
+          IS DISTINCT FROM (NEW.total_kcal, NEW.total_protein, NEW.total_fat, NEW.total_carbs))
+    EXECUTE FUNCTION app_recipe_totals_guard();
+"""
+
+BACKFILL_SQL = """
+UPDATE app_recipe AS recipe SET ingredient_ids = ARRAY(
+    SELECT item.ingredient_id FROM app_recipe_ingredients AS item
+    WHERE item.recipe_id = recipe.id ORDER BY item.ingredient_id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_nutrition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGERS_SQL, DROP_TRIGGERS_SQL),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='app_recipe_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ingredient_ids'], name='app_recipe_ingredients_gin'),
+        ),
+    ]
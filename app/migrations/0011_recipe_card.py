@@ -0,0 +1,60 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:06
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Заполнение карточек существующих рецептов. Копия `RecipeCardQuerySet.refresh` на момент миграции:
+# запрос зафиксирован здесь, чтобы последующие изменения моделей и `refresh()` не ломали `migrate`.
+FILL_CARDS_SQL = """
+INSERT INTO app_recipecard (recipe_id, name, preview_image, category, category_label, time_minutes, created_at,
+                            updated_at, author_id, author_username, author_email, ingredient_ids, ingredient_names)
+SELECT recipe.id, recipe.name, recipe.preview_image, recipe.category,
+       CASE recipe.category WHEN 'B' THEN 'Завтрак' WHEN 'D' THEN 'Обед' WHEN 'S' THEN 'Ужин'
+                            ELSE 'Unknown category' END,
+       recipe.time_minutes, recipe.created_at, recipe.updated_at, author.id, author.username, author.email,
+       COALESCE(items.ids, '{}'), COALESCE(items.names, '{}')
+FROM app_recipe AS recipe
+JOIN users_user AS author ON author.id = recipe.user_id
+LEFT JOIN LATERAL (
+    SELECT array_agg(ingredient.id ORDER BY ingredient.name, ingredient.id) AS ids,
+           array_agg(ingredient.name ORDER BY ingredient.name, ingredient.id) AS names
+    FROM app_recipe_ingredients AS item JOIN app_ingredient AS ingredient ON ingredient.id = item.ingredient_id
+    WHERE item.recipe_id = recipe.id
+) AS items ON TRUE;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_recipe_ingredient_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCard',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='app.recipe')),
+                ('name', models.CharField(max_length=255)),
+                ('preview_image', models.CharField(max_length=255)),
+                ('category', models.CharField(choices=[('B', 'Завтрак'), ('D', 'Обед'), ('S', 'Ужин')], max_length=1)),
+                ('category_label', models.CharField(max_length=32)),
+                ('time_minutes', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('author_id', models.BigIntegerField()),
+                ('author_username', models.CharField(max_length=150)),
+                ('author_email', models.CharField(max_length=254)),
+                ('ingredient_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('ingredient_names', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), default=list, size=None)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'recipe'], name='app_recipecard_created_idx')],
+            },
+        ),
+        migrations.RunSQL(FILL_CARDS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:58
+
+from django.conf import settings
+from django.db import migrations
+
+# Карточка появляется вместе с рецептом при любой вставке - `save()`, `bulk_create`, SQL (один INSERT на оператор).
+# Состава у нового рецепта еще нет; ингредиенты, автора и названия затем пересобирает `RecipeCardQuerySet.refresh`
+# (сигналы, импорт, генератор каталога). Название категории - как в `refresh()`, он его и обновит при изменении.
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION app_recipecard_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO app_recipecard (recipe_id, name, preview_image, category, category_label, time_minutes, created_at,
+                                updated_at, author_id, author_username, author_email, ingredient_ids, ingredient_names)
+    SELECT recipe.id, recipe.name, recipe.preview_image, recipe.category,
+           CASE recipe.category WHEN 'B' THEN 'Завтрак' WHEN 'D' THEN 'Обед' WHEN 'S' THEN 'Ужин'
+                                ELSE 'Unknown category' END,
+           recipe.time_minutes, recipe.created_at, recipe.updated_at, author.id, author.username, author.email,
+           '{}', '{}'
+    FROM new_recipes AS recipe
+    JOIN users_user AS author ON author.id = recipe.user_id
+    ON CONFLICT (recipe_id) DO NOTHING;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_recipecard_insert
+    AFTER INSERT ON app_recipe REFERENCING NEW TABLE AS new_recipes
+    FOR EACH STATEMENT EXECUTE FUNCTION app_recipecard_insert();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS app_recipecard_insert ON app_recipe;
+DROP FUNCTION IF EXISTS app_recipecard_insert();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_recipe_card'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
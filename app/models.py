@@ -1,24 +1,183 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import connection, models
+from django.db.models import Count, F, Prefetch
+from django.db.models.functions import Cast, Lower, Trim
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField, SearchQuery, SearchRank
+from django.dispatch import Signal
 
 # Вызываем класс пользователя не явно, а тот, который указан в 'settings.py'
 
 
+def ingredient_key(name: str) -> str:
+    """
+    Ключ названия ингредиента в словаре `resolve_ids`: без регистра и пробелов по краям.
+    Уникальность в базе проверяет `lower(btrim(name))`, поэтому сравнивать названия с базой
+    нужно ее же выражением, а не этим ключом: `str.lower()` для части Unicode дает другое.
+    """
+    return name.strip().lower()
+
+
+# `resolve_ids` создает ингредиенты в обход `save()`, без `post_save`: id созданных передает этот сигнал
+ingredients_created = Signal()
+
+
+class IngredientQuerySet(models.QuerySet):
+    # Ключ каждого названия считает база, тем же выражением, что и уникальный индекс
+    _LOOKUP_SQL = """
+        SELECT input.name, lower(input.name), ingredient.id
+        FROM unnest(%s::text[]) AS input(name)
+        LEFT JOIN {table} AS ingredient ON lower(btrim(ingredient.name)) = lower(input.name)
+    """
+    _UPSERT_SQL = """
+        INSERT INTO {table} (name, kcal, protein, fat, carbs) VALUES {values}
+        ON CONFLICT ((lower(btrim(name)))) DO UPDATE SET name = {table}.name
+        RETURNING id, lower(btrim(name)), xmax = 0
+    """
+
+    def resolve_ids(self, names) -> dict[str, int]:
+        """
+        id ингредиентов по названиям (ключ - `ingredient_key`), недостающие создаются.
+        Всегда не больше двух запросов: `SELECT ... LEFT JOIN` по ключу базы и
+        `INSERT ... ON CONFLICT`. Если ингредиент успел создать параллельный запрос, `ON CONFLICT`
+        вернет существующую строку, а не ошибку уникальности (`xmax = 0` - строка вставлена этим запросом).
+        """
+        # Первое написание названия становится каноническим. Пробелы по краям убираем здесь,
+        # так что `btrim` в базе для них уже ничего не меняет.
+        names = {ingredient_key(name): name.strip() for name in reversed(list(names)) if name.strip()}
+        if not names:
+            return {}
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(self._LOOKUP_SQL.format(table=table), [list(names.values())])
+            rows = cursor.fetchall()
+            db_keys = {name: db_key for name, db_key, _ in rows}
+            found = {db_key: pk for _, db_key, pk in rows if pk is not None}
+            missing = {db_key: name for name, db_key, pk in rows if pk is None}
+            if missing:
+                values = ", ".join(["(%s, 0, 0, 0, 0)"] * len(missing))
+                cursor.execute(self._UPSERT_SQL.format(table=table, values=values), list(missing.values()))
+                inserted = cursor.fetchall()
+                found.update((db_key, pk) for pk, db_key, _ in inserted)
+                created_ids = [pk for pk, _, created in inserted if created]
+                if created_ids:
+                    ingredients_created.send(sender=self.model, ids=created_ids)
+        return {key: found[db_keys[name]] for key, name in names.items()}
+
+
 class Ingredient(models.Model):
     name = models.CharField(max_length=255)
-    calories_count = models.CharField(max_length=5, default=0, verbose_name="Количество калорий", null=True, blank=True)
+    # Пищевая ценность на 100 г. Итоги рецептов пересчитывает триггер в базе (см. миграцию 0009).
+    kcal = models.DecimalField(max_digits=7, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+                               verbose_name="Калорийность, ккал на 100 г")
+    protein = models.DecimalField(max_digits=6, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+                                  verbose_name="Белки, г на 100 г")
+    fat = models.DecimalField(max_digits=6, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+                              verbose_name="Жиры, г на 100 г")
+    carbs = models.DecimalField(max_digits=6, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+                                verbose_name="Углеводы, г на 100 г")
     description = models.TextField(verbose_name="Описание", null=True)
 
+    objects = IngredientQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # "Соль", "соль " и "СОЛЬ" - один ингредиент. По этому индексу работает `resolve_ids`.
+            models.UniqueConstraint(
+                Lower(Trim("name")), name="app_ingredient_name_ci_uniq",
+                violation_error_message="Такой ингредиент уже существует",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def with_ingredients(self) -> "RecipeQuerySet":
+        """Ингредиенты одним дополнительным запросом на всю выборку, только нужные поля."""
+        return self.prefetch_related(Prefetch("ingredients", queryset=Ingredient.objects.only("id", "name")))
+
+    def for_list(self) -> "RecipeQuerySet":
+        """
+        План запроса для списков (`RecipeListSerializer`): без описания, автор и ингредиенты - из карточки
+        (`RecipeCard`) в той же строке JOIN по первичному ключу, без JOIN автора и запроса ингредиентов.
+        """
+        return self.select_related("card").only(
+            "id", "name", "preview_image", "created_at", "updated_at", "time_minutes", "category",
+            *Recipe.TOTAL_FIELDS, "card__category_label", "card__author_id", "card__author_username", "card__author_email",
+            "card__ingredient_ids", "card__ingredient_names",
+        )
+
+    def for_detail(self) -> "RecipeQuerySet":
+        """План запроса для страницы/endpoint'а рецепта: автор через JOIN, ингредиенты одним запросом."""
+        return self.select_related("user").with_ingredients()
+
+    def facets(self, top_ingredients: int = 10) -> dict:
+        """
+        Счетчики по выборке (с уже примененными фильтрами): рецептов в каждой категории и самые частые
+        ингредиенты. Два запроса с GROUP BY, независимо от размера выборки в ответе.
+        """
+        counts, ingredients = self._facet_querysets(top_ingredients)
+        return self._facet_data(dict(counts), list(ingredients))
+
+    async def afacets(self, top_ingredients: int = 10) -> dict:
+        """`facets` через async ORM."""
+        counts, ingredients = self._facet_querysets(top_ingredients)
+        return self._facet_data({value: count async for value, count in counts},
+                                [row async for row in ingredients])
+
+    def _facet_querysets(self, top_ingredients: int):
+        recipes = self.order_by()
+        counts = recipes.values_list("category").annotate(count=Count("id")).order_by()
+        ingredients = (
+            RecipeIngredient.objects.filter(recipe__in=recipes.values("id"))
+            .values("ingredient_id", "ingredient__name")
+            .annotate(count=Count("id"))
+            .order_by("-count", "ingredient_id")[:top_ingredients]
+        )
+        return counts, ingredients
+
+    @staticmethod
+    def _facet_data(counts: dict, ingredients: list[dict]) -> dict:
+        return {
+            "category": [
+                {"value": value, "label": label, "count": counts.get(value, 0)}
+                for value, label in Recipe.Category.choices
+            ],
+            "ingredients": [
+                {"id": row["ingredient_id"], "name": row["ingredient__name"], "count": row["count"]}
+                for row in ingredients
+            ],
+        }
+
+    def search(self, text: str) -> "RecipeQuerySet":
+        """
+        Полнотекстовый поиск по сохраненному вектору `search_vector` (русский словарь).
+        Результаты упорядочены по релевантности (`ts_rank`), название весит больше описания.
+        """
+        query = SearchQuery(text, config="russian", search_type="websearch")
+        return (
+            self.filter(search_vector=query)
+            # Приводим `real` к `double precision`, чтобы значение ранга точно переживало
+            # сериализацию (например, в курсоре пагинации).
+            .annotate(rank=Cast(SearchRank(F("search_vector"), query), models.FloatField()))
+            .order_by("-rank", "-id")
+        )
+
+
 class Recipe(models.Model):
     name = models.CharField(max_length=255, verbose_name="Название рецепта")
     description = models.TextField(verbose_name="Описание рецепта")
     preview_image = models.CharField(max_length=255, verbose_name="Картинка")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Меняется при любом изменении рецепта, в том числе состава ингредиентов (см. `app.signals`).
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     time_minutes = models.IntegerField(
         validators=[MinValueValidator(1)],
         default=1,
@@ -26,7 +185,7 @@ class Recipe(models.Model):
         help_text="В минутах"
     )
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
-    ingredients = models.ManyToManyField(Ingredient, verbose_name="Ингредиенты")
+    ingredients = models.ManyToManyField(Ingredient, through="RecipeIngredient", verbose_name="Ингредиенты")
 
     class Category(models.TextChoices):
         # 'B' - отображается в базе, 'Завтрак' - отображается пользователю
@@ -36,12 +195,187 @@ class Recipe(models.Model):
 
     category = models.CharField(max_length=1, choices=Category.choices, verbose_name="Прием пищи")
 
+    # Заполняется триггером в базе (см. миграцию 0004): название с весом 'A', описание с весом 'B'.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Пищевая ценность всего рецепта: сумма по ингредиентам с учетом количества. Поддерживается триггерами
+    # в базе приращениями (см. миграцию 0009), из Django эти поля не записываются.
+    total_kcal = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    total_protein = models.DecimalField(max_digits=9, decimal_places=2, default=0, editable=False)
+    total_fat = models.DecimalField(max_digits=9, decimal_places=2, default=0, editable=False)
+    total_carbs = models.DecimalField(max_digits=9, decimal_places=2, default=0, editable=False)
+
+    TOTAL_FIELDS = ("total_kcal", "total_protein", "total_fat", "total_carbs")
+
+    # Копия id ингредиентов из `app_recipe_ingredients` (отсортированы) для фильтров "все / любой / ни один из"
+    # по GIN-индексу (`@>`, `&&`) вместо JOIN на каждый ингредиент. Поддерживается триггерами (миграция 0010).
+    ingredient_ids = ArrayField(models.BigIntegerField(), default=list, editable=False)
+
+    # Сколько пользователей добавили рецепт в избранное. Меняется выражениями `F()` (см. `app.favorite_service`).
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="app_recipe_search_gin"),
+            # Индексы для курсорной пагинации: `(ключ сортировки, id)`.
+            models.Index(fields=["created_at", "id"], name="app_recipe_created_id_idx"),
+            models.Index(fields=["time_minutes", "id"], name="app_recipe_time_id_idx"),
+            models.Index(fields=["total_kcal", "id"], name="app_recipe_kcal_id_idx"),
+            # Фильтр по категории с сортировкой по умолчанию (новые сверху)
+            models.Index(fields=["category", "created_at", "id"], name="app_recipe_category_idx"),
+            GinIndex(fields=["ingredient_ids"], name="app_recipe_ingredients_gin"),
+        ]
 
     @property
     def verbose_category(self) -> str:
         for value, label in self.Category.choices:
             if value == self.category:
                 return label
-        return "Unknown category"
\ No newline at end of file
+        return "Unknown category"
+
+
+class RecipeIngredient(models.Model):
+    """Ингредиент в составе рецепта. Таблица - бывшая автоматическая таблица M2M `app_recipe_ingredients`."""
+    DEFAULT_QUANTITY = Decimal(100)
+
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    quantity = models.DecimalField(max_digits=8, decimal_places=2, default=DEFAULT_QUANTITY,
+                                   validators=[MinValueValidator(0)], verbose_name="Количество, г")
+
+    class Meta:
+        db_table = "app_recipe_ingredients"
+        unique_together = [("recipe", "ingredient")]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.ingredient_id} ({self.quantity} г)"
+
+
+class Favorite(models.Model):
+    """Избранный рецепт пользователя. У анонимных пользователей избранное хранится в сессии."""
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="favorites")
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="favorited_by")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "recipe"], name="app_favorite_user_recipe_uniq"),
+        ]
+        indexes = [
+            # Список избранного пользователя: новые сверху, курсорная пагинация по `(created_at, id)`.
+            models.Index(fields=["user", "created_at", "id"], name="app_favorite_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.recipe_id}"
+
+
+class RecipeCardQuerySet(models.QuerySet):
+    # Поля карточки рецепта (`recipes-list.html`); `id` - это `recipe_id`
+    CARD_FIELDS = ("id", "name", "time_minutes", "preview_image", "ingredients_list", "category", "created_at",
+                   "updated_at")
+
+    _REFRESH_SQL = """
+        INSERT INTO {card} (recipe_id, name, preview_image, category, category_label, time_minutes, created_at,
+                            updated_at, author_id, author_username, author_email, ingredient_ids, ingredient_names)
+        SELECT recipe.id, recipe.name, recipe.preview_image, recipe.category, {category_label},
+               recipe.time_minutes, recipe.created_at, recipe.updated_at, author.id, author.username, author.email,
+               COALESCE(items.ids, '{{}}'), COALESCE(items.names, '{{}}')
+        FROM {recipe} AS recipe
+        JOIN {user} AS author ON author.id = recipe.user_id
+        LEFT JOIN LATERAL (
+            SELECT array_agg(ingredient.id ORDER BY ingredient.name, ingredient.id) AS ids,
+                   array_agg(ingredient.name ORDER BY ingredient.name, ingredient.id) AS names
+            FROM {recipe_ingredient} AS item JOIN {ingredient} AS ingredient ON ingredient.id = item.ingredient_id
+            WHERE item.recipe_id = recipe.id
+        ) AS items ON TRUE
+        {where}
+        ON CONFLICT (recipe_id) DO UPDATE SET
+            name = EXCLUDED.name, preview_image = EXCLUDED.preview_image, category = EXCLUDED.category,
+            category_label = EXCLUDED.category_label, time_minutes = EXCLUDED.time_minutes,
+            created_at = EXCLUDED.created_at, updated_at = EXCLUDED.updated_at, author_id = EXCLUDED.author_id,
+            author_username = EXCLUDED.author_username, author_email = EXCLUDED.author_email,
+            ingredient_ids = EXCLUDED.ingredient_ids, ingredient_names = EXCLUDED.ingredient_names
+    """
+
+    def refresh(self, recipe_ids=None) -> None:
+        """
+        Пересобирает карточки рецептов `recipe_ids` (`None` - всех) одним `INSERT ... ON CONFLICT DO UPDATE`.
+        Карточки удаленных рецептов удаляются вместе с рецептом (внешний ключ).
+        """
+        if recipe_ids is not None:
+            recipe_ids = list(recipe_ids)
+            if not recipe_ids:
+                return
+        labels = " ".join(["WHEN %s THEN %s"] * len(Recipe.Category.choices))
+        query = self._REFRESH_SQL.format(
+            card=self.model._meta.db_table, recipe=Recipe._meta.db_table, user=get_user_model()._meta.db_table,
+            recipe_ingredient=RecipeIngredient._meta.db_table, ingredient=Ingredient._meta.db_table,
+            category_label=f"CASE recipe.category {labels} ELSE %s END",
+            where="WHERE recipe.id = ANY(%s)" if recipe_ids is not None else "",
+        )
+        params = [item for choice in Recipe.Category.choices for item in choice] + ["Unknown category"]
+        if recipe_ids is not None:
+            params.append(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+
+    def as_cards(self, *extra_fields: str) -> "RecipeCardQuerySet":
+        """Плоские данные для `recipes-list.html` - одна таблица, без JOIN и агрегации."""
+        return (
+            self.annotate(id=F("recipe_id"), ingredients_list=F("ingredient_names"))
+            .values(*self.CARD_FIELDS, *extra_fields)
+        )
+
+    def search(self, text: str) -> "RecipeCardQuerySet":
+        """`RecipeQuerySet.search` для карточек: вектор и ранг - из строки рецепта (JOIN по ключу)."""
+        query = SearchQuery(text, config="russian", search_type="websearch")
+        return (
+            self.filter(recipe__search_vector=query)
+            .annotate(rank=Cast(SearchRank(F("recipe__search_vector"), query), models.FloatField()))
+            .order_by("-rank", "-recipe_id")
+        )
+
+
+class RecipeCard(models.Model):
+    """
+    Карточка рецепта для списков (read model): все, что показывают главная, избранное и список API,
+    в одной строке - автор и ингредиенты уже подставлены. Строка появляется вместе с рецептом (триггер,
+    миграция 0012), пересобирают ее сигналы при любом изменении рецепта, его состава, ингредиента или автора
+    (`app.signals.invalidate_recipes`), полностью - `manage.py refresh_recipe_cards`. Из Django не записывается.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    name = models.CharField(max_length=255)
+    preview_image = models.CharField(max_length=255)
+    category = models.CharField(max_length=1, choices=Recipe.Category.choices)
+    category_label = models.CharField(max_length=32)
+    time_minutes = models.IntegerField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    author_id = models.BigIntegerField()
+    author_username = models.CharField(max_length=150)
+    author_email = models.CharField(max_length=254)
+    # Ингредиенты по алфавиту: id и названия в одном порядке
+    ingredient_ids = ArrayField(models.BigIntegerField(), default=list)
+    ingredient_names = ArrayField(models.CharField(max_length=255), default=list)
+
+    objects = RecipeCardQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Главная и курсорная пагинация: новые сверху, `(created_at, recipe_id)`
+            models.Index(fields=["created_at", "recipe"], name="app_recipecard_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def author(self) -> dict:
+        return {"id": self.author_id, "username": self.author_username, "email": self.author_email}
+
+    @property
+    def ingredients(self) -> list[dict]:
+        return [{"id": pk, "name": name} for pk, name in zip(self.ingredient_ids, self.ingredient_names)]
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None
+    previous_cursor: str | None
+
+
+class KeysetPaginator:
+    """
+    Пагинация по ключу (keyset/cursor): вместо `OFFSET` и `COUNT(*)` запрос продолжается
+    с последней показанной строки `WHERE (key, id) < (value, last_id)`.
+    Поэтому страница N стоит столько же, сколько первая (при наличии индекса `(key, id)`).
+
+    `ordering` - одно поле сортировки (например, "-created_at"), `id` добавляется для однозначности.
+    Поле связанной модели ("user__username") добавляется в строку аннотацией `related_value`: сама связанная
+    модель в выборке может быть не загружена (`only()`), и курсор стоил бы запроса на страницу.
+    """
+
+    tiebreaker = "id"
+    related_value = "keyset_value"
+
+    def __init__(self, queryset: QuerySet, ordering: str, page_size: int):
+        self.queryset = queryset
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+        self.page_size = page_size
+        self.value_field = self.related_value if "__" in self.field else self.field
+
+    def get_page(self, cursor: str | None) -> KeysetPage:
+        queryset, position, reverse = self._page_queryset(cursor)
+        return self._make_page(list(queryset), position, reverse)
+
+    async def aget_page(self, cursor: str | None) -> KeysetPage:
+        """`get_page` для async view: строки читаются через async ORM (включая `prefetch_related`)."""
+        queryset, position, reverse = self._page_queryset(cursor)
+        return self._make_page([row async for row in queryset], position, reverse)
+
+    def _page_queryset(self, cursor: str | None) -> tuple[QuerySet, tuple[Any, Any] | None, bool | None]:
+        position = reverse = None
+        if cursor:
+            position, reverse = self.decode_cursor(cursor)
+
+        # При переходе назад идем в обратном порядке, а потом разворачиваем страницу.
+        descending = self.descending != bool(reverse)
+        queryset = self.queryset
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(position, descending))
+            except (ValidationError, ValueError, TypeError) as exc:
+                # Значение в курсоре не подходит к типу поля (курсор подделан или от другой сортировки).
+                raise InvalidCursor(cursor) from exc
+        if self.value_field != self.field:
+            queryset = queryset.annotate(**{self.value_field: F(self.field)})
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(prefix + self.field, prefix + self.tiebreaker)
+
+        # Берем на одну запись больше, чтобы без COUNT(*) узнать, есть ли следующая страница.
+        return queryset[:self.page_size + 1], position, reverse
+
+    def _make_page(self, rows: list, position: tuple[Any, Any] | None, reverse: bool | None) -> KeysetPage:
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next, has_previous = (position is not None, has_more) if reverse else (has_more, position is not None)
+        return KeysetPage(
+            object_list=rows,
+            next_cursor=self.encode_cursor(rows[-1], reverse=False) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None,
+        )
+
+    def _after(self, position: tuple[Any, Any], descending: bool) -> Q:
+        value, pk = position
+        lookup = "lt" if descending else "gt"
+        return (
+            Q(**{f"{self.field}__{lookup}": value})
+            | Q(**{self.field: value, f"{self.tiebreaker}__{lookup}": pk})
+        )
+
+    @staticmethod
+    def _get_value(obj, field: str) -> Any:
+        if isinstance(obj, dict):  # Результат `.values()`
+            return obj[field]
+        return getattr(obj, field)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        value = self._get_value(obj, self.value_field)
+        if isinstance(value, (datetime, date)):
+            # Не используем DjangoJSONEncoder: он обрезает микросекунды, и курсор "терял" бы записи.
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            # Строкой, без потери точности через float (фильтр `field > '123.45'` приведет тип сам)
+            value = str(value)
+        payload = json.dumps([value, self._get_value(obj, self.tiebreaker), int(reverse)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[tuple[Any, Any], bool]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+            raise InvalidCursor(cursor) from exc
+        return (value, pk), bool(reverse)
@@ -0,0 +1,209 @@
+"""
+"Что приготовить из того, что есть": рецепты по доле ингредиентов, которые есть у пользователя.
+
+Индекс хранится в памяти процесса. У каждого рецепта есть позиция; у ингредиента - битовая маска позиций
+рецептов (число Python), у редких ингредиентов вместо маски - массив позиций (так меньше памяти).
+Запрос складывает маски ингредиентов "из кладовой" в побитовый счетчик (несколько масок-разрядов),
+затем для каждой пары "совпало k из s" берет `счетчик == k` и маску рецептов из s ингредиентов.
+Все операции - над целыми масками, без цикла Python по рецептам или по строкам состава.
+
+Как индекс поддерживается актуальным - см. `app.memory_index`.
+"""
+import copy
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+
+from .memory_index import MemoryIndex
+from .models import Recipe
+
+# Маска, если ингредиент есть хотя бы в 1/128 рецептов: такие маски не нужно собирать из массива на запрос.
+# Таких ингредиентов не больше `128 * средний размер рецепта`, память под маски ограничена.
+DENSE_RATIO = 128
+
+
+def _to_mask(positions, length: int) -> int:
+    buffer = bytearray((length + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+@dataclass
+class PantryMatch:
+    recipe_id: int
+    matched: int
+    total: int
+
+    @property
+    def coverage(self) -> float:
+        return self.matched / self.total
+
+
+class PantryIndex:
+    def __init__(self, rows=()):
+        """`rows` - пары `(id рецепта, id ингредиентов)`, как `values_list("id", "ingredient_ids")`."""
+        self.built_at = time.monotonic()
+        self.recipe_ids = array("q")  # позиция -> id рецепта
+        self.sizes = array("l")  # позиция -> число ингредиентов рецепта
+        self.positions: dict[int, int] = {}  # id рецепта -> актуальная позиция
+        self.postings: dict[int, int | array] = {}  # id ингредиента -> маска или массив позиций рецептов
+        self.size_masks: dict[int, int] = {}  # число ингредиентов -> маска позиций (только актуальных)
+        self.removed = 0
+
+        by_size: dict[int, list[int]] = {}
+        for recipe_id, ingredient_ids in rows:
+            ingredient_ids = set(ingredient_ids)
+            if not ingredient_ids:
+                continue
+            position = len(self.recipe_ids)
+            self.recipe_ids.append(recipe_id)
+            self.sizes.append(len(ingredient_ids))
+            self.positions[recipe_id] = position
+            by_size.setdefault(len(ingredient_ids), []).append(position)
+            for ingredient_id in ingredient_ids:
+                postings = self.postings.get(ingredient_id)
+                if postings is None:
+                    postings = self.postings[ingredient_id] = array("l")
+                postings.append(position)
+
+        length = len(self.recipe_ids)
+        self.size_masks = {size: _to_mask(positions, length) for size, positions in by_size.items()}
+        for ingredient_id, postings in self.postings.items():
+            if len(postings) * DENSE_RATIO >= length:
+                self.postings[ingredient_id] = _to_mask(postings, length)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def copy(self) -> "PantryIndex":
+        """Копия для `add`/`remove`: исходный индекс в это время читают другие потоки."""
+        index = copy.copy(self)
+        index.recipe_ids, index.sizes = array("q", self.recipe_ids), array("l", self.sizes)
+        index.positions, index.postings = dict(self.positions), dict(self.postings)
+        index.size_masks = dict(self.size_masks)
+        return index
+
+    def add(self, recipe_id: int, ingredient_ids) -> None:
+        """Добавляет рецепт или заменяет его состав (старая позиция исключается из масок размеров)."""
+        self.remove(recipe_id)
+        ingredient_ids = set(ingredient_ids)
+        if not ingredient_ids:
+            return
+        position = len(self.recipe_ids)
+        bit = 1 << position
+        self.recipe_ids.append(recipe_id)
+        self.sizes.append(len(ingredient_ids))
+        self.positions[recipe_id] = position
+        self.size_masks[len(ingredient_ids)] = self.size_masks.get(len(ingredient_ids), 0) | bit
+        for ingredient_id in ingredient_ids:
+            postings = self.postings.get(ingredient_id)
+            if isinstance(postings, int):
+                self.postings[ingredient_id] = postings | bit
+                continue
+            # Новый массив, а не `append`: прежний может быть общим с копией, которую читают
+            postings = array("l", postings or ())
+            postings.append(position)
+            if len(postings) * DENSE_RATIO >= len(self.recipe_ids):
+                postings = _to_mask(postings, len(self.recipe_ids))
+            self.postings[ingredient_id] = postings
+
+    def remove(self, recipe_id: int) -> None:
+        # Биты позиции в масках ингредиентов остаются, но без маски размера позиция в выдачу не попадет.
+        position = self.positions.pop(recipe_id, None)
+        if position is None:
+            return
+        size = self.sizes[position]
+        self.size_masks[size] ^= 1 << position
+        if not self.size_masks[size]:
+            del self.size_masks[size]
+        self.removed += 1
+
+    def match(self, pantry, limit: int = 20, min_coverage: float = 0.0) -> list[PantryMatch]:
+        """
+        Рецепты с наибольшей долей ингредиентов из `pantry`; при равной доле - с большим числом совпадений,
+        затем недавно добавленные или измененные (у них позиции больше).
+        """
+        length = len(self.recipe_ids)
+        masks = []
+        for ingredient_id in set(pantry):
+            postings = self.postings.get(ingredient_id)
+            if postings is not None:
+                masks.append(postings if isinstance(postings, int) else _to_mask(postings, length))
+
+        # Побитовый счетчик: `planes[j]` - j-й разряд числа совпадений каждого рецепта.
+        planes: list[int] = []
+        for carry in masks:
+            for j, plane in enumerate(planes):
+                planes[j] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+        equal: dict[int, int] = {}  # число совпадений -> маска рецептов
+        for matched in range(1, min(len(masks), max(self.size_masks, default=0)) + 1):
+            if matched.bit_length() > len(planes):
+                break
+            mask = -1
+            for j, plane in enumerate(planes):
+                mask &= plane if matched >> j & 1 else ~plane
+            if mask:
+                equal[matched] = mask
+
+        pairs = sorted(
+            ((matched, size) for matched in equal for size in self.size_masks if size >= matched),
+            key=lambda pair: (pair[0] / pair[1], pair[0]), reverse=True,
+        )
+        results = []
+        for matched, size in pairs:
+            if len(results) >= limit or matched / size < min_coverage:
+                break
+            hits = equal[matched] & self.size_masks[size]
+            while hits and len(results) < limit:
+                position = hits.bit_length() - 1
+                hits ^= 1 << position
+                results.append(PantryMatch(self.recipe_ids[position], matched, size))
+        return results
+
+    def memory_bytes(self) -> int:
+        """Примерный объем индекса: массивы, маски, словари и ключи-числа в них."""
+        size = sys.getsizeof(self.recipe_ids) + sys.getsizeof(self.sizes)
+        size += sys.getsizeof(self.positions) + sum(map(sys.getsizeof, self.positions)) * 2
+        size += sys.getsizeof(self.postings) + sum(map(sys.getsizeof, self.postings))
+        size += sum(map(sys.getsizeof, self.postings.values()))
+        size += sum(map(sys.getsizeof, self.size_masks.values()))
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "recipes": len(self),
+            "ingredients": len(self.postings),
+            "dense_ingredients": sum(isinstance(postings, int) for postings in self.postings.values()),
+            "removed_positions": self.removed,
+            "memory_bytes": self.memory_bytes(),
+            "age_seconds": round(time.monotonic() - self.built_at, 1),
+        }
+
+
+def _rows(queryset):
+    return queryset.order_by("id").values_list("id", "ingredient_ids").iterator(chunk_size=5000)
+
+
+def _refresh(index: PantryIndex, recipe_ids: list[int]) -> PantryIndex:
+    rows = dict(_rows(Recipe.objects.filter(pk__in=recipe_ids)))
+    index = index.copy()
+    for recipe_id in recipe_ids:
+        index.add(recipe_id, rows.get(recipe_id, ()))
+    return index
+
+
+pantry_index = MemoryIndex(lambda: PantryIndex(_rows(Recipe.objects.all())), _refresh)
+
+
+def find_recipes(pantry, limit: int = 20, min_coverage: float = 0.0) -> tuple[list[PantryMatch], dict]:
+    """Подбор рецептов и статистика индекса."""
+    index = pantry_index.get()
+    return index.match(pantry, limit, min_coverage), index.stats()
@@ -0,0 +1,119 @@
+"""
+Чтение с реплики Postgres (алиас `replica` в `DATABASES`, см. `food/settings.py`).
+
+На реплику идут только чтения каталога (`REPLICA_MODELS`) внутри view с `replica_reads` (главная,
+страница рецепта, список и рецепт в API) и только для безопасных методов. Все остальное, в том числе
+любые записи, сессии, пользователи и отозванные токены, - в `default`.
+Реплика отстает от основной базы, поэтому чтения остаются на основной:
+- `REPLICA_PIN_SECONDS` секунд после запроса клиента на запись (cookie от `ReplicaPinMiddleware`),
+  чтобы автор сразу видел свои изменения;
+- столько же после любого изменения рецептов (`app.cache.get_last_write`), иначе старые данные с реплики
+  попали бы в кэш под новой версией.
+Без алиаса `replica` все запросы идут в `default`, как с одной базой.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import get_last_write
+
+REPLICA = "replica"
+PIN_COOKIE = "primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Модели приложения `app`, которые можно читать с реплики: каталог рецептов. Избранное, как и сессии,
+# пользователи и отозванные токены, меняет сам клиент - отстающая копия для них не годится.
+REPLICA_MODELS = {"recipe", "recipecard", "recipeingredient", "ingredient"}
+
+# Contextvar, а не thread-local: переходит в потоки `sync_to_async` вместе с запросом async view.
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+def replica_configured() -> bool:
+    return REPLICA in settings.DATABASES
+
+
+def pin_seconds() -> int:
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+def can_read_replica(request) -> bool:
+    if not replica_configured() or request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+        return False
+    last_write = get_last_write()
+    return last_write is None or time.time() - last_write >= pin_seconds()
+
+
+@contextmanager
+def reading_from_replica(enabled: bool = True):
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """Декоратор view (обычного или async): чтения из базы - с реплики, если это допустимо для запроса."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            with reading_from_replica(can_read_replica(request)):
+                return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with reading_from_replica(can_read_replica(request)):
+                return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """
+    Алиас возвращается явно, а не `None`: иначе Django выбрал бы базу, из которой прочитан объект,
+    и сохранение рецепта, прочитанного с реплики, ушло бы на реплику.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label == "app" and model._meta.model_name in REPLICA_MODELS:
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Реплика - копия `default`, объекты из обеих баз связаны как обычно
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA  # Схему реплика получает репликацией
+
+
+class ReplicaPinMiddleware:
+    """После запроса на запись (POST, PUT, ...) клиент `REPLICA_PIN_SECONDS` секунд читает с основной базы."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    @staticmethod
+    def pin(request, response):
+        if replica_configured() and request.method not in SAFE_METHODS:
+            # Срок - через `max_age`: cookie исчезнет сама, проверять нужно только ее наличие
+            response.set_cookie(PIN_COOKIE, "1", max_age=pin_seconds(), httponly=True, samesite="Lax")
+        return response
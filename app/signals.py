@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_recipe_versions, record_catalogue_deletion
+from .favorite_service import merge_session_favorites
+from .instrumentation import install_query_metrics
+from .models import Recipe, RecipeCard, Ingredient, Favorite, ingredients_created
+from .autocomplete import ingredient_names, recipe_names
+from .memory_index import MemoryIndex
+from .pantry import pantry_index
+
+
+def invalidate_recipes(recipe_ids, touch: bool = False) -> None:
+    """
+    Меняет версии рецептов в кэше и пересобирает их карточки (`RecipeCard`). `touch=True` - еще и
+    `updated_at`, когда рецепт изменился не через свой `save()` (состав ингредиентов, ингредиент, автор).
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    if touch:
+        Recipe.objects.filter(pk__in=recipe_ids).update(updated_at=timezone.now())
+    RecipeCard.objects.refresh(recipe_ids)
+    _bump_versions(recipe_ids)
+    pantry_index.mark_stale(recipe_ids)
+    recipe_names.mark_stale(recipe_ids)
+    if transaction.get_connection().in_atomic_block:
+        # Пока транзакция не зафиксирована, другой запрос может прочитать старые данные
+        # и положить их в кэш уже под новой версией. Меняем версию еще раз после COMMIT.
+        transaction.on_commit(lambda: _bump_versions(recipe_ids))
+
+
+def _bump_versions(recipe_ids) -> None:
+    # Индексы в памяти этого процесса получают изменения через `mark_stale`, перестраивать их не нужно
+    MemoryIndex.skip_version(*bump_recipe_versions(recipe_ids))
+
+
+def _ingredient_recipe_ids(ingredient_id: int) -> list[int]:
+    return list(
+        Recipe.ingredients.through.objects.filter(ingredient_id=ingredient_id).values_list("recipe_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance: Recipe, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance: Recipe, **kwargs):
+    # Удаление не меняет `updated_at` оставшихся рецептов, но список изменился (Last-Modified).
+    record_catalogue_deletion()
+    invalidate_recipes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_ingredients_changed(sender, instance, action: str, reverse: bool, pk_set, **kwargs):
+    if not reverse:
+        # instance - рецепт
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_recipes([instance.pk], touch=True)
+    elif action == "pre_clear":
+        # instance - ингредиент, после очистки связей уже не узнать, в каких рецептах он был
+        instance._affected_recipe_ids = _ingredient_recipe_ids(instance.pk)
+    elif action == "post_clear":
+        invalidate_recipes(getattr(instance, "_affected_recipe_ids", []), touch=True)
+    elif action in ("post_add", "post_remove"):
+        invalidate_recipes(pk_set, touch=True)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance: Ingredient, created: bool, **kwargs):
+    ingredient_names.mark_stale([instance.pk])
+    if not created:
+        invalidate_recipes(_ingredient_recipe_ids(instance.pk), touch=True)
+
+
+@receiver(ingredients_created, sender=Ingredient)
+def ingredients_resolved(sender, ids, **kwargs):
+    ingredient_names.mark_stale(ids)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(sender, instance: Ingredient, **kwargs):
+    instance._affected_recipe_ids = _ingredient_recipe_ids(instance.pk)
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance: Ingredient, **kwargs):
+    ingredient_names.mark_stale([instance.pk])
+    invalidate_recipes(getattr(instance, "_affected_recipe_ids", []), touch=True)
+
+
+@receiver(post_save, sender=get_user_model())
+def author_saved(sender, instance, created: bool, update_fields=None, **kwargs):
+    # Имя и email автора есть в ответах API. Обновление только `last_login` при входе не в счет.
+    if created or update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_recipes(Recipe.objects.filter(user=instance).values_list("id", flat=True), touch=True)
+
+
+@receiver(user_logged_in)
+def user_logged_in_merge_favorites(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, "session"):
+        merge_session_favorites(request, user)
+
+
+# `FavoriteRecipesService` меняет счетчик сам (его SQL сигналы не отправляет). Эти обработчики - для
+# остальных путей: админка, ORM, каскадное удаление вместе с пользователем.
+@receiver(post_save, sender=Favorite)
+def favorite_saved(sender, instance: Favorite, created: bool, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(favorites_count=F("favorites_count") + 1)
+        transaction.on_commit(lambda: bump_recipe_versions([instance.recipe_id], catalogue=False))
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance: Favorite, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id, favorites_count__gt=0).update(
+        favorites_count=F("favorites_count") - 1
+    )
+    transaction.on_commit(lambda: bump_recipe_versions([instance.recipe_id], catalogue=False))
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_query_metrics(connection)
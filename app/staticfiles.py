@@ -0,0 +1,152 @@
+"""
+Статика: имена с хешем содержимого, заранее сжатые копии и отдача с долгим кэшированием.
+
+`collectstatic` (`CompressedManifestStaticFilesStorage`) копирует файлы в `STATIC_ROOT` с хешем
+в имени (`main.3f2a9c1b.css`) и рядом пишет `.gz` и, если установлен пакет `brotli`, `.br`.
+Файл с хешем не меняется никогда, поэтому `serve_static` отдает его с `Cache-Control: immutable`
+на год, а сжатую копию выбирает по `Accept-Encoding` (с учетом `q`) - без сжатия на каждый запрос.
+На `If-Modified-Since` без изменений отвечает `304`.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.contrib.staticfiles.views import serve as serve_from_finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # Необязательная зависимость: без нее только `.gz`
+    brotli = None
+
+# Что имеет смысл сжимать: текстовые форматы (картинки и шрифты woff/woff2 уже сжаты)
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico",
+                           ".ttf", ".otf", ".eot"}
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MUTABLE_MAX_AGE = 60 * 5  # Файлы без хеша (например, запрошенные по исходному имени)
+
+# Расширение сжатой копии -> `Content-Encoding`, в порядке предпочтения
+ENCODINGS = [(".br", "br"), (".gz", "gzip")]
+
+
+def _compress(content: bytes) -> dict[str, bytes]:
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def __init__(self, *args, manifest_strict: bool | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if manifest_strict is not None:  # `STORAGES["staticfiles"]["OPTIONS"]`
+            self.manifest_strict = manifest_strict
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Сжимаются только файлы с хешем: их и отдают клиентам (`{% static %}`)
+        for name in set(self.hashed_files.values()):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with self.open(name) as file:
+                content = file.read()
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, compressed in _compress(content).items():
+                if len(compressed) < len(content) * 0.9:  # Иначе клиенту выгоднее исходный файл
+                    if self.exists(name + suffix):
+                        self.delete(name + suffix)
+                    self.save(name + suffix, ContentFile(compressed))
+
+    def stored_name(self, name):
+        if not self.manifest_strict and self.hash_key(self.clean_name(name)) not in self.hashed_files:
+            # Нестрогий режим (`collectstatic` еще не запускали): исходное имя без хеша
+            return name
+        return super().stored_name(name)
+
+    def is_immutable(self, name: str) -> bool:
+        """Имя с хешем (значение манифеста): содержимое под ним не изменится."""
+        if self._hashed_names is None:
+            self._hashed_names = set(self.hashed_files.values())
+        return name in self._hashed_names
+
+    _hashed_names: set[str] | None = None
+
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """`Accept-Encoding` -> {кодировка: q}: `"br;q=0, gzip"` -> {"br": 0.0, "gzip": 1.0}."""
+    result = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[coding.lower()] = q
+    return result
+
+
+def acceptable_encodings(header: str) -> list[str]:
+    """Допустимые клиентом сжатые варианты (`q > 0`, в том числе через `*`) в порядке предпочтения."""
+    accepted = accepted_encodings(header)
+    default = accepted.get("*", 0.0)
+    return [name for _, name in ENCODINGS if accepted.get(name, default) > 0]
+
+
+def serve_static(request, path: str):
+    """
+    Файл из `STATIC_ROOT`: сжатая копия по `Accept-Encoding`, для имен с хешем - `immutable` на год.
+    Без `collectstatic` при `DEBUG` файлы ищутся finder'ами, как у `runserver`.
+    """
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path) if settings.STATIC_ROOT else None
+    except SuspiciousFileOperation:  # Путь за пределами STATIC_ROOT
+        raise Http404(path)
+    if full_path is None or not os.path.isfile(full_path):
+        if settings.DEBUG:
+            return serve_from_finders(request, path, insecure=True)
+        raise Http404(path)
+
+    # Дата изменения исходного файла - одна для всех сжатых вариантов
+    mtime = os.stat(full_path).st_mtime
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(full_path)
+        acceptable, encoding = acceptable_encodings(request.META.get("HTTP_ACCEPT_ENCODING", "")), None
+        for suffix, name in ENCODINGS:
+            if name in acceptable and os.path.isfile(full_path + suffix):
+                full_path, encoding = full_path + suffix, name
+                break
+        response = FileResponse(open(full_path, "rb"), content_type=content_type or "application/octet-stream")
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["Last-Modified"] = http_date(mtime)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    immutable = getattr(staticfiles_storage, "is_immutable", lambda name: False)(path)
+    if immutable:
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
@@ -0,0 +1,19 @@
+from django import template
+
+from app.images import image_url
+
+register = template.Library()
+
+
+@register.inclusion_tag("recipe/picture.html")
+def recipe_picture(name: str, size: str, css_class: str = "", style: str = ""):
+    """
+    Картинка рецепта нужного размера: WebP для браузеров, которые его поддерживают, иначе JPEG.
+    Пока уменьшенные копии не готовы (или картинка загружена до их появления), используется оригинал.
+    """
+    return {
+        "webp_url": image_url(name, size, "webp"),
+        "src": image_url(name, size, "jpg") or image_url(name),
+        "css_class": css_class,
+        "style": style,
+    }
@@ -0,0 +1,25 @@
+from django.template.backends.django import DjangoTemplates
+
+from .instrumentation import timed
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Обычный бэкенд Django-шаблонов, но время `render()` попадает в метрику `template` запроса."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return self._template.render(context, request)
@@ -0,0 +1,49 @@
+import logging
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from ..models import Recipe
+
+# Строка лога на каждый запрос тестам не нужна (медленные запросы - WARNING - остаются).
+logging.getLogger("app.performance").setLevel(logging.WARNING)
+
+
+class AppTestCase(TestCase):
+    """
+    Реплика (`DB_REPLICA_HOST`) в тестах - зеркало тестовой базы (`TEST.MIRROR`), но данные `TestCase`
+    не закоммичены и другому соединению не видны: чтение остается в `default`. Маршрутизацию
+    проверяет `ReplicaRoutingTestCase`.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        patcher = mock.patch("app.replica.replica_configured", return_value=False)
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        super().setUpClass()
+
+
+class RecipeFixtureMixin:
+    """
+    Общие данные тестов: пользователь `cook` (пароль `password`) и его рецепт `recipe`.
+    Поля рецепта задает `recipe_fields`, `None` - без рецепта.
+    """
+    recipe_fields = {"name": "Омлет", "description": "", "category": "B"}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = get_user_model().objects.create_user(username="cook", password="password")
+        if cls.recipe_fields is not None:
+            cls.recipe = cls.make_recipe(**cls.recipe_fields)
+
+    @classmethod
+    def make_recipe(cls, name: str, ingredients=(), **fields) -> Recipe:
+        """Рецепт пользователя `cook` (по умолчанию - завтрак без описания) с ингредиентами."""
+        fields = {"description": "", "category": "B", "user": cls.user, **fields}
+        recipe = Recipe.objects.create(name=name, **fields)
+        if ingredients:
+            recipe.ingredients.set(ingredients)
+        return recipe
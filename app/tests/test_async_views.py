@@ -0,0 +1,78 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import override_settings
+
+from ..cache import get_cache
+from ..models import Ingredient, Favorite
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+@override_settings(ROOT_URLCONF="food.asgi_urls")
+class AsyncViewsTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = {"name": "Омлет", "description": "<p>Взбить яйца</p>"}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe.ingredients.set([Ingredient.objects.create(name="Яйцо")])
+        cls.make_recipe("Каша")
+        Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def setUp(self):
+        get_cache().clear()
+        caches["fragments"].clear()
+
+    async def test_pages(self):
+        response = await self.async_client.get("/")
+        self.assertContains(response, "Омлет")
+        self.assertContains(response, "Каша")
+        self.assertContains(await self.async_client.get("/", {"search": "омлет"}), "Омлет")
+        self.assertEqual((await self.async_client.get("/", {"cursor": "bad"})).status_code, 404)
+        self.assertContains(await self.async_client.get(f"/recipe/{self.recipe.id}"), "В избранное")
+        self.assertEqual((await self.async_client.get("/recipe/0")).status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f"/recipe/{self.recipe.id}")
+        self.assertContains(response, "Убрать из избранного")
+        self.assertContains(response, "Выйти")
+        not_modified = await self.async_client.get(f"/recipe/{self.recipe.id}",
+                                                   headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        response = await self.async_client.get("/recipe/favorites")
+        self.assertContains(response, "Омлет")
+        self.assertNotContains(response, "Каша")
+
+    async def test_api_matches_sync_views(self):
+        await self.async_client.aforce_login(self.user)
+        await self.client.aforce_login(self.user)
+        for url in ("/api/recipes/", "/api/recipes/?category=B&ordering=time_minutes",
+                    f"/api/recipes/{self.recipe.id}"):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header("ETag"))
+                get_cache().clear()
+                expected = await sync_to_async(self.client.get)(url, headers={"Accept": "application/json"})
+                self.assertEqual(response.json(), expected.json())
+
+        etag = (await self.async_client.get("/api/recipes/"))["ETag"]
+        response = await self.async_client.get("/api/recipes/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_api_errors_and_writes(self):
+        # Права и аутентификация - как у синхронного view (рецепт без входа недоступен)
+        response = await self.async_client.get(f"/api/recipes/{self.recipe.id}")
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual((await self.async_client.get("/api/recipes/", {"time_max": "x"})).status_code, 400)
+        self.assertEqual((await self.async_client.get("/api/recipes/", {"cursor": "bad"})).status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.async_client.get("/api/recipes/0")).status_code, 404)
+        response = await self.async_client.post("/api/recipes/", {
+            "name": "Суп", "description": "<p>Сварить</p>", "preview_image": "images/soup.jpg", "time_minutes": 30,
+            "category": "D", "ingredients": [{"name": "Вода"}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        response = await self.async_client.get("/api/recipes/")
+        self.assertIn("Суп", [recipe["name"] for recipe in response.json()["results"]])
@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..forms import RecipeForm
+from ..memory_index import MemoryIndex
+from ..models import Recipe, Ingredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class AutocompleteTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ingredients = [Ingredient.objects.create(name=f"Ингредиент {i:02}") for i in range(30)]
+        cls.beet = Ingredient.objects.create(name="Свёкла")
+        for name in ("Борщ домашний", "Борщ зеленый", "Суп домашний", "Сырники"):
+            cls.make_recipe(name, category="D")
+
+    def setUp(self):
+        MemoryIndex.reset_all()
+
+    def suggest(self, q: str, **params) -> list[str]:
+        response = self.client.get("/api/recipes/autocomplete/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_prefix_word_and_typo_matching(self):
+        self.assertEqual(self.suggest("бор"), ["Борщ домашний", "Борщ зеленый"])
+        self.assertEqual(self.suggest("дом"), ["Борщ домашний", "Суп домашний"])
+        self.assertEqual(self.suggest("борщ дом"), ["Борщ домашний"])
+        self.assertEqual(self.suggest("борш"), ["Борщ домашний", "Борщ зеленый"])
+        self.assertEqual(self.suggest("свекла", type="ingredients"), ["Свёкла"])
+        self.assertEqual(self.client.get("/api/recipes/autocomplete/?q=").status_code, 400)
+
+    def test_bounded_pages(self):
+        response = self.client.get("/api/recipes/autocomplete/", {"q": "ингр", "type": "ingredients", "limit": 20})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 20)
+        self.assertIn("max-age=60", response["Cache-Control"])
+        rest = self.client.get(data["next"]).json()
+        self.assertEqual([item["name"] for item in rest["results"]], [f"Ингредиент {i:02}" for i in range(20, 30)])
+        self.assertIsNone(rest["next"])
+
+    def test_changes_in_this_process_are_visible(self):
+        self.assertEqual(self.suggest("сыр"), ["Сырники"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.filter(name="Сырники").get().delete()
+            self.make_recipe("Сырный суп", category="D")
+            Ingredient.objects.create(name="Сыр")
+        self.assertEqual(self.suggest("сыр"), ["Сырный суп"])
+        self.assertEqual(self.suggest("сыр", type="ingredients"), ["Сыр"])
+
+    def test_form_renders_only_selected_ingredients(self):
+        recipe = self.make_recipe("Свекольник", [self.beet], category="D")
+        with CaptureQueriesContext(connection) as context:
+            html = str(RecipeForm(instance=recipe)["ingredients"])
+        self.assertEqual(html.count("<option"), 1)
+        self.assertIn('data-autocomplete-url="/api/recipes/autocomplete/"', html)
+        self.assertLessEqual(len(context), 2)
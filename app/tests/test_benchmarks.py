@@ -0,0 +1,35 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+
+from ..benchmarks import compare, percentile, run_scenario
+from ..benchmarks.catalogue import generate_catalogue
+from ..benchmarks.scenarios import default_scenarios
+from ..models import Recipe, Ingredient
+from .base import AppTestCase
+
+
+class BenchmarkTestCase(AppTestCase):
+    def test_scenarios_run_on_synthetic_catalogue(self):
+        catalogue = generate_catalogue(recipes=30, users=3, ingredients=40, ingredients_per_recipe=4,
+                                       favorites_per_user=5)
+        self.assertEqual(Recipe.objects.count(), 30)
+        self.assertEqual(Ingredient.objects.count(), 40)
+        self.assertEqual(Recipe.ingredients.through.objects.count(), 30 * 4)
+        # Счетчики избранного совпадают с таблицей избранного, хотя `bulk_create` сигналов не отправляет
+        counts = Counter(pk for ids in catalogue.favorites.values() for pk in ids)
+        self.assertEqual(dict(Recipe.objects.filter(favorites_count__gt=0).values_list("id", "favorites_count")),
+                         dict(counts))
+
+        self.client.force_login(get_user_model().objects.get(pk=catalogue.user_ids[0]))
+        results = {
+            scenario.name: run_scenario(scenario, self.client, iterations=3, warmup=1)
+            for scenario in default_scenarios(catalogue)
+        }
+        self.assertEqual(results["create_recipe"]["iterations"], 3)
+        self.assertTrue(all(r["p50_ms"] <= r["p95_ms"] and r["queries"] > 0 for r in results.values()))
+
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2)
+        self.assertEqual(percentile([4, 1, 3, 2], 95), 4)
+        rows = compare({"results": results}, {"results": results})
+        self.assertTrue(all(change == 0 for *_, change in rows))
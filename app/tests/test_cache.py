@@ -0,0 +1,55 @@
+from ..cache import get_cache
+from ..cache_backends import BoundedLocMemCache
+from ..models import Ingredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class RecipeCacheTestCase(RecipeFixtureMixin, AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.egg = Ingredient.objects.create(name="Яйцо")
+        cls.recipe.ingredients.set([cls.egg])
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.client.get(f"/api/recipes/{self.recipe.id}")
+        self.client.get("/api/recipes/")
+        with self.assertNumQueries(4):  # Только сессия и пользователь на каждый запрос
+            self.client.get(f"/api/recipes/{self.recipe.id}")
+            self.client.get("/api/recipes/")
+
+    def test_edits_invalidate_detail_and_list(self):
+        self.assertEqual(self.client.get(f"/api/recipes/{self.recipe.id}").json()["name"], "Омлет")
+        self.client.get("/api/recipes/")
+
+        self.recipe.name = "Яичница"
+        self.recipe.save()
+        self.assertEqual(self.client.get(f"/api/recipes/{self.recipe.id}").json()["name"], "Яичница")
+
+        self.egg.name = "Куриное яйцо"
+        self.egg.save()
+        results = self.client.get("/api/recipes/").json()["results"]
+        self.assertEqual(results[0]["ingredients"], [{"id": self.egg.id, "name": "Куриное яйцо"}])
+
+        self.recipe.ingredients.clear()
+        self.assertEqual(self.client.get("/api/recipes/").json()["results"][0]["ingredients"], [])
+
+        recipe_id = self.recipe.id
+        self.recipe.delete()
+        self.assertEqual(self.client.get(f"/recipe/{recipe_id}").status_code, 404)
+        self.assertEqual(self.client.get("/api/recipes/").json()["results"], [])
+
+    def test_bounded_locmem_cache_evicts_by_size(self):
+        cache = BoundedLocMemCache("test-bounded", {"OPTIONS": {"MAX_BYTES": 3000}})
+        cache.set("a", "x" * 1000)
+        cache.set("b", "x" * 1000)
+        cache.get("a")  # "a" теперь используется чаще, вытеснен будет "b"
+        cache.set("c", "x" * 1000)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        cache.clear()
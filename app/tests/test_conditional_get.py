@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.cache import has_vary_header
+
+from ..cache import get_cache
+from ..models import Recipe, Ingredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class ConditionalGetTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = {"name": "Каша"}
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_login(self.user)
+
+    def assertNotModifiedUntilChanged(self, url: str, change):
+        self.client.get(url)  # Первый визит выставляет CSRF-cookie, от которой зависит HTML-страница
+        response = self.client.get(url)
+        validators = {"HTTP_IF_NONE_MATCH": response["ETag"]}
+        if response.has_header("Last-Modified"):
+            validators["HTTP_IF_MODIFIED_SINCE"] = response["Last-Modified"]
+        self.assertEqual(self.client.get(url, **validators).status_code, 304)
+        change()
+        self.assertEqual(self.client.get(url, **validators).status_code, 200)
+
+    def test_api_detail(self):
+        milk = Ingredient.objects.create(name="Молоко")
+        self.assertNotModifiedUntilChanged(f"/api/recipes/{self.recipe.id}", lambda: self.recipe.ingredients.add(milk))
+
+    def test_api_list(self):
+        def rename():
+            self.recipe.name = "Овсянка"
+            self.recipe.save()
+        self.assertNotModifiedUntilChanged("/api/recipes/", rename)
+
+    async def test_api_responses_vary_on_accept(self):
+        # ETag зависит от `Accept` (JSON или MessagePack): кэши между клиентом и сервером должны это знать
+        await self.async_client.aforce_login(self.user)
+        for urlconf in ("food.urls", "food.asgi_urls"):
+            with override_settings(ROOT_URLCONF=urlconf):
+                for url in (f"/api/recipes/{self.recipe.id}", "/api/recipes/"):
+                    response = await self.async_client.get(url)
+                    not_modified = await self.async_client.get(url, headers={"If-None-Match": response["ETag"]})
+                    self.assertEqual(not_modified.status_code, 304)
+                    for result in (response, not_modified):
+                        self.assertTrue(has_vary_header(result, "Accept"), (urlconf, url, result.status_code))
+
+    def test_recipe_page_depends_on_favorites(self):
+        self.assertNotModifiedUntilChanged(
+            f"/recipe/{self.recipe.id}", lambda: self.client.post(f"/recipe/favorite/{self.recipe.id}")
+        )
+
+    def test_not_modified_skips_recipe_queries(self):
+        response = self.client.get(f"/api/recipes/{self.recipe.id}")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/recipes/{self.recipe.id}", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any("app_recipe" in query["sql"] for query in context.captured_queries))
+
+    def test_ingredient_change_bumps_updated_at(self):
+        before = Recipe.objects.get(pk=self.recipe.pk).updated_at
+        self.recipe.ingredients.add(Ingredient.objects.create(name="Соль"))
+        self.assertGreater(Recipe.objects.get(pk=self.recipe.pk).updated_at, before)
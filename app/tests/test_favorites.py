@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+
+from ..api.pagination import KeysetCursorPagination
+from ..models import Recipe, Favorite
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class FavoriteTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [cls.make_recipe(f"Рецепт {i}") for i in range(4)]
+
+    def test_anonymous_favorites_are_merged_on_login(self):
+        first, second = self.recipes[:2]
+        self.client.post(f"/recipe/favorite/{first.id}")
+        self.client.post(f"/recipe/favorite/{second.id}")
+        self.client.post(f"/recipe/favorite/{second.id}")  # Повторно - без дубликата
+        self.assertEqual(self.client.session["favorites"], [first.id, second.id])
+        self.assertFalse(Favorite.objects.exists())
+
+        self.client.login(username="cook", password="password")
+
+        self.assertNotIn("favorites", self.client.session)
+        self.assertEqual(set(Favorite.objects.values_list("recipe_id", flat=True)), {first.id, second.id})
+        self.assertEqual(Recipe.objects.get(pk=first.pk).favorites_count, 1)
+
+        self.client.post(f"/recipe/favorite/{first.id}", {"favorite": "no"})
+        self.assertEqual(Recipe.objects.get(pk=first.pk).favorites_count, 0)
+        response = self.client.get("/recipe/favorites")
+        self.assertEqual([r["id"] for r in response.context["recipes"]], [second.id])
+
+    def test_bulk_api(self):
+        self.client.force_login(self.user)
+        ids = [r.id for r in self.recipes]
+
+        response = self.client.post("/api/recipes/favorites/", {"recipes": ids[:3] + [ids[0], 999999]},
+                                    content_type="application/json")
+        self.assertEqual(response.json(), {"added": ids[:3]})
+        response = self.client.post("/api/recipes/favorites/", {"recipes": ids}, content_type="application/json")
+        self.assertEqual(response.json(), {"added": ids[3:]})
+        self.assertEqual(list(Recipe.objects.order_by("id").values_list("favorites_count", flat=True)), [1] * 4)
+
+        response = self.client.delete("/api/recipes/favorites/", {"recipes": ids[:2]},
+                                      content_type="application/json")
+        self.assertEqual(response.json(), {"removed": ids[:2]})
+        self.assertEqual(Recipe.objects.get(pk=ids[0]).favorites_count, 0)
+
+        self.assertEqual(
+            self.client.post("/api/recipes/favorites/", {"recipes": []}, content_type="application/json").status_code,
+            400,
+        )
+
+    def test_api_listing_is_ordered_and_paginated(self):
+        self.client.force_login(self.user)
+        for recipe in self.recipes:
+            self.client.post("/api/recipes/favorites/", {"recipes": [recipe.id]}, content_type="application/json")
+
+        url, ids = "/api/recipes/favorites/", []
+        with mock.patch.object(KeysetCursorPagination, "page_size", 3):
+            while url:
+                data = self.client.get(url).json()
+                ids.extend(item["recipe"]["id"] for item in data["results"])
+                url = data["next"]
+        self.assertEqual(ids, [r.id for r in reversed(self.recipes)])
+
+    def test_count_follows_orm_deletes(self):
+        reader = get_user_model().objects.create_user(username="reader")
+        Favorite.objects.create(user=reader, recipe=self.recipes[0])
+        self.assertEqual(Recipe.objects.get(pk=self.recipes[0].pk).favorites_count, 1)
+        reader.delete()
+        self.assertEqual(Recipe.objects.get(pk=self.recipes[0].pk).favorites_count, 0)
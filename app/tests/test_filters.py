@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+
+from ..models import Recipe, Ingredient
+from .base import AppTestCase
+
+
+class RecipeFilterTestCase(AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cook, cls.baker = [get_user_model().objects.create_user(username=name, password="password")
+                               for name in ("cook", "baker")]
+        cls.egg, cls.milk, cls.flour = [Ingredient.objects.create(name=name, kcal=100)
+                                        for name in ("Яйцо", "Молоко", "Мука")]
+
+        def create(name, category, minutes, user, ingredients):
+            recipe = Recipe.objects.create(name=name, description="", user=user, category=category,
+                                           time_minutes=minutes)
+            recipe.ingredients.set(ingredients)
+            return recipe
+
+        cls.omelette = create("Омлет", "B", 10, cls.cook, [cls.egg, cls.milk])
+        cls.pancakes = create("Блины", "B", 40, cls.baker, [cls.egg, cls.milk, cls.flour])
+        cls.bread = create("Хлеб", "D", 180, cls.baker, [cls.flour])
+
+    def names(self, query: str) -> list[str]:
+        response = self.client.get(f"/api/recipes/?ordering=time_minutes&{query}")
+        self.assertEqual(response.status_code, 200)
+        return [recipe["name"] for recipe in response.json()["results"]]
+
+    def test_ingredient_ids_follow_composition(self):
+        self.assertEqual(Recipe.objects.get(pk=self.pancakes.pk).ingredient_ids,
+                         sorted([self.egg.id, self.milk.id, self.flour.id]))
+        self.pancakes.ingredients.remove(self.milk)
+        self.pancakes.name = "Блины без молока"
+        self.pancakes.save()  # устаревший массив в объекте не перезаписывает значение триггера
+        self.assertEqual(Recipe.objects.get(pk=self.pancakes.pk).ingredient_ids, sorted([self.egg.id, self.flour.id]))
+
+    def test_filters(self):
+        self.assertEqual(self.names("category=B"), ["Омлет", "Блины"])
+        self.assertEqual(self.names("category=B&category=D&time_min=30"), ["Блины", "Хлеб"])
+        self.assertEqual(self.names(f"author={self.baker.id}&time_max=60"), ["Блины"])
+        self.assertEqual(self.names("kcal_min=250"), ["Блины"])
+        self.assertEqual(self.names(f"ingredients_all={self.egg.id},{self.flour.id}"), ["Блины"])
+        self.assertEqual(self.names(f"ingredients_any={self.milk.id},{self.flour.id}"), ["Омлет", "Блины", "Хлеб"])
+        self.assertEqual(self.names(f"ingredients_none={self.milk.id}"), ["Хлеб"])
+        self.assertEqual(self.client.get("/api/recipes/?ingredients_all=яйцо").status_code, 400)
+
+    def test_facets(self):
+        facets = self.client.get(f"/api/recipes/?ingredients_any={self.flour.id}").json()["facets"]
+        self.assertEqual([(c["value"], c["count"]) for c in facets["category"]], [("B", 1), ("D", 1), ("S", 0)])
+        self.assertEqual(facets["ingredients"], [
+            {"id": self.flour.id, "name": "Мука", "count": 2},
+            {"id": self.egg.id, "name": "Яйцо", "count": 1},
+            {"id": self.milk.id, "name": "Молоко", "count": 1},
+        ])
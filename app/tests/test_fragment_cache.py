@@ -0,0 +1,46 @@
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+
+from ..cache import get_cache
+from ..models import Recipe, Ingredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class FragmentCacheTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = {"name": "Омлет", "description": "<p>Взбить яйца</p>"}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe.ingredients.set([Ingredient.objects.create(name="Яйцо")])
+
+    def setUp(self):
+        get_cache().clear()
+        caches["fragments"].clear()
+
+    def test_cards_are_cached_until_recipe_changes(self):
+        self.assertContains(self.client.get("/"), "Омлет")
+        # Без изменения `updated_at` используется сохраненный фрагмент карточки
+        Recipe.objects.filter(pk=self.recipe.pk).update(name="Яичница")
+        self.assertContains(self.client.get("/"), "Омлет")
+
+        self.recipe.name = "Яичница"
+        self.recipe.save()
+        response = self.client.get("/")
+        self.assertContains(response, "Яичница")
+        self.assertNotContains(response, "Омлет")
+
+    def test_per_user_parts_stay_outside_fragments(self):
+        url = f"/recipe/{self.recipe.id}"
+        self.assertContains(self.client.get(url), "В избранное")
+        updated_at = Recipe.objects.values_list("updated_at", flat=True).get(pk=self.recipe.pk)
+        key = make_template_fragment_key("recipe_description", [self.recipe.id, updated_at])
+        self.assertIn("Взбить яйца", caches["fragments"].get(key))
+
+        self.client.force_login(self.user)
+        self.client.post(f"/recipe/favorite/{self.recipe.id}", {"favorite": "yes"})
+        response = self.client.get(url)
+        self.assertContains(response, "Убрать из избранного")
+        self.assertContains(response, "Взбить яйца")
+        self.assertContains(response, "Выйти")
+        self.assertContains(response, 'name="csrfmiddlewaretoken"', count=2)  # выход и избранное
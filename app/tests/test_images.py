@@ -0,0 +1,93 @@
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image, UnidentifiedImageError
+
+from ..images import store_image, generate_derivatives, derivative_name, image_url, is_content_addressed
+from ..models import Recipe
+from .base import AppTestCase
+
+
+class ImageStorageTestCase(AppTestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=Path(self.media_root.name), IMAGE_DERIVATIVES_ASYNC=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @staticmethod
+    def make_upload(name: str, color: str, pil_format: str = "JPEG") -> SimpleUploadedFile:
+        buffer = io.BytesIO()
+        Image.new("RGB", (1600, 1200), color).save(buffer, pil_format)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def stored_files(self) -> list[Path]:
+        return [p for p in Path(self.media_root.name, "images").rglob("*") if p.is_file()]
+
+    def test_uploads_are_deduplicated_by_content(self):
+        first = store_image(self.make_upload("photo.jpg", "red"))
+        same = store_image(self.make_upload("other.JPG", "red"))
+        different = store_image(self.make_upload("photo.jpg", "blue"))
+        self.assertEqual(first, same)
+        self.assertNotEqual(first, different)
+        self.assertTrue(is_content_addressed(first))
+        originals = [p for p in self.stored_files() if len(p.stem) == 64]
+        self.assertEqual(len(originals), 2)
+
+    def test_suffix_follows_image_format(self):
+        self.assertTrue(store_image(self.make_upload("photo.jpg", "red", "PNG")).endswith(".png"))
+        self.assertTrue(store_image(self.make_upload("photo.exe", "red")).endswith(".jpg"))
+
+    def test_failed_upload_leaves_no_temporary_file(self):
+        with self.assertRaises(UnidentifiedImageError):
+            store_image(SimpleUploadedFile("photo.jpg", b"not an image"))
+        broken = self.make_upload("photo.jpg", "red")
+        with mock.patch.object(broken, "chunks", side_effect=OSError("connection reset")):
+            with self.assertRaises(OSError):
+                store_image(broken)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_derivatives(self):
+        name = store_image(self.make_upload("photo.jpg", "green"))
+        self.assertEqual(generate_derivatives(name), [])  # Уже созданы при загрузке
+        with Image.open(Path(self.media_root.name) / derivative_name(name, "card", "webp")) as card:
+            self.assertEqual(card.format, "WEBP")
+            self.assertEqual(card.size, (480, 360))
+
+    def test_image_url_does_not_stat_on_every_render(self):
+        legacy = Path(self.media_root.name, "images", "soup.jpg")
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(self.make_upload("soup.jpg", "yellow").read())
+        with mock.patch.object(Path, "exists", autospec=True, side_effect=Path.exists) as exists:
+            self.assertIsNone(image_url("images/soup.jpg", "card"))
+            self.assertIsNone(image_url("images/soup.jpg", "thumb", "webp"))
+            self.assertEqual(exists.call_count, 1)  # "Копий нет" запомнено
+
+            generate_derivatives("images/soup.jpg")
+            exists.reset_mock()
+            self.assertEqual(image_url("images/soup.jpg", "card", "webp"),
+                             f"{settings.MEDIA_URL}{derivative_name('images/soup.jpg', 'card', 'webp')}")
+            self.assertEqual(exists.call_count, 0)
+
+    def test_backfill_command_rehashes_legacy_images(self):
+        user = get_user_model().objects.create_user(username="cook")
+        legacy = Path(self.media_root.name, "images", "soup.jpg")
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(self.make_upload("soup.jpg", "yellow").read())
+        recipe = Recipe.objects.create(name="Суп", description="", user=user, category="D",
+                                       preview_image="images/soup.jpg")
+
+        call_command("generate_image_derivatives", "--rehash", "--workers=1", stdout=io.StringIO())
+
+        recipe.refresh_from_db()
+        self.assertTrue(is_content_addressed(recipe.preview_image))
+        self.assertFalse(legacy.exists())
+        self.assertTrue(Path(self.media_root.name, derivative_name(recipe.preview_image, "thumb", "jpg")).exists())
@@ -0,0 +1,68 @@
+import io
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+
+from ..models import Recipe, Ingredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class ImportExportTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.salt = Ingredient.objects.create(name="Соль")
+
+    def test_round_trip(self):
+        for fmt in ("jsonl", "csv"):
+            with self.subTest(fmt=fmt), tempfile.TemporaryDirectory() as folder:
+                Recipe.objects.all().delete()
+                source = Path(folder, f"source.{fmt}")
+                for i in range(5):
+                    self.make_recipe(f"Суп {i}", description="<p>Вкусно</p>", category="D", time_minutes=i + 1,
+                                     ingredients=[self.salt, Ingredient.objects.get_or_create(name=f"Овощ {i % 2}")[0]])
+                Recipe.objects.filter(time_minutes=1).update(created_at="2020-01-02T03:04:05.123456+00:00")
+                created_at = list(Recipe.objects.order_by("time_minutes").values_list("created_at", flat=True))
+                call_command("export_recipes", str(source), "--chunk-size=2", stderr=io.StringIO())
+                Recipe.objects.all().delete()
+                ingredients_before = Ingredient.objects.count()
+
+                call_command("import_recipes", str(source), "--chunk-size=2", stdout=io.StringIO(),
+                             stderr=io.StringIO())
+
+                self.assertEqual(Ingredient.objects.count(), ingredients_before)
+                recipes = Recipe.objects.order_by("time_minutes").with_ingredients()
+                self.assertEqual([r.name for r in recipes], [f"Суп {i}" for i in range(5)])
+                self.assertEqual(sorted(i.name for i in recipes[0].ingredients.all()), ["Овощ 0", "Соль"])
+                self.assertEqual([r.created_at for r in recipes], created_at)
+                self.assertTrue(Recipe.objects.search("суп").exists())  # Триггер заполнил `search_vector`
+
+    def test_invalid_rows_are_skipped(self):
+        with tempfile.TemporaryDirectory() as folder:
+            source = Path(folder, "source.jsonl")
+            source.write_text(
+                '{"name": "Каша", "category": "B", "ingredients": ["Соль", "Крупа"]}\n'
+                '{"name": "Без категории", "category": "X"}\n'
+                'not json\n'
+                '{"name": "Чужой", "category": "B", "user": "nobody"}\n'
+                '[1]\n'
+                'null\n'
+                f'{{"name": "{"Очень" * 60}", "category": "B"}}\n'
+                f'{{"name": "Суп", "category": "B", "preview_image": "{"a" * 256}"}}\n'
+                f'{{"name": "Суп", "category": "B", "ingredients": ["{"б" * 256}"]}}\n'
+                '{"name": "Суп", "category": "B", "ingredients": "Соль"}\n'
+                '{"name": "Суп", "category": "B", "created_at": "вчера"}\n'
+                '{"name": "Старая каша", "category": "B", "created_at": "2020-01-02 03:04:05"}\n',
+                encoding="utf-8",
+            )
+            stderr = io.StringIO()
+            call_command("import_recipes", str(source), "--user=cook", stdout=io.StringIO(), stderr=stderr)
+
+        self.assertEqual(sorted(Recipe.objects.values_list("name", flat=True)), ["Каша", "Старая каша"])
+        self.assertEqual(Recipe.objects.get(name="Старая каша").created_at.year, 2020)
+        for line_number in range(2, 12):
+            self.assertIn(f"Строка {line_number}", stderr.getvalue())
+        self.assertEqual(Ingredient.objects.filter(name__in=["Соль", "Крупа"]).count(), 2)
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..autocomplete import suggest
+from ..forms import IngredientForm
+from ..memory_index import MemoryIndex
+from ..models import Recipe, Ingredient, ingredient_key
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class IngredientUpsertTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.salt = Ingredient.objects.create(name="Соль")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create_recipe(self, ingredients: list[str]):
+        return self.client.post("/api/recipes/", {
+            "name": "Суп", "description": "<p>Суп</p>", "preview_image": "images/soup.jpg", "time_minutes": 10, "category": "D",
+            "ingredients": [{"name": name} for name in ingredients],
+        }, content_type="application/json")
+
+    def test_create_takes_constant_queries(self):
+        counts = []
+        for size in (2, 20):
+            with CaptureQueriesContext(connection) as context:
+                response = self.create_recipe([f"Ингредиент {size}-{i}" for i in range(size)])
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_names_are_case_and_whitespace_insensitive(self):
+        response = self.create_recipe([" соль ", "СОЛЬ", "Перец"])
+        recipe = Recipe.objects.get(pk=response.json()["id"])
+        self.assertEqual(sorted(recipe.ingredients.values_list("name", flat=True)), ["Перец", "Соль"])
+        self.assertEqual(Ingredient.objects.count(), 2)
+        self.assertEqual(Ingredient.objects.resolve_ids(["перец", "Лук"]).keys(), {"перец", "лук"})
+        self.assertFalse(IngredientForm(data={"name": "  СОЛЬ"}).is_valid())
+
+    def test_created_ingredients_reach_autocomplete(self):
+        MemoryIndex.reset_all()
+        self.assertEqual(suggest("ingredients", "пе"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = Ingredient.objects.resolve_ids(["Перец", "соль"])
+        self.assertEqual([(s.id, s.name) for s in suggest("ingredients", "пе")], [(ids["перец"], "Перец")])
+        self.assertEqual([s.id for s in suggest("ingredients", "со")], [self.salt.id])
+
+    def test_keys_match_callers_for_any_whitespace_and_case(self):
+        # `str.strip()` убирает табуляцию и неразрывный пробел, `btrim` - только пробелы;
+        # `str.lower()` и `lower()` базы расходятся, например, для "İ"
+        names = ["соль\t", "\u00a0Перец", "İzmir"]
+        ids = Ingredient.objects.resolve_ids(names)
+        self.assertEqual(ids.keys(), {ingredient_key(name) for name in names})
+        self.assertEqual(ids[ingredient_key("соль\t")], self.salt.id)
+        self.assertEqual(Ingredient.objects.resolve_ids(["İzmir"]), {"i̇zmir": ids["i̇zmir"]})
+        self.assertEqual(Ingredient.objects.count(), 3)
+        self.assertFalse(IngredientForm(data={"name": "соль\t"}).is_valid())
+
+    def test_nested_update(self):
+        recipe_id = self.create_recipe(["Соль"]).json()["id"]
+
+        response = self.client.patch(f"/api/recipes/{recipe_id}", {"name": "Борщ"}, content_type="application/json")
+        self.assertEqual(response.json()["ingredients"], [{"id": self.salt.id, "name": "Соль"}])
+
+        response = self.client.patch(f"/api/recipes/{recipe_id}", {"ingredients": [{"name": "Свекла"}]},
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([i["name"] for i in response.json()["ingredients"]], ["Свекла"])
+        self.assertEqual(list(Recipe.objects.get(pk=recipe_id).ingredients.values_list("name", flat=True)),
+                         ["Свекла"])
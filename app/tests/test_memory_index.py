@@ -0,0 +1,78 @@
+import threading
+
+from django.test import override_settings
+
+from ..cache import bump_catalogue_version
+from ..memory_index import MemoryIndex
+from ..models import Ingredient
+from ..pantry import pantry_index
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class MemoryIndexTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    def make_index(self, build, refresh=None) -> MemoryIndex:
+        index = MemoryIndex(build, refresh)
+        self.addCleanup(MemoryIndex._instances.remove, index)
+        return index
+
+    def test_rebuild_does_not_block_readers(self):
+        building, finish = threading.Event(), threading.Event()
+        builds = []
+
+        def build():
+            builds.append(None)
+            if len(builds) > 1:
+                building.set()
+                finish.wait(5)
+            return len(builds)
+
+        def read():
+            seen.append(index.get())
+
+        index = self.make_index(build)
+        seen = []
+        read()
+
+        bump_catalogue_version()
+        with override_settings(MEMORY_INDEX_REBUILD_INTERVAL=0):
+            rebuild = threading.Thread(target=read)
+            rebuild.start()
+            self.assertTrue(building.wait(5))
+            read()  # Перестройка идет в другом потоке: читаем прежнюю структуру, не дожидаясь ее
+            finish.set()
+            rebuild.join(5)
+            read()
+        self.assertEqual(seen, [1, 1, 2, 2])
+        self.assertEqual(len(builds), 2)
+
+    def test_refresh_replaces_structure_being_read(self):
+        index = self.make_index(lambda: (), lambda structure, ids: (*structure, *sorted(ids)))
+        structure = index.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            index.mark_stale([2, 1])
+
+        # Структуру еще читают в этом потоке: обновление в другом ее не ждет и не меняет
+        refreshed = []
+        reader = threading.Thread(target=lambda: refreshed.append(index.get()))
+        reader.start()
+        reader.join(5)
+        self.assertEqual(refreshed, [(1, 2)])
+        self.assertEqual(structure, ())
+        self.assertIs(index.get(), refreshed[0])
+
+    def test_local_changes_do_not_rebuild(self):
+        pantry_index.reset()
+        pantry_index.get()
+        built_at = pantry_index._built_at
+        with override_settings(MEMORY_INDEX_REBUILD_INTERVAL=0):
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe = self.make_recipe("Омлет", [Ingredient.objects.create(name="Яйцо")])
+            # Версия каталога сменилась из-за записи в этом процессе: рецепт добавлен точечно
+            self.assertIn(recipe.pk, pantry_index.get().positions)
+            self.assertEqual(pantry_index._built_at, built_at)
+
+            bump_catalogue_version()  # Смена версии другим процессом (импорт, генератор каталога)
+            pantry_index.get()
+            self.assertGreater(pantry_index._built_at, built_at)
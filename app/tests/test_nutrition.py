@@ -0,0 +1,78 @@
+from decimal import Decimal
+from unittest import mock
+
+from ..api.pagination import KeysetCursorPagination
+from ..models import Recipe, Ingredient, RecipeIngredient
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class NutritionTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.egg = Ingredient.objects.create(name="Яйцо", kcal=157, protein="12.7", fat="11.5", carbs="0.7")
+        cls.milk = Ingredient.objects.create(name="Молоко", kcal=52, protein="2.8", fat="2.5", carbs="4.7")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def totals(self, recipe_id: int) -> tuple:
+        return Recipe.objects.values_list(*Recipe.TOTAL_FIELDS).get(pk=recipe_id)
+
+    def test_totals_follow_composition(self):
+        response = self.client.post("/api/recipes/", {
+            "name": "Омлет", "description": "<p>Омлет</p>", "preview_image": "images/omelette.jpg", "time_minutes": 10,
+            "category": "B", "ingredients": [{"name": "яйцо", "quantity": "120"}, {"name": "Молоко", "quantity": 50}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        recipe_id = response.json()["id"]
+        # 157 * 1.2 + 52 * 0.5
+        self.assertEqual(response.json()["total_kcal"], "214.40")
+        self.assertEqual(self.totals(recipe_id), (Decimal("214.40"), Decimal("16.64"), Decimal("15.05"),
+                                                  Decimal("3.19")))
+
+        response = self.client.patch(f"/api/recipes/{recipe_id}", {"ingredients": [{"name": "Яйцо", "quantity": 60}]},
+                                     content_type="application/json")
+        self.assertEqual(response.json()["total_kcal"], "94.20")
+
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).delete()
+        self.assertEqual(self.totals(recipe_id), (0, 0, 0, 0))
+
+        # Обычный M2M API тоже работает, количество по умолчанию - 100 г
+        Recipe.objects.get(pk=recipe_id).ingredients.add(self.milk)
+        self.assertEqual(self.totals(recipe_id)[0], Decimal("52.00"))
+
+    def test_ingredient_change_updates_totals_and_save_keeps_them(self):
+        recipes = [self.make_recipe(f"Рецепт {i}") for i in range(2)]
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipes[0], ingredient=self.egg, quantity=200),
+            RecipeIngredient(recipe=recipes[0], ingredient=self.milk),
+            RecipeIngredient(recipe=recipes[1], ingredient=self.milk, quantity=300),
+        ])
+        self.assertEqual([self.totals(r.pk)[0] for r in recipes], [Decimal("366.00"), Decimal("156.00")])
+
+        Ingredient.objects.filter(pk=self.milk.pk).update(kcal=60)
+        self.assertEqual([self.totals(r.pk)[0] for r in recipes], [Decimal("374.00"), Decimal("180.00")])
+
+        # В объекте итоги устарели, но `save()` не перезаписывает значения триггеров
+        recipes[1].name = "Молочный коктейль"
+        recipes[1].save()
+        self.assertEqual(self.totals(recipes[1].pk)[0], Decimal("180.00"))
+
+        self.milk.delete()
+        self.assertEqual([self.totals(r.pk)[0] for r in recipes], [Decimal("314.00"), Decimal("0.00")])
+
+    def test_api_orders_by_calories(self):
+        for i, quantity in enumerate((300, 100, 200, 50)):
+            recipe = self.make_recipe(f"Рецепт {i}")
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=self.egg, quantity=quantity)
+
+        kcal, url = [], "/api/recipes/?ordering=-total_kcal"
+        with mock.patch.object(KeysetCursorPagination, "page_size", 3):
+            while url:
+                page = self.client.get(url).json()
+                kcal += [recipe["total_kcal"] for recipe in page["results"]]
+                url = page["next"]
+        self.assertEqual(kcal, ["471.00", "314.00", "157.00", "78.50"])
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..api.pagination import KeysetCursorPagination
+from ..models import Recipe
+from ..pagination import KeysetPaginator
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class KeysetPaginationTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Одинаковое время приготовления у многих рецептов: проверяем разрешение "ничьих" по `id`.
+        cls.recipes = [cls.make_recipe(f"Рецепт {i}", time_minutes=i % 3 + 1) for i in range(7)]
+
+    def _walk(self, ordering: str, page_size: int = 3) -> list[int]:
+        paginator = KeysetPaginator(Recipe.objects.all(), ordering, page_size)
+        page = paginator.get_page(None)
+        ids = [r.id for r in page.object_list]
+        while page.next_cursor:
+            previous = page
+            page = paginator.get_page(page.next_cursor)
+            self.assertEqual(paginator.get_page(page.previous_cursor).object_list, previous.object_list)
+            ids.extend(r.id for r in page.object_list)
+        return ids
+
+    def test_pages_cover_all_rows_in_order(self):
+        expected = [r.id for r in Recipe.objects.order_by("time_minutes", "id")]
+        self.assertEqual(self._walk("time_minutes"), expected)
+        expected = [r.id for r in Recipe.objects.order_by("-created_at", "-id")]
+        self.assertEqual(self._walk("-created_at"), expected)
+
+    def test_api_follows_next_links_with_ordering(self):
+        url = "/api/recipes/?ordering=-time_minutes"
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(r["id"] for r in data["results"])
+            url = data["next"]
+        self.assertEqual(ids, [r.id for r in Recipe.objects.order_by("-time_minutes", "-id")])
+
+    def test_related_ordering_encodes_cursor_without_queries(self):
+        other = get_user_model().objects.create_user(username="baker")
+        Recipe.objects.filter(pk__in=[r.pk for r in self.recipes[::2]]).update(user=other)
+        url, ids = "/api/recipes/?ordering=user__username", []
+        with mock.patch.object(KeysetCursorPagination, "page_size", 3), CaptureQueriesContext(connection) as context:
+            while url:
+                data = self.client.get(url).json()
+                ids.extend(r["id"] for r in data["results"])
+                url = data["next"]
+        self.assertEqual(ids, [r.id for r in Recipe.objects.order_by("user__username", "id")])
+        # Автор в списке - из карточки, имя для курсора - из строки страницы: отдельных запросов автора нет
+        self.assertFalse([query["sql"] for query in context.captured_queries
+                          if query["sql"].startswith('SELECT "users_user"')])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/recipes/", {"cursor": "garbage"}).status_code, 404)
+        self.assertEqual(self.client.get("/", {"cursor": "garbage"}).status_code, 404)
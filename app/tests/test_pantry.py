@@ -0,0 +1,57 @@
+from ..memory_index import MemoryIndex
+from ..models import Ingredient
+from ..pantry import PantryIndex
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class PantryTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.egg, cls.milk, cls.flour, cls.salt = [Ingredient.objects.create(name=name)
+                                                  for name in ("Яйцо", "Молоко", "Мука", "Соль")]
+        cls.omelette = cls.make_recipe("Омлет", [cls.egg, cls.milk, cls.salt])
+        cls.boiled_egg = cls.make_recipe("Вареное яйцо", [cls.egg])
+        cls.pancakes = cls.make_recipe("Блины", [cls.egg, cls.milk, cls.flour, cls.salt])
+
+    def setUp(self):
+        MemoryIndex.reset_all()
+
+    def pantry(self, *ingredients, **params) -> dict:
+        response = self.client.get("/api/recipes/pantry/",
+                                   {"ingredients": ",".join(str(i.id) for i in ingredients), **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_index_matches_by_coverage(self):
+        index = PantryIndex([(1, [10, 11]), (2, [10]), (3, [10, 11, 12, 13]), (4, [12]), (5, [10, 12])])
+        self.assertEqual([(m.recipe_id, m.matched, m.total) for m in index.match([10, 11, 99])],
+                         [(1, 2, 2), (2, 1, 1), (3, 2, 4), (5, 1, 2)])
+        self.assertEqual([m.recipe_id for m in index.match([10, 11], limit=2)], [1, 2])
+        self.assertEqual([m.recipe_id for m in index.match([10, 11], min_coverage=0.6)], [1, 2])
+
+        original = index
+        index = original.copy()
+        index.add(2, [11, 12])
+        index.remove(1)
+        self.assertEqual([(m.recipe_id, m.matched) for m in index.match([10, 11])], [(3, 2), (2, 1), (5, 1)])
+        self.assertEqual(len(index), 4)
+        # Копию меняют, пока исходный индекс читают
+        self.assertEqual([m.recipe_id for m in original.match([10, 11])], [1, 2, 3, 5])
+        self.assertEqual(len(original), 5)
+        self.assertGreater(index.stats()["memory_bytes"], 0)
+
+    def test_api_ranks_recipes_and_lists_missing(self):
+        data = self.pantry(self.egg, self.milk, self.salt)
+        self.assertEqual([(r["recipe"]["name"], r["coverage"]) for r in data["results"]],
+                         [("Омлет", 1.0), ("Вареное яйцо", 1.0), ("Блины", 0.75)])
+        self.assertEqual(data["results"][-1]["missing"], [{"id": self.flour.id, "name": "Мука"}])
+        self.assertEqual(data["index"]["recipes"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pancakes.ingredients.remove(self.flour)
+        self.assertEqual([r["coverage"] for r in self.pantry(self.egg, self.milk, self.salt)["results"]],
+                         [1.0, 1.0, 1.0])
+        self.assertEqual(self.client.get("/api/recipes/pantry/?ingredients=яйцо").status_code, 400)
@@ -0,0 +1,35 @@
+import json
+
+from django.test import override_settings
+
+from ..cache import get_cache
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class PerformanceMiddlewareTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = {"name": "Каша"}
+
+    def setUp(self):
+        get_cache().clear()
+
+    @staticmethod
+    def server_timing(response) -> dict[str, str]:
+        return dict(item.strip().split(";", 1) for item in response["Server-Timing"].split(","))
+
+    def test_server_timing_header(self):
+        timing = self.server_timing(self.client.get("/"))
+        self.assertEqual(timing.keys(), {"db", "template", "total"})
+
+        self.client.force_login(self.user)
+        timing = self.server_timing(self.client.get("/api/recipes/"))
+        self.assertIn("serializer", timing)
+        self.assertRegex(timing["db"], r'dur=[\d.]+;desc="\d+ queries"')
+
+    @override_settings(PERFORMANCE_SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_queries(self):
+        with self.assertLogs("app.performance", "WARNING") as logs:
+            self.client.get("/")
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["route"], record["status"]), ("", 200))
+        self.assertGreater(record["queries"], 0)
+        self.assertIn("app_recipe", record["slow_queries"][0]["sql"])
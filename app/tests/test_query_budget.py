@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import get_cache
+from ..models import Recipe, Ingredient
+from .base import AppTestCase
+
+
+class QueryBudgetMixin:
+    """
+    Проверка "бюджета" запросов: число SQL-запросов view не должно расти вместе с размером страницы.
+    Данные досоздаются между замерами, поэтому один и тот же URL проверяется на разном объеме.
+    """
+    ingredients_per_recipe = 3
+
+    def seed_recipes(self, count: int) -> list[Recipe]:
+        user = get_user_model().objects.create_user(username=f"author{Recipe.objects.count()}")
+        recipes = []
+        for _ in range(count):
+            number = Recipe.objects.count()
+            recipe = Recipe.objects.create(name=f"Рецепт {number}", description="<p>Описание</p>", user=user,
+                                           category="B")
+            recipe.ingredients.set([
+                Ingredient.objects.create(name=f"Ингредиент {number}-{i}")
+                for i in range(self.ingredients_per_recipe)
+            ])
+            recipes.append(recipe)
+        return recipes
+
+    def count_queries(self, url: str, **params) -> int:
+        # "Прогревочный" запрос: создание сессии при первом визите не относится к самому view.
+        self.client.get(url, params)
+        # Считаем запросы view без кэша.
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertConstantQueries(self, url: str, sizes=(2, 12), budget: int | None = None, **params):
+        counts = []
+        for size in sizes:
+            self.seed_recipes(size - Recipe.objects.count())
+            counts.append(self.count_queries(url, **params))
+        self.assertEqual(len(set(counts)), 1, f"Число запросов растет с размером выборки {sizes}: {counts}")
+        if budget is not None:
+            self.assertLessEqual(counts[0], budget)
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, AppTestCase):
+    def test_home(self):
+        # Карточки рецептов - одна таблица `RecipeCard` (сессия, если есть, - из кэша)
+        self.assertConstantQueries("/", budget=1)
+
+    def test_api_list(self):
+        # Last-Modified (MAX по индексу) + рецепты с карточками (JOIN по ключу)
+        # + счетчики по категориям и ингредиентам
+        self.assertConstantQueries("/api/recipes/", budget=4)
+        self.assertConstantQueries("/api/recipes/", sizes=(14, 16), budget=4, ordering="user__username")
+
+    def test_api_detail(self):
+        recipe = self.seed_recipes(1)[0]
+        self.client.force_login(recipe.user)
+        # Сессия + пользователь + Last-Modified + рецепт с автором + ингредиенты
+        self.assertLessEqual(self.count_queries(f"/api/recipes/{recipe.id}"), 5)
+
+    def test_show_recipe(self):
+        recipe = self.seed_recipes(1)[0]
+        recipe.ingredients.add(*[Ingredient.objects.create(name=f"Еще {i}") for i in range(5)])
+        # Рецепт с автором + ингредиенты: у анонимного пользователя без избранного сессия не создается
+        self.assertEqual(self.count_queries(f"/recipe/{recipe.id}"), 2)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_favorites(self):
+        for recipe in self.seed_recipes(5):
+            self.client.post(f"/recipe/favorite/{recipe.id}")
+        response = self.client.get("/recipe/favorites")
+        self.assertEqual(len(response.context["recipes"]), 5)
+        # Карточки рецептов (сессия - из кэша, `cached_db`)
+        self.assertEqual(self.count_queries("/recipe/favorites"), 1)
+
+        self.client.force_login(get_user_model().objects.create_user(username="reader"))
+        for recipe in Recipe.objects.all()[:5]:
+            self.client.post(f"/recipe/favorite/{recipe.id}")
+        # Пользователь + карточки рецептов (JOIN с избранным) + id избранного для меню
+        self.assertEqual(self.count_queries("/recipe/favorites"), 3)
@@ -0,0 +1,87 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Recipe, RecipeCard, Ingredient, Favorite
+from .base import AppTestCase
+
+
+class RecipeCardTestCase(AppTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="cook", email="cook@example.com")
+        cls.egg = Ingredient.objects.create(name="Яйцо")
+        cls.milk = Ingredient.objects.create(name="Молоко")
+
+    def card(self, recipe_id: int) -> RecipeCard:
+        return RecipeCard.objects.get(pk=recipe_id)
+
+    def test_card_follows_recipe_ingredients_and_author(self):
+        recipe = Recipe.objects.create(name="Омлет", description="", user=self.user, category="B", time_minutes=10)
+        recipe.ingredients.add(self.egg, self.milk)
+        card = self.card(recipe.pk)
+        self.assertEqual((card.name, card.category_label, card.time_minutes), ("Омлет", "Завтрак", 10))
+        self.assertEqual(card.author, {"id": self.user.pk, "username": "cook", "email": "cook@example.com"})
+        # По алфавиту, id и названия в одном порядке
+        self.assertEqual(card.ingredients, [{"id": self.milk.pk, "name": "Молоко"}, {"id": self.egg.pk, "name": "Яйцо"}])
+
+        self.egg.name = "Куриное яйцо"
+        self.egg.save()
+        self.user.username = "chef"
+        self.user.save()
+        recipe.refresh_from_db()
+        card = self.card(recipe.pk)
+        self.assertEqual(card.ingredient_names, ["Куриное яйцо", "Молоко"])
+        self.assertEqual(card.author_username, "chef")
+        self.assertEqual(card.updated_at, recipe.updated_at)
+
+        recipe.ingredients.remove(self.milk)
+        self.assertEqual(self.card(recipe.pk).ingredient_ids, [self.egg.pk])
+
+        recipe.delete()
+        self.assertFalse(RecipeCard.objects.exists())
+
+    def test_lists_read_cards(self):
+        for i in range(3):
+            Recipe.objects.create(name=f"Рецепт {i}", description="", user=self.user, category="D").ingredients.add(
+                self.egg)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/")
+        self.assertEqual(len(response.context["recipes"]), 3)
+        self.assertEqual(response.context["recipes"][0]["ingredients_list"], ["Яйцо"])
+        # Одна таблица: ни JOIN, ни агрегации
+        self.assertEqual(len(context), 1)
+        self.assertNotIn("JOIN", context.captured_queries[0]["sql"])
+
+        recipe = self.client.get("/api/recipes/").json()["results"][0]
+        self.assertEqual(recipe["user"], {"id": self.user.pk, "username": "cook", "email": "cook@example.com"})
+        self.assertEqual(recipe["ingredients"], [{"id": self.egg.pk, "name": "Яйцо"}])
+        self.assertEqual(recipe["category"], "Обед")
+
+    def test_bulk_created_recipes_get_cards(self):
+        # `bulk_create` не отправляет сигналы: карточки создает триггер на вставку рецептов
+        recipes = Recipe.objects.bulk_create([
+            Recipe(name=f"Каша {i}", description="", user=self.user, category="S") for i in range(2)
+        ])
+        self.assertEqual(RecipeCard.objects.filter(pk__in=[r.pk for r in recipes]).count(), 2)
+        card = self.card(recipes[0].pk)
+        self.assertEqual((card.category_label, card.author, card.ingredients),
+                         ("Ужин", {"id": self.user.pk, "username": "cook", "email": "cook@example.com"}, []))
+        Favorite.objects.create(user=self.user, recipe=recipes[0])
+        self.client.force_login(self.user)
+
+        self.assertEqual(len(self.client.get("/").context["recipes"]), 2)
+        self.assertEqual(len(self.client.get("/recipe/favorites").context["recipes"]), 1)
+        listed = self.client.get("/api/recipes/").json()["results"]
+        self.assertEqual([(r["category"], r["user"]["username"]) for r in listed], [("Ужин", "cook")] * 2)
+
+    def test_refresh_command_rebuilds_cards(self):
+        recipe = Recipe.objects.create(name="Каша", description="", user=self.user, category="B")
+        # В обход сигналов
+        Recipe.objects.filter(pk=recipe.pk).update(name="Овсяная каша")
+        RecipeCard.objects.all().delete()
+        call_command("refresh_recipe_cards", stdout=io.StringIO())
+        self.assertEqual(self.card(recipe.pk).name, "Овсяная каша")
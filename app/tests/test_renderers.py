@@ -0,0 +1,42 @@
+import unittest
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from ..api.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from ..cache import get_cache
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class RenderersTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = {"name": "Суп", "description": "<p>Сварить\u2028</p>", "category": "D", "time_minutes": 30}
+
+    def test_orjson_output_matches_drf(self):
+        data = {
+            "price": Decimal("1.50"),
+            "created_at": timezone.now(),
+            "label": gettext_lazy("Суп"),
+            "text": "строка\u2028перенос",
+            "recipes": self.client.get("/api/recipes/").json()["results"],
+            1: "ключ-число",
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    @unittest.skipIf(msgpack is None, "msgpack не установлен")
+    def test_msgpack_by_accept_header(self):
+        json_data = self.client.get("/api/recipes/").json()
+        get_cache().clear()
+        response = self.client.get("/api/recipes/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), json_data)
+        self.assertEqual(MessagePackRenderer().render({"price": Decimal("1.50")}), msgpack.packb({"price": 1.5}))  # Как в JSON
+
+    def test_json_body_is_parsed(self):
+        self.client.force_login(self.user)
+        response = self.client.post("/api/recipes/favorites/", {"recipes": [self.recipe.id]},
+                                    content_type="application/json")
+        self.assertEqual(response.json(), {"added": [self.recipe.id]})
+        response = self.client.post("/api/recipes/favorites/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.test import RequestFactory, override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from ..cache import bump_catalogue_version, get_cache
+from ..models import Recipe, RecipeCard, Favorite
+from ..replica import PIN_COOKIE, PrimaryReplicaRouter, reading_from_replica, replica_reads
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class ReplicaRoutingTestCase(RecipeFixtureMixin, AppTestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch("app.replica.replica_configured", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_alias(self, request) -> str:
+        return replica_reads(lambda request: self.router.db_for_read(Recipe))(request)
+
+    def test_router(self):
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+        with reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Recipe), "replica")
+            self.assertEqual(self.router.db_for_read(RecipeCard), "replica")
+            # Данные клиента - с основной базы: реплика могла еще не получить его вход, избранное или выход
+            for model in (Session, get_user_model(), OutstandingToken, Favorite):
+                self.assertEqual(self.router.db_for_read(model), "default")
+            # Запись - всегда в основную базу, даже для объекта, прочитанного с реплики
+            self.recipe._state.db = "replica"
+            self.assertEqual(self.router.db_for_write(Recipe, instance=self.recipe), "default")
+        self.assertFalse(self.router.allow_migrate("replica", "app"))
+
+    def test_safe_requests_read_replica_unless_pinned(self):
+        self.assertEqual(self.read_alias(self.factory.get("/")), "replica")
+        self.assertEqual(self.read_alias(self.factory.post("/")), "default")
+        pinned = self.factory.get("/")
+        pinned.COOKIES[PIN_COOKIE] = "1"
+        self.assertEqual(self.read_alias(pinned), "default")
+
+        # После изменения каталога реплика могла еще не получить его - читаем с основной базы
+        bump_catalogue_version()
+        self.assertEqual(self.read_alias(self.factory.get("/")), "default")
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.assertEqual(self.read_alias(self.factory.get("/")), "replica")
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.post(f"/recipe/favorite/{self.recipe.id}", {"favorite": "yes"})
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+        self.assertNotIn(PIN_COOKIE, self.client.get("/").cookies)
@@ -0,0 +1,38 @@
+from django.urls import reverse
+
+from ..models import Recipe
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class RecipeSearchTestCase(RecipeFixtureMixin, AppTestCase):
+    recipe_fields = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.soup = cls.make_recipe("Борщ", description="<p>Свекла, капуста и картофель</p>", category="D")
+        cls.salad = cls.make_recipe("Салат с капустой", description="<p>Свежие овощи</p>", category="S")
+
+    def test_search_vector_is_filled_by_trigger(self):
+        self.soup.refresh_from_db()
+        self.assertIn("борщ", self.soup.search_vector)
+
+    def test_name_is_ranked_above_description(self):
+        # Словоформы приводятся к основе русским словарем: "капусты" находит "капуста" и "капустой".
+        found = list(Recipe.objects.search("капусты"))
+        self.assertEqual(found, [self.salad, self.soup])
+
+    def test_search_vector_follows_updates(self):
+        self.soup.description = "Только мясо"
+        self.soup.save()
+        self.assertFalse(Recipe.objects.search("свекла").exists())
+        self.soup.time_minutes = 90
+        self.soup.save(update_fields=["time_minutes"])
+        self.assertTrue(Recipe.objects.search("мясо").exists())
+
+    def test_home_and_api_search(self):
+        response = self.client.get(reverse("home"), {"search": "свекла"})
+        self.assertEqual([r["id"] for r in response.context["recipes"]], [self.soup.id])
+
+        response = self.client.get("/api/recipes/", {"search": "капуста"})
+        self.assertEqual([r["id"] for r in response.json()["results"]], [self.salad.id, self.soup.id])
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..favorite_service import favorite_service_preprocessor
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+class AnonymousSessionTestCase(RecipeFixtureMixin, AppTestCase):
+    def test_reading_does_not_create_session(self):
+        for url in ("/", f"/recipe/{self.recipe.id}", "/recipe/favorites", "/api/recipes/"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse(Session.objects.exists())
+
+    def test_session_is_saved_only_when_favorites_change(self):
+        url = f"/recipe/favorite/{self.recipe.id}"
+        self.assertIn(settings.SESSION_COOKIE_NAME, self.client.post(url, {"favorite": "yes"}).cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.post(url, {"favorite": "yes"}).cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.get("/").cookies)
+        # Сессия читается из кэша (`cached_db`), без запроса к `django_session`
+        with CaptureQueriesContext(connection) as context:
+            self.assertContains(self.client.get("/"), "Омлет")
+        self.assertFalse(any("django_session" in query["sql"] for query in context.captured_queries))
+
+    def test_favorites_context_is_lazy(self):
+        request = RequestFactory().get("/")
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        context = favorite_service_preprocessor(request)
+        self.assertFalse(request.session.accessed)
+        self.assertNotIn(self.recipe.id, context["favorites_ids"])
+        self.assertTrue(request.session.accessed)
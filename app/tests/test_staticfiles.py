@@ -0,0 +1,83 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import override_settings
+
+from ..models import Recipe
+from ..staticfiles import CompressedManifestStaticFilesStorage
+from .base import AppTestCase
+
+
+class StaticFilesTestCase(AppTestCase):
+    def setUp(self):
+        source, self.static_root = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(self.static_root.cleanup)
+        Path(source.name, "css").mkdir()
+        Path(source.name, "css", "app.css").write_text("body { color: #333; }\n" * 100)
+        Path(source.name, "css", "tiny.css").write_text("a {}")
+        override = override_settings(
+            STATIC_ROOT=Path(self.static_root.name), STATICFILES_DIRS=[source.name, settings.BASE_DIR / "static"],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command("collectstatic", "--noinput", verbosity=0)
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        url = static("css/app.css")
+        hashed = url.removeprefix(settings.STATIC_URL)
+        self.assertRegex(hashed, r"^css/app\.[0-9a-f]{12}\.css$")
+        self.assertTrue(Path(self.static_root.name, hashed + ".gz").exists())
+        self.assertFalse(list(Path(self.static_root.name, "css").glob("tiny.*.gz")))  # Слишком маленький
+
+    def test_hashed_file_is_served_precompressed_and_immutable(self):
+        url = static("css/app.css")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), Path(self.static_root.name, url.removeprefix(settings.STATIC_URL)).read_bytes())
+
+        plain = self.client.get(url)
+        self.assertNotIn("Content-Encoding", plain)
+        for header in ("gzip;q=0", "br, gzip; q=0.0", "*;q=0", "identity"):
+            self.assertNotIn("Content-Encoding", self.client.get(url, HTTP_ACCEPT_ENCODING=header), header)
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING="*")["Content-Encoding"], "gzip")
+
+    def test_if_modified_since(self):
+        url = static("css/app.css")
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT").status_code,
+                         200)
+
+    def test_strict_manifest(self):
+        storage = CompressedManifestStaticFilesStorage(manifest_strict=True)
+        with self.assertRaises(ValueError):
+            storage.stored_name("css/missing.css")
+        self.assertEqual(CompressedManifestStaticFilesStorage(manifest_strict=False).stored_name("css/missing.css"),
+                         "css/missing.css")
+
+    def test_unhashed_name_is_not_immutable(self):
+        response = self.client.get("/static/css/app.css", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertNotIn("Content-Encoding", response)  # Сжатая копия есть только у имени с хешем
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+    def test_pages_are_still_gzipped(self):
+        Recipe.objects.create(name="Суп", description="<p>Сварить</p>" * 50, category="D",
+                              user=get_user_model().objects.create_user(username="cook"))
+        response = self.client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
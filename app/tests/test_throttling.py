@@ -0,0 +1,50 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from ..throttling import get_throttle_cache
+from .base import AppTestCase, RecipeFixtureMixin
+
+
+class ThrottlingTestCase(RecipeFixtureMixin, AppTestCase):
+    RATES = {"api": "3/min", "search": "1/min", "register": "1/hour"}
+    recipe_fields = None
+
+    def setUp(self):
+        get_throttle_cache().clear()
+        # Пустые ведра с тестовыми лимитами не должны достаться другим тестам
+        self.addCleanup(get_throttle_cache().clear)
+        override = override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": self.RATES,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_bucket_per_client_refills_over_time(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/recipes/").status_code, 200)
+        response = self.client.get("/api/recipes/")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "20")  # 3 токена в минуту
+
+        self.client.force_login(self.user)  # Другой клиент - свое ведро
+        self.assertEqual(self.client.get("/api/recipes/").status_code, 200)
+
+        self.client.logout()
+        with mock.patch("app.throttling.time.time", return_value=time.time() + 20):
+            self.assertEqual(self.client.get("/api/recipes/").status_code, 200)
+
+    def test_search_has_own_limit(self):
+        self.assertEqual(self.client.get("/api/recipes/?search=суп").status_code, 200)
+        self.assertEqual(self.client.get("/api/recipes/?search=борщ").status_code, 429)
+        self.assertEqual(self.client.get("/api/recipes/").status_code, 200)
+
+    def test_register_view_is_throttled(self):
+        self.assertEqual(self.client.get("/account/register/").status_code, 200)  # GET не ограничен
+        form = {"username": "x", "email": "x@example.com", "password1": "a", "password2": "b"}  # Не пройдет проверку
+        self.assertEqual(self.client.post("/account/register/", form).status_code, 200)
+        response = self.client.post("/account/register/", form)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3600")
@@ -0,0 +1,127 @@
+"""
+Ограничение частоты запросов "ведром токенов" (token bucket).
+
+У каждого клиента (пользователь, без входа - IP) на каждый маршрут (`scope`) свое ведро емкостью N токенов,
+которое пополняется со скоростью N за период: `"60/min"` - до 60 запросов подряд, дальше - один в секунду.
+Запрос забирает токен, пустое ведро - ответ `429` с `Retry-After`, view не выполняется.
+
+Лимиты - `REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]` по `scope` (как у throttling DRF), состояние ведер -
+кэш `THROTTLE_CACHE_ALIAS`, без записей в базу. Чтение и запись ведра выполняются под блокировкой: в одном
+процессе обновление атомарно. С общим для нескольких процессов backend (Redis) возможны редкие
+лишние запросы при одновременных обращениях одного клиента из разных процессов.
+
+- DRF: `BucketThrottle` (`throttle_scope` view, по умолчанию "api") и `SearchThrottle` (только `?search=`);
+- обычные view Django: декоратор `throttle(scope)`.
+"""
+import math
+import threading
+import time
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+KEY = "throttle:{}:{}"
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+# Блокировки по хешу ключа: клиенты с разными ключами почти никогда не ждут друг друга
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def get_throttle_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """`"60/min"` -> (емкость 60, пополнение 1 токен/с)."""
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def get_rate(scope: str) -> str | None:
+    return api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+
+
+def take_token(key: str, rate: str) -> float:
+    """Забирает токен из ведра `key`. Возвращает 0, если запрос разрешен, иначе - секунды до нового токена."""
+    capacity, refill = parse_rate(rate)
+    cache = get_throttle_cache()
+    now = time.time()  # Не `monotonic`: ведро в общем кэше читают разные процессы
+    with _locks[zlib.crc32(key.encode()) % len(_locks)]:
+        tokens, updated_at = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated_at) * refill)
+        if tokens < 1:
+            return (1 - tokens) / refill
+        # Полное ведро восстанавливается за `capacity / refill` секунд, дольше хранить запись незачем
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(capacity / refill))
+    return 0.0
+
+
+def client_ident(request, user=None) -> str:
+    user = user if user is not None else getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+class BucketThrottle(BaseThrottle):
+    """Ведро на пользователя (или IP) и `throttle_scope` view; scope без лимита в настройках не ограничивается."""
+    scope = "api"
+
+    def __init__(self):
+        self.retry_after = 0.0
+
+    def get_scope(self, view) -> str:
+        return getattr(view, "throttle_scope", self.scope)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = get_rate(scope)
+        if rate is None:
+            return True
+        self.retry_after = take_token(KEY.format(scope, client_ident(request, request.user)), rate)
+        return not self.retry_after
+
+    def wait(self):
+        return math.ceil(self.retry_after)
+
+
+class SearchThrottle(BucketThrottle):
+    """Отдельный, более строгий лимит на полнотекстовый поиск (`?search=`)."""
+    scope = "search"
+
+    def get_scope(self, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        if not request.query_params.get("search"):
+            return True
+        return super().allow_request(request, view)
+
+
+def throttle(scope: str, methods=("POST",)):
+    """
+    Декоратор обычного view: ведро `scope` на клиента для запросов `methods`.
+    Сам view при превышении не вызывается - короткий ответ `429` с `Retry-After`.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = get_rate(scope)
+            if rate is not None and request.method in methods:
+                retry_after = take_token(KEY.format(scope, client_ident(request)), rate)
+                if retry_after:
+                    response = HttpResponse("Слишком много запросов, попробуйте позже.", status=429,
+                                            content_type="text/plain; charset=utf-8")
+                    response["Retry-After"] = str(math.ceil(retry_after))
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
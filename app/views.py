@@ -1,35 +1,59 @@
 from django.contrib.auth.decorators import login_required
 from django.core.handlers.wsgi import WSGIRequest
-from django.http import HttpResponseRedirect, HttpResponseForbidden
+from django.db.models import F
+from django.http import HttpResponseRedirect, HttpResponseForbidden, Http404
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse
 from django.views import View
-from django.contrib.postgres.aggregates import ArrayAgg
+from django.views.decorators.http import condition
 
 
+from .cache import get_or_set, list_cache_key, recipe_cache_key
+from .conditional import recipe_page_etag
 from .favorite_service import FavoriteRecipesService
 from .forms import RecipeForm, IngredientForm
-from .models import Recipe, Ingredient
+from .models import Recipe, RecipeCard, Ingredient
+from .pagination import KeysetPaginator, InvalidCursor
+from .replica import replica_reads
 
 
-def home(request: WSGIRequest):
-    recipes_queryset = (
-        Recipe.objects.all()
-        .prefetch_related("ingredients")
-        .annotate(
-            # Создание массива уникальных имен тегов для каждой заметки
-            ingredients_list=ArrayAgg('ingredients__name', distinct=True)
-        )
-        .values("id", "name", "time_minutes", "preview_image", "ingredients_list", "category")
-    )
+HOME_PAGE_SIZE = 24
+
+
+def home_paginator(request) -> KeysetPaginator:
+    """Запрос главной страницы (общий с async `app.async_views.home`), без выполнения."""
+    # Карточки (`RecipeCard`): страница - чтение одной таблицы по индексу `(created_at, recipe_id)`
+    recipes_queryset = RecipeCard.objects.all()
+    ordering = Recipe._meta.ordering[0]
+    extra_fields = []
 
     search = request.GET.get("search")
     if search:
-        recipes_queryset = recipes_queryset.filter(description__search=search)
+        # Поиск по индексированному `search_vector`, сортировка по релевантности.
+        recipes_queryset = recipes_queryset.search(search)
+        ordering = "-rank"
+        extra_fields.append("rank")
+
+    recipes_queryset = recipes_queryset.as_cards(*extra_fields)
+
+    # Курсорная пагинация: без COUNT(*) и OFFSET, любая страница стоит как первая.
+    return KeysetPaginator(recipes_queryset, ordering, HOME_PAGE_SIZE)
+
 
-    print(recipes_queryset.query)
+@replica_reads
+def home(request: WSGIRequest):
+    paginator = home_paginator(request)
+
+    def get_page():
+        try:
+            return paginator.get_page(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Некорректный курсор")
 
-    return render(request, 'home.html', {"recipes": recipes_queryset})
+    # Страница кэшируется по версии каталога (см. `app.cache`), запрос выполняется только при промахе.
+    page = get_or_set(list_cache_key("home", request.get_full_path()), get_page)
+
+    return render(request, 'home.html', {"recipes": page.object_list, "page": page})
 
 
 @login_required  # Декоратор, который проверяет, зашел ли пользователь на сайт (не анонимный user)
@@ -85,19 +109,42 @@ def update_recipe(request: WSGIRequest, recipe_id: int):  # 'Добавляем
     return render(request, 'recipe-form.html', {'form': form})
 
 
+@replica_reads  # Снаружи, чтобы ETag тоже читал с реплики
+@condition(etag_func=recipe_page_etag)  # Без изменений - 304 без запросов рецепта и рендеринга
 def show_recipe(request: WSGIRequest, recipe_id: int):
-    recipe: Recipe = get_object_or_404(Recipe, id=recipe_id)
+    recipe: Recipe = get_or_set(
+        recipe_cache_key("recipe", recipe_id),
+        lambda: get_object_or_404(Recipe.objects.for_detail(), id=recipe_id),
+    )
     return render(request, "recipe/recipe.html", {"recipe": recipe})
 
 
+def favorites_paginator(request) -> KeysetPaginator:
+    """Запрос страницы избранного (общий с async `app.async_views.favorite_recipes`), без выполнения."""
+    if request.user.is_authenticated:
+        # Недавно добавленные в избранное - первыми.
+        queryset = (
+            RecipeCard.objects.filter(recipe__favorited_by__user=request.user)
+            .annotate(favorited_at=F("recipe__favorited_by__created_at"))
+            .as_cards("favorited_at")
+        )
+        ordering = "-favorited_at"
+    else:
+        queryset = RecipeCard.objects.filter(recipe_id__in=FavoriteRecipesService(request).favorites_ids).as_cards()
+        ordering = Recipe._meta.ordering[0]
+    return KeysetPaginator(queryset, ordering, HOME_PAGE_SIZE)
+
+
 class ListFavoriteRecipesView(View):
     def get(self, request: WSGIRequest):
         """
         Метод `get` вызывается автоматический, когда HTTP метод запроса является `GET`.
         """
-        favorite_service = FavoriteRecipesService(request)
-        queryset = Recipe.objects.filter(id__in=favorite_service.favorites_ids)
-        return render(request, "home.html", {"recipes": queryset})
+        try:
+            page = favorites_paginator(request).get_page(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Некорректный курсор")
+        return render(request, "home.html", {"recipes": page.object_list, "page": page})
 
 
 class MakeFavoriteView(View):
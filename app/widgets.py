@@ -0,0 +1,28 @@
+from django import forms
+
+AUTOCOMPLETE_URL = "/api/recipes/autocomplete/"
+
+
+class AutocompleteSelectMultiple(forms.SelectMultiple):
+    """
+    Множественный выбор с подсказками из `/api/recipes/autocomplete/` (`static/js/autocomplete.js`).
+    В HTML попадают только выбранные варианты, а не вся таблица: страница не растет вместе с каталогом.
+    """
+
+    class Media:
+        js = ["js/autocomplete.js"]
+
+    def __init__(self, kind: str, attrs=None):
+        super().__init__({"data-autocomplete-url": AUTOCOMPLETE_URL, "data-autocomplete-type": kind, **(attrs or {})})
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        if hasattr(choices, "queryset"):
+            # Копия итератора по выбранным id, один запрос вместо всех строк
+            selected = [pk for pk in value if str(pk).isdigit()]
+            self.choices = choices.__class__(choices.field)
+            self.choices.queryset = choices.queryset.filter(pk__in=selected)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
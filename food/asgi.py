@@ -11,6 +11,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food.settings')
+# Async view для чтения рецептов (`food.asgi_urls`), остальное - как в `food.settings`
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food.asgi_settings')
 
 application = get_asgi_application()
@@ -0,0 +1,14 @@
+"""
+Настройки для запуска под ASGI (`food.asgi`, например `uvicorn food.asgi:application`).
+
+Те же, что `food.settings`, но чтение рецептов (главная, страница рецепта, избранное, список и рецепт в API)
+обслуживают async view - см. `food.asgi_urls`.
+"""
+from .settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = "food.asgi_urls"
+
+# Под ASGI каждый запрос ходит в базу из своего потока `sync_to_async`, постоянное соединение
+# досталось бы потоку, который больше не используется. Пул соединений - на стороне PgBouncer.
+for _database in DATABASES.values():  # noqa: F405
+    _database["CONN_MAX_AGE"] = 0
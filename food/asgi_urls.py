@@ -0,0 +1,21 @@
+"""
+URL configuration для ASGI (`food.asgi_settings`).
+
+Страницы и API чтения рецептов обслуживают async view (`app.async_views`, `app.api.async_views`),
+остальные маршруты - те же, что в `food.urls` (синхронные view Django выполняет в потоках).
+"""
+from django.urls import path
+
+from app import async_views
+from app.api import async_views as api_async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('', async_views.home, name="home"),
+    path("recipe/<int:recipe_id>", async_views.show_recipe, name="show-recipe"),
+    path("recipe/favorites", async_views.favorite_recipes, name="show-favorite-recipes"),
+    path("api/recipes/", api_async_views.recipe_list),
+    path("api/recipes/<int:pk>", api_async_views.recipe_detail),
+    # Совпадения проверяются по порядку: маршруты выше перекрывают синхронные с теми же путями
+    *sync_urlpatterns,
+]
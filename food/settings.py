@@ -9,7 +9,9 @@ https://docs.djangoproject.com/en/5.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
+import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,8 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.middleware.PerformanceMiddleware',  # Первым, чтобы замерять все остальное
+    'app.replica.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.middleware.gzip.GZipMiddleware',
+    'app.middleware.StaticAwareGZipMiddleware',  # Статику не сжимает: `.gz`/`.br` готовы заранее
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,7 +72,8 @@ LOGIN_URL = "/accounts/login/"
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Стандартный бэкенд + замер времени рендеринга (Server-Timing, см. `app.middleware`)
+        'BACKEND': 'app.templating.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -99,23 +104,157 @@ DATABASES = {
         "PASSWORD": "Django_password",
         "HOST": "127.0.0.1",  # IP адрес или домен СУБД.
         "PORT": 5432,
+        # Соединение переиспользуется запросами воркера 60 секунд, а не открывается на каждый запрос.
+        # Перед повторным использованием проверяется, что оно живо (после рестарта Postgres и т.п.).
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
         }
 }
 
+# Реплика для чтения рецептов (см. `app.replica`): адрес из окружения, например второй локальный
+# Postgres - `DB_REPLICA_HOST=127.0.0.1 DB_REPLICA_PORT=5433`. Без него все запросы идут в `default`.
+# В тестах реплика - зеркало тестовой базы `default` (`TEST.MIRROR`), отдельная тестовая база не создается.
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DB_REPLICA_HOST"],
+        "PORT": int(os.environ.get("DB_REPLICA_PORT", 5432)),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["app.replica.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = 5  # Сколько секунд после записи читать с основной базы (отставание реплики)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    # LRU в памяти процесса с ограничением по числу записей и по объему.
+    # Версии ключей меняются сигналами в процессе, который изменил данные. Если воркеров несколько,
+    # нужен общий для них backend, например:
+    #   "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": BASE_DIR / "cache",
+    #   "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:6379",
+    "default": {
+        "BACKEND": "app.cache_backends.BoundedLocMemCache",
+        "LOCATION": "food",
+        "TIMEOUT": 60 * 15,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10_000,
+            "CULL_FREQUENCY": 10,
+            "MAX_BYTES": 64 * 1024 * 1024,
+        },
+    },
+    # Готовый HTML карточек и страниц рецептов (`{% cache ... using="fragments" %}`). Ключи включают
+    # `updated_at` рецепта, поэтому фрагменты не устаревают, а вытесняются по объему.
+    "fragments": {
+        "BACKEND": "app.cache_backends.BoundedLocMemCache",
+        "LOCATION": "food-fragments",
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": 20_000,
+            "CULL_FREQUENCY": 10,
+            "MAX_BYTES": 32 * 1024 * 1024,
+        },
+    },
+    # Только для `cached_db` (см. `SESSION_ENGINE`), при нескольких процессах - общий backend.
+    "sessions": {
+        "BACKEND": "app.cache_backends.BoundedLocMemCache",
+        "LOCATION": "food-sessions",
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {
+            "MAX_ENTRIES": 50_000,
+            "CULL_FREQUENCY": 10,
+            "MAX_BYTES": 16 * 1024 * 1024,
+        },
+    },
+    # Ведра токенов ограничения частоты запросов (`app.throttling`). Для нескольких процессов - общий backend.
+    "throttle": {
+        "BACKEND": "app.cache_backends.BoundedLocMemCache",
+        "LOCATION": "food-throttle",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 100_000,
+            "CULL_FREQUENCY": 10,
+            "MAX_BYTES": 8 * 1024 * 1024,
+        },
+    },
+    # Пользователи и проверенные токены/пароли API (`users.authentication`). Короткий срок: изменения
+    # пользователя в другом процессе видны не позже чем через TIMEOUT.
+    "auth": {
+        "BACKEND": "app.cache_backends.BoundedLocMemCache",
+        "LOCATION": "food-auth",
+        "TIMEOUT": 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 10_000,
+            "CULL_FREQUENCY": 10,
+            "MAX_BYTES": 8 * 1024 * 1024,
+        },
+    },
+}
+
+RECIPES_CACHE_ALIAS = "default"
+
+# По умолчанию сессии в базе. `SESSION_ENGINE=django.contrib.sessions.backends.cached_db` - чтение из кэша,
+# запись в кэш и в базу: запрос посетителя с сессией обходится без SQL. Только с общим для всех процессов
+# кэшем "sessions" (Redis, Memcached): `cached_db` верит записи в кэше, и с LocMem выход или `flush()` в одном
+# процессе не виден другим - старая сессия в них работает до истечения записи. Отдельный кэш, чтобы большие
+# страницы списков не вытесняли сессии. Без хранения на сервере: "django.contrib.sessions.backends.signed_cookies"
+# (данные в подписанной cookie до ~4 КБ, избранное анонимного посетителя тоже в ней).
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", "django.contrib.sessions.backends.db")
+SESSION_CACHE_ALIAS = "sessions"
+RECIPES_CACHE_TIMEOUT = 60 * 60  # Данные не устаревают (версии ключей), поэтому TTL только освобождает память.
+# Индексы в памяти процесса (подбор по ингредиентам, автодополнение, см. `app.memory_index`) перестраиваются
+# после изменений в других процессах не чаще раза в столько секунд. Изменения в своем процессе применяются сразу.
+MEMORY_INDEX_REBUILD_INTERVAL = 30
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # По умолчанию только если 'authenticated'(можно менять)
     ],
     # "PAGE_SIZE": 2,
+    # Проверяются по порядку до первого подходящего заголовка. Первым - JWT (проверка подписи в памяти),
+    # Basic - последним: пароль хешируется PBKDF2 (см. `users.authentication`).
     'DEFAULT_AUTHENTICATION_CLASSES': [
-            'rest_framework.authentication.BasicAuthentication',
+            "users.authentication.CachedJWTAuthentication",  # Для работы JWT.
+            "users.authentication.CachedTokenAuthentication",  # Для работы djoser.
             'rest_framework.authentication.SessionAuthentication',
-            "rest_framework.authentication.TokenAuthentication",  # Для работы djoser.
-            "rest_framework_simplejwt.authentication.JWTAuthentication",  # Для работы JWT.
-    ]
+            'users.authentication.CachedBasicAuthentication',
+    ],
+    # JSON через `orjson`; `Accept: application/msgpack` - MessagePack, если установлен extra "msgpack"
+    # (`app.api.renderers`)
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(['app.api.renderers.MessagePackRenderer'] if find_spec("msgpack") else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'app.api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Ведра токенов на клиента и маршрут (`app.throttling`). `throttle_scope` view выбирает лимит,
+    # scope без лимита здесь не ограничивается.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.throttling.BucketThrottle',
+        'app.throttling.SearchThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        "api": "300/min",
+        "search": "30/min",  # Полнотекстовый поиск (`?search=`)
+        "autocomplete": "600/min",  # Подсказки запрашиваются на каждое нажатие клавиши
+        "pantry": "60/min",
+        "register": "5/hour",  # Декоратор `throttle` у обычных view
+        "login": "20/min",
+    },
 }
 
+THROTTLE_CACHE_ALIAS = "throttle"
+
+AUTH_CACHE_ALIAS = "auth"
+JWT_REVOCATION_REFRESH_SECONDS = 30  # Как часто фильтр отозванных JWT перечитывается из базы
+JWT_REVOCATION_CAPACITY = 10_000  # Минимальный размер фильтра (число jti при ~1% ложных срабатываний)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -158,6 +297,13 @@ EMAIL_HOST_USER = 'olyatsarik@yandex.ru'
 DEFAULT_FROM_EMAIL = 'olyatsarik@yandex.ru'
 EMAIL_HOST_PASSWORD = '5590729qQ'
 
+# Очередь писем (users.outbox): письма отправляет `manage.py send_outbox_emails`.
+EMAIL_OUTBOX_BATCH_SIZE = 50  # Писем за одно SMTP-соединение
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8  # После стольких неудач письмо помечается недоставленным
+EMAIL_OUTBOX_RETRY_DELAY = 30  # Секунд до первого повтора, дальше задержка удваивается
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600  # Секунд, на которые воркер забирает пачку (дольше - считается упавшим)
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
@@ -166,12 +312,49 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static'
 ]
+# `collectstatic` пишет сюда файлы с хешем в имени и их `.gz`/`.br` (см. `app.staticfiles`)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "app.staticfiles.CompressedManifestStaticFilesStorage",
+        # Без `collectstatic` (разработка, тесты) - исходные имена; в production файла нет в манифесте - ошибка
+        "OPTIONS": {"manifest_strict": not DEBUG},
+    },
+}
 
 
 # ===================== MEDIA =========================
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Загрузки больше этого размера Django сразу пишет во временный файл, а не держит в памяти.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+# Уменьшенные копии картинок создаются в фоновом потоке (см. `app.images`).
+IMAGE_DERIVATIVES_ASYNC = True
+
+# Замеры запросов (см. `app.middleware.PerformanceMiddleware`)
+PERFORMANCE_SERVER_TIMING = True  # Заголовок `Server-Timing` в ответах
+PERFORMANCE_SLOW_REQUEST_MS = 500  # Медленные запросы логируются вместе с самыми долгими SQL
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        # Сообщения `app.performance` - уже JSON, добавляем только время и уровень.
+        "performance": {"format": "%(asctime)s %(levelname)s %(message)s"},
+    },
+    "handlers": {
+        "performance": {"class": "logging.StreamHandler", "formatter": "performance"},
+    },
+    "loggers": {
+        "app.performance": {"handlers": ["performance"], "level": "INFO", "propagate": False},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
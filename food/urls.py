@@ -15,8 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
+from app.staticfiles import serve_static
 from app.views import home
+from users.views import TokenLogoutAPIView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -37,10 +40,13 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('api/token/logout/', TokenLogoutAPIView.as_view(), name='token_logout'),  # Отзыв access и refresh
     # Other
     # связь с приложением 'users':
     path("account/", include('users.urls')),  # Если в url будет 'account/', то перейдёт (include) в 'users.urls'
     # связь с приложением 'app'
     path("recipe/", include('app.urls')),
-    path('ckeditor/', include('ckeditor_uploader.urls'))
+    path('ckeditor/', include('ckeditor_uploader.urls')),
+    # Статика из STATIC_ROOT с долгим кэшированием и готовыми `.gz`/`.br` (перед приложением - CDN или nginx)
+    re_path(r"^%s(?P<path>.+)$" % settings.STATIC_URL.lstrip("/"), serve_static),
 ]
@@ -0,0 +1,144 @@
+// Подсказки из /api/recipes/autocomplete/ для:
+// - <select multiple data-autocomplete-url> - поле ввода + список выбранных, варианты подгружаются по мере ввода;
+// - <input data-autocomplete-url> (поиск в меню) - выбор подсказки открывает страницу рецепта.
+(function () {
+    "use strict";
+
+    var DELAY_MS = 150;
+
+    function fetcher(url, type) {
+        var controller = null;
+        return function (query, offset) {
+            if (controller) {
+                controller.abort();  // Ответ на предыдущее нажатие клавиши уже не нужен
+            }
+            controller = new AbortController();
+            var params = new URLSearchParams({q: query, type: type, offset: offset || 0});
+            return fetch(url + "?" + params, {signal: controller.signal, headers: {Accept: "application/json"}})
+                .then(function (response) { return response.ok ? response.json() : {results: [], next: null}; });
+        };
+    }
+
+    function debounce(callback) {
+        var timer = null;
+        return function () {
+            var args = arguments;
+            clearTimeout(timer);
+            timer = setTimeout(function () { callback.apply(null, args); }, DELAY_MS);
+        };
+    }
+
+    function attach(input, type, url, onChoose) {
+        // Скрипт может быть подключен дважды (base.html и media виджета формы)
+        if (input.dataset.autocompleteReady) {
+            return;
+        }
+        input.dataset.autocompleteReady = "1";
+        var load = fetcher(url, type);
+        var menu = document.createElement("div");
+        menu.className = "dropdown-menu";
+        input.parentNode.style.position = "relative";
+        input.insertAdjacentElement("afterend", menu);
+        input.setAttribute("autocomplete", "off");
+
+        function render(data, query, append) {
+            if (!append) {
+                menu.innerHTML = "";
+            }
+            var more = menu.querySelector("[data-more]");
+            if (more) {
+                more.remove();
+            }
+            data.results.forEach(function (item) {
+                var option = document.createElement("button");
+                option.type = "button";
+                option.className = "dropdown-item";
+                option.textContent = item.name;
+                option.addEventListener("mousedown", function (event) {
+                    event.preventDefault();
+                    menu.classList.remove("show");
+                    onChoose(item);
+                });
+                menu.appendChild(option);
+            });
+            if (data.next) {
+                var button = document.createElement("button");
+                button.type = "button";
+                button.className = "dropdown-item text-muted";
+                button.dataset.more = "1";
+                button.textContent = "Еще...";
+                button.addEventListener("mousedown", function (event) {
+                    event.preventDefault();
+                    var offset = new URL(data.next, window.location.href).searchParams.get("offset");
+                    load(query, offset).then(function (next) { render(next, query, true); });
+                });
+                menu.appendChild(button);
+            }
+            menu.classList.toggle("show", menu.children.length > 0);
+        }
+
+        input.addEventListener("input", debounce(function () {
+            var query = input.value.trim();
+            if (!query) {
+                menu.classList.remove("show");
+                return;
+            }
+            load(query).then(function (data) { render(data, query, false); }).catch(function () {});
+        }));
+        input.addEventListener("blur", function () { menu.classList.remove("show"); });
+    }
+
+    function attachSelect(select) {
+        if (select.dataset.autocompleteReady) {
+            return;
+        }
+        select.dataset.autocompleteReady = "1";
+        select.style.display = "none";
+        var wrapper = document.createElement("div");
+        var chosen = document.createElement("div");
+        chosen.className = "mb-2";
+        var input = document.createElement("input");
+        input.type = "search";
+        input.className = "form-control";
+        input.placeholder = "Начните вводить название";
+        wrapper.appendChild(chosen);
+        wrapper.appendChild(input);
+        select.insertAdjacentElement("afterend", wrapper);
+
+        function renderChosen() {
+            chosen.innerHTML = "";
+            Array.prototype.forEach.call(select.selectedOptions, function (option) {
+                var badge = document.createElement("span");
+                badge.className = "badge text-bg-secondary me-1";
+                badge.textContent = option.textContent + " ×";
+                badge.style.cursor = "pointer";
+                badge.addEventListener("click", function () {
+                    option.remove();
+                    renderChosen();
+                });
+                chosen.appendChild(badge);
+            });
+        }
+
+        attach(input, select.dataset.autocompleteType, select.dataset.autocompleteUrl, function (item) {
+            var option = select.querySelector('option[value="' + item.id + '"]');
+            if (!option) {
+                option = new Option(item.name, item.id);
+                select.appendChild(option);
+            }
+            option.selected = true;
+            input.value = "";
+            renderChosen();
+        });
+        renderChosen();
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        document.querySelectorAll("select[data-autocomplete-url]").forEach(attachSelect);
+        document.querySelectorAll("input[data-autocomplete-url]").forEach(function (input) {
+            attach(input, input.dataset.autocompleteType, input.dataset.autocompleteUrl, function (item) {
+                window.location.href = "/recipe/" + item.id;
+            });
+        });
+    });
+})();
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
@@ -0,0 +1,129 @@
+"""
+Аутентификация API без лишней работы на каждый запрос.
+
+- `CachedJWTAuthentication`: подпись и срок JWT проверяются в памяти, отзыв - фильтром Блума
+  (`users.tokens`). Для чтения (GET, HEAD, OPTIONS) пользователь - `TokenUser` из claims токена, без базы;
+  для записи - настоящий `User` из кэша `AUTH_CACHE_ALIAS`.
+- `CachedTokenAuthentication`: токен djoser -> id пользователя в том же кэше.
+- `CachedBasicAuthentication`: PBKDF2 считается при первом запросе, дальше на время `TIMEOUT` кэша
+  совпадение логина и пароля проверяется по HMAC, без хеширования пароля.
+
+Кэш сбрасывается сигналами при изменении или удалении пользователя и токена (`users.signals`);
+в других процессах изменения видны не позже чем через `TIMEOUT` кэша.
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import exceptions
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import get_auth_cache, revoked_tokens
+
+USER_KEY = "auth:user:{}"
+TOKEN_KEY = "auth:token:{}"
+BASIC_KEY = "auth:basic:{}"
+
+
+def get_cached_user(user_id):
+    """Пользователь по id: из кэша или одним запросом к базе. `None` - пользователя нет."""
+    cache = get_auth_cache()
+    user = cache.get(USER_KEY.format(user_id))
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is not None:
+            remember_user(user)
+    return user
+
+
+def remember_user(user) -> None:
+    get_auth_cache().set(USER_KEY.format(user.pk), user)
+
+
+def forget_user(user_id) -> None:
+    get_auth_cache().delete(USER_KEY.format(user_id))
+
+
+def _digest(value: str) -> str:
+    # Ключ без самого секрета: по записи кэша токен или пароль не восстановить
+    return hmac.new(settings.SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def forget_token(key: str) -> None:
+    get_auth_cache().delete(TOKEN_KEY.format(_digest(key)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if revoked_tokens.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken("Token is blacklisted")
+
+        if request.method in SAFE_METHODS:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken("Token contained no recognizable user identification")
+            return api_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        user = get_cached_user(user_id)
+        if user is None:
+            raise exceptions.AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise exceptions.AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cache = get_auth_cache()
+        cache_key = TOKEN_KEY.format(_digest(key))
+        user_id = cache.get(cache_key)
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, user.pk)
+            remember_user(user)
+            return user, token
+
+        user = get_cached_user(user_id)
+        if user is None or not user.is_active:
+            cache.delete(cache_key)
+            return super().authenticate_credentials(key)  # Ошибка в том же виде, что без кэша
+        return user, self.get_model()(key=key, user=user)
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache = get_auth_cache()
+        cache_key = BASIC_KEY.format(_digest(f"{userid}\0{password}"))
+        cached = cache.get(cache_key)
+        if cached is not None:
+            user_id, password_hash = cached
+            user = get_cached_user(user_id)
+            # После смены пароля (другой хеш) - полная проверка
+            if user is not None and user.is_active and user.password == password_hash:
+                return user, None
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(cache_key, (user.pk, user.password))
+        remember_user(user)
+        return user, auth
@@ -4,7 +4,8 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
+
+from .outbox import enqueue_email
 
 
 class BaseEmailSender:
@@ -27,12 +28,12 @@ class BaseEmailSender:
         return self.subject
 
     def send_mail(self):
-        mail = EmailMultiAlternatives(
+        """Ставит письмо в очередь (outbox), отправляет его фоновый процесс `send_outbox_emails`."""
+        enqueue_email(
             subject=self.get_subject() + " на сайте " + self._get_domain(),
-            to=[self._user.email]
+            to=[self._user.email],
+            body_html=self._get_mail_body(),
         )
-        mail.attach_alternative(self._get_mail_body(), "text/html")
-        mail.send()
 
     def _get_mail_body(self) -> str:
         context = {
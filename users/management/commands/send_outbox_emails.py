@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Фоновая отправка писем из очереди (outbox). Можно запускать несколько процессов одновременно."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Разобрать очередь один раз и завершиться.")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=2.0,
+                            help="Пауза в секундах, когда очередь пуста.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = deliver_batch(options["batch_size"])
+            if processed:
+                self.stdout.write(f"Обработано писем: {processed}")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('to', models.JSONField(verbose_name='Получатели')),
+                ('from_email', models.CharField(blank=True, max_length=254)),
+                ('body_html', models.TextField()),
+                ('status', models.CharField(choices=[('P', 'Ожидает отправки'), ('S', 'Отправлено'), ('D', 'Не доставлено')], default='P', max_length=1)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'P')), fields=['next_attempt_at'], name='users_outbox_pending_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,39 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 class User(AbstractUser):
     pass
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди отправки (outbox). Запрос только сохраняет письмо, отправляют его
+    фоновые процессы `manage.py send_outbox_emails` (см. `users.outbox`).
+    """
+
+    class Status(models.TextChoices):
+        pending = ("P", "Ожидает отправки")
+        sent = ("S", "Отправлено")
+        dead = ("D", "Не доставлено")
+
+    subject = models.CharField(max_length=255)
+    to = models.JSONField(verbose_name="Получатели")
+    from_email = models.CharField(max_length=254, blank=True)
+    body_html = models.TextField()
+    status = models.CharField(max_length=1, choices=Status.choices, default=Status.pending)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь выбирается только по ожидающим письмам, отправленные в индекс не попадают.
+            models.Index(fields=["next_attempt_at"], condition=models.Q(status="P"), name="users_outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
@@ -0,0 +1,134 @@
+"""
+Очередь исходящих писем (outbox) в базе данных.
+
+`enqueue_email` вызывается в запросе и только сохраняет письмо. `deliver_batch` вызывается
+фоновым процессом (`manage.py send_outbox_emails`): берет пачку писем, отправляет их через одно
+SMTP-соединение, неудачные откладывает с экспоненциальной задержкой, а после
+`EMAIL_OUTBOX_MAX_ATTEMPTS` попыток помечает как недоставленные (dead letter).
+
+Пачка сначала "арендуется" короткой транзакцией: `next_attempt_at` переносится на
+`EMAIL_OUTBOX_CLAIM_TIMEOUT` секунд вперед, и другие воркеры ее не берут. Отправка идет уже после
+COMMIT, без блокировок строк. Если воркер упал во время отправки, письма станут доступны снова по
+истечении аренды (письмо может уйти дважды, но не потеряется).
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых соединение с SMTP-сервером нужно открыть заново.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def enqueue_email(subject: str, to: list[str], body_html: str, from_email: str = "") -> OutgoingEmail:
+    return OutgoingEmail.objects.create(subject=subject, to=to, body_html=body_html, from_email=from_email)
+
+
+def build_message(email: OutgoingEmail, connection=None) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        to=email.to,
+        from_email=email.from_email or None,
+        connection=connection,
+    )
+    message.attach_alternative(email.body_html, "text/html")
+    return message
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Экспоненциальная задержка: base, 2*base, 4*base ... но не больше `EMAIL_OUTBOX_MAX_RETRY_DELAY`."""
+    seconds = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def deliver_batch(batch_size: int | None = None, connection=None) -> int:
+    """
+    Отправляет одну пачку писем, возвращает число обработанных писем.
+
+    Пачка выбирается `SELECT ... FOR UPDATE SKIP LOCKED` и арендуется в той же транзакции, поэтому
+    несколько воркеров разбирают очередь параллельно и не берут одни и те же письма.
+    """
+    batch = _claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Сервер недоступен: вся пачка уходит на повтор.
+        for email in batch:
+            _mark_failed(email, exc)
+    else:
+        try:
+            _deliver_all(batch, connection)
+        finally:
+            connection.close()
+
+    OutgoingEmail.objects.bulk_update(
+        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+    return len(batch)
+
+
+def _claim_batch(batch_size: int) -> list[OutgoingEmail]:
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.Status.pending, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            claimed_until = timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+            OutgoingEmail.objects.filter(pk__in=[email.pk for email in batch]).update(next_attempt_at=claimed_until)
+    return batch
+
+
+def _deliver_all(batch: list[OutgoingEmail], connection) -> None:
+    for position, email in enumerate(batch):
+        try:
+            _deliver(email, connection)
+        except CONNECTION_ERRORS:
+            # Соединение оборвалось: открываем заново, а если сервер недоступен - откладываем остаток пачки.
+            try:
+                connection.close()
+                connection.open()
+            except Exception as exc:
+                for rest in batch[position + 1:]:
+                    _mark_failed(rest, exc)
+                return
+
+
+def _deliver(email: OutgoingEmail, connection) -> None:
+    try:
+        sent = connection.send_messages([build_message(email, connection)])
+        if not sent:
+            raise smtplib.SMTPException("Письмо не принято сервером")
+    except Exception as exc:
+        _mark_failed(email, exc)
+        if isinstance(exc, CONNECTION_ERRORS):
+            raise
+    else:
+        email.status = OutgoingEmail.Status.sent
+        email.sent_at = timezone.now()
+        email.attempts += 1
+        email.last_error = ""
+
+
+def _mark_failed(email: OutgoingEmail, exc: Exception) -> None:
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.Status.dead
+        logger.error("Письмо %s не доставлено после %s попыток: %s", email.pk, email.attempts, email.last_error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning("Письмо %s не отправлено (попытка %s): %s", email.pk, email.attempts, email.last_error)
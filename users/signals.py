@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import forget_token, forget_user
+from .tokens import revoked_tokens
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    # Пароль, `is_active`, права - все это читается из кэшированного пользователя
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def auth_token_deleted(sender, instance: Token, **kwargs):
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance: BlacklistedToken, **kwargs):
+    revoked_tokens.add(instance.token.jti)
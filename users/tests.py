@@ -1,3 +1,222 @@
-from django.test import TestCase
+import base64
+import smtplib
+import socketserver
+import threading
+from datetime import timedelta
+from email import message_from_bytes
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import OutgoingEmail, User
+from .outbox import deliver_batch, enqueue_email
+from .tokens import BloomFilter, get_auth_cache, revoke_token, revoked_tokens
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected("connection lost")
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма в `server.messages`, получателя `reject@...` отклоняет."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 stub")
+        while line := self.rfile.readline():
+            command = line.strip().decode()
+            if command.upper().startswith(("EHLO", "HELO")):
+                self.reply("250 stub")
+            elif command.upper().startswith("RCPT") and "reject@" in command:
+                self.reply("550 no such user")
+            elif command.upper() == "DATA":
+                self.reply("354 end with .")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    lines.append(data)
+                self.server.messages.append(message_from_bytes(b"".join(lines)))
+                self.reply("250 queued")
+            elif command.upper() == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL FROM, RCPT TO, RSET, NOOP
+                self.reply("250 ok")
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=30,
+    EMAIL_OUTBOX_MAX_RETRY_DELAY=3600,
+)
+class EmailOutboxTestCase(TestCase):
+    def test_register_enqueues_email_without_sending(self):
+        response = self.client.post(reverse("register"), {
+            "username": "cook",
+            "email": "cook@example.com",
+            "password1": "Sup3r-secret-pass",
+            "password2": "Sup3r-secret-pass",
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(User.objects.filter(username="cook", is_active=False).exists())
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, ["cook@example.com"])
+        self.assertEqual(email.status, OutgoingEmail.Status.pending)
+        self.assertEqual(mail.outbox, [])
+
+    def test_deliver_batch_sends_pending_emails(self):
+        for i in range(3):
+            enqueue_email(f"Письмо {i}", [f"user{i}@example.com"], "<p>Привет</p>")
+
+        self.assertEqual(deliver_batch(), 3)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0], ("<p>Привет</p>", "text/html"))
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.Status.sent).exists())
+        self.assertEqual(deliver_batch(), 0)
+
+    def test_failed_email_is_retried_with_backoff_then_dead_lettered(self):
+        email = enqueue_email("Письмо", ["user@example.com"], "<p>Привет</p>")
+        connection = FailingBackend()
+
+        self.assertEqual(deliver_batch(connection=connection), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.Status.pending, 1))
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        self.assertIn("connection lost", email.last_error)
+
+        # Пока задержка не прошла, письмо не берется в работу.
+        self.assertEqual(deliver_batch(connection=connection), 0)
+
+        for _ in range(2):
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            deliver_batch(connection=connection)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.Status.dead, 3))
+        self.assertEqual(deliver_batch(connection=connection), 0)
+
+    def test_emails_are_sent_after_the_batch_is_claimed(self):
+        email = enqueue_email("Письмо", ["user@example.com"], "<p>Привет</p>")
+        depth, seen = len(connection.atomic_blocks), []
+
+        class CheckingBackend(EmailBackend):
+            def send_messages(backend, messages):
+                seen.append((len(connection.atomic_blocks), OutgoingEmail.objects.get(pk=email.pk).next_attempt_at))
+                return super().send_messages(messages)
+
+        self.assertEqual(deliver_batch(connection=CheckingBackend()), 1)
+        # Отправка - вне транзакции выборки, письмо уже арендовано
+        self.assertEqual(seen[0][0], depth)
+        self.assertGreater(seen[0][1], timezone.now() + timedelta(seconds=60))
+        self.assertEqual(deliver_batch(), 0)
+
+    def test_delivery_through_smtp_server(self):
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStubHandler)
+        server.daemon_threads = True
+        server.messages = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        sent = enqueue_email("Добро пожаловать", ["user@example.com"], "<p>Привет</p>", from_email="site@example.com")
+        rejected = enqueue_email("Письмо", ["reject@example.com"], "<p>Привет</p>")
+        with override_settings(EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend", EMAIL_HOST="127.0.0.1",
+                               EMAIL_PORT=server.server_address[1], EMAIL_USE_SSL=False, EMAIL_USE_TLS=False,
+                               EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=5):
+            self.assertEqual(deliver_batch(), 2)
+
+        self.assertEqual(len(server.messages), 1)
+        message = server.messages[0]
+        self.assertEqual((message["To"], message["From"]), ("user@example.com", "site@example.com"))
+        self.assertEqual(message.get_content_type(), "multipart/alternative")
+        sent.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual(sent.status, OutgoingEmail.Status.sent)
+        self.assertEqual((rejected.status, rejected.attempts), (OutgoingEmail.Status.pending, 1))
+        self.assertIn("SMTPRecipientsRefused", rejected.last_error)
+
+
+class ApiAuthenticationTestCase(TestCase):
+    def setUp(self):
+        get_auth_cache().clear()
+        revoked_tokens.reset()
+        self.user = User.objects.create_user(username="cook", password="password")
+
+    def get_favorites(self, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/recipes/favorites/", headers=headers)
+        return response, len(queries)
+
+    def test_jwt_read_does_not_load_user(self):
+        token = AccessToken.for_user(self.user)
+        self.get_favorites(Authorization=f"Bearer {token}")  # Загрузка фильтра отозванных токенов
+        response, queries = self.get_favorites(Authorization=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 1)  # Только само избранное
+
+    def test_revoked_jwt_is_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.get_favorites(Authorization=f"Bearer {token}")[0].status_code, 200)
+        revoke_token(token)
+        self.assertEqual(self.get_favorites(Authorization=f"Bearer {token}")[0].status_code, 401)
+        other = AccessToken.for_user(self.user)
+        self.assertEqual(self.get_favorites(Authorization=f"Bearer {other}")[0].status_code, 200)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        refresh = RefreshToken.for_user(self.user)
+        bearer = {"Authorization": f"Bearer {refresh.access_token}"}
+        self.assertEqual(self.get_favorites(**bearer)[0].status_code, 200)
+        other = RefreshToken.for_user(User.objects.create_user(username="reader"))
+        response = self.client.post("/api/token/logout/", {"refresh": str(other)}, content_type="application/json",
+                                    headers=bearer)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/api/token/logout/", {"refresh": str(refresh)}, content_type="application/json",
+                                    headers=bearer)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get_favorites(**bearer)[0].status_code, 401)
+        response = self.client.post("/api/token/refresh/", {"refresh": str(refresh)}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.post("/api/token/logout/", headers=bearer).status_code, 401)
+
+    def test_token_lookup_is_cached_until_token_is_deleted(self):
+        token = Token.objects.create(user=self.user)
+        self.get_favorites(Authorization=f"Token {token.key}")
+        response, queries = self.get_favorites(Authorization=f"Token {token.key}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 1)
+        token.delete()
+        self.assertEqual(self.get_favorites(Authorization=f"Token {token.key}")[0].status_code, 401)
+
+    def test_basic_password_is_hashed_once(self):
+        credentials = "Basic " + base64.b64encode(b"cook:password").decode()
+        with mock.patch.object(User, "check_password", autospec=True, side_effect=User.check_password) as check:
+            self.assertEqual(self.get_favorites(Authorization=credentials)[0].status_code, 200)
+            self.assertEqual(self.get_favorites(Authorization=credentials)[0].status_code, 200)
+        self.assertEqual(check.call_count, 1)
+
+        self.user.set_password("new-password")
+        self.user.save()
+        self.assertEqual(self.get_favorites(Authorization=credentials)[0].status_code, 401)
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000)
+        jtis = [f"jti-{number}" for number in range(1000)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        false_positives = sum(f"other-{number}" in bloom for number in range(10_000))
+        self.assertLess(false_positives, 300)  # ~1% при расчетной емкости
@@ -0,0 +1,119 @@
+"""
+Отозванные JWT без запроса к базе на каждый вызов API.
+
+Отозванный токен - запись `BlacklistedToken` приложения `token_blacklist` (`revoke_token` добавляет туда
+и access-токены, у которых нет своего `blacklist()`; вызывает его выход `POST /api/token/logout/`). Их `jti` лежат в фильтре Блума в памяти процесса:
+проверка "токен точно не отозван" - несколько хешей и битов, без базы. Только если фильтр отвечает
+"возможно" (отозванный токен или редкое ложное срабатывание), ответ уточняется в базе и кэшируется.
+
+Фильтр перестраивается из базы раз в `JWT_REVOCATION_REFRESH_SECONDS` секунд, а отзыв в этом же процессе
+попадает в него сразу (сигнал `post_save`, см. `users.signals`). Поэтому в других процессах
+отозванный токен перестает приниматься не позже чем через `JWT_REVOCATION_REFRESH_SECONDS` секунд.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+REVOKED_KEY = "auth:revoked:{}"
+
+
+def get_auth_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+class BloomFilter:
+    """Множество строк без ложноотрицательных ответов: `in` либо "точно нет", либо "возможно да"."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # Двойное хеширование: k позиций из двух половин одного blake2b
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevokedTokens:
+    """`jti` отозванных и еще не истекших токенов: фильтр Блума в памяти + проверка в базе при совпадении."""
+
+    def __init__(self):
+        self._filter: BloomFilter | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._get_filter():
+            return False
+        cache = get_auth_cache()
+        revoked = cache.get(REVOKED_KEY.format(jti))
+        if revoked is None:
+            revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            cache.set(REVOKED_KEY.format(jti), revoked)
+        return revoked
+
+    def add(self, jti: str) -> None:
+        get_auth_cache().set(REVOKED_KEY.format(jti), True)
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._filter = None
+
+    def _get_filter(self) -> BloomFilter:
+        bloom = self._filter
+        if bloom is not None and time.monotonic() - self._loaded_at < settings.JWT_REVOCATION_REFRESH_SECONDS:
+            return bloom
+        with self._lock:
+            if self._filter is bloom:  # Параллельный запрос мог уже перестроить фильтр
+                jtis = list(
+                    BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                    .values_list("token__jti", flat=True)
+                )
+                # С запасом на отзывы до следующей перестройки
+                bloom = BloomFilter(max(len(jtis) * 2, settings.JWT_REVOCATION_CAPACITY))
+                for jti in jtis:
+                    bloom.add(jti)
+                self._filter, self._loaded_at = bloom, time.monotonic()
+            return self._filter
+
+
+revoked_tokens = RevokedTokens()
+
+
+def revoke_token(token: Token) -> BlacklistedToken:
+    """Отзывает токен любого типа (в том числе access) до истечения его срока."""
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user_id": token.get(api_settings.USER_ID_CLAIM),
+            "token": str(token),
+            "expires_at": datetime_from_epoch(token["exp"]),
+        },
+    )
+    blacklisted, _ = BlacklistedToken.objects.get_or_create(token=outstanding)
+    return blacklisted
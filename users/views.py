@@ -5,28 +5,42 @@ from django.core.handlers.wsgi import WSGIRequest
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+
+from app.throttling import throttle
 
 from .models import User
 from .forms import RegisterForm
 from .email import ConfirmUserRegisterEmailSender
+from .tokens import revoke_token
 
 
+@throttle("register")  # Каждая регистрация - пользователь и письмо
 def register_view(request: WSGIRequest):
     form = RegisterForm()
 
     if request.method == 'POST':
         form = RegisterForm(request.POST)
         if form.is_valid():
-            user = User.objects.create_user(
-                username=form.cleaned_data['username'],
-                # 'cleaned_data' - очищает форму, и вместо str меняет тип на float или int
-                email=form.cleaned_data['email'],
-                password=form.cleaned_data['password1'],
-                is_active=False,
-            )
+            with transaction.atomic():  # Пользователь и письмо в очереди сохраняются вместе
+                user = User.objects.create_user(
+                    username=form.cleaned_data['username'],
+                    # 'cleaned_data' - очищает форму, и вместо str меняет тип на float или int
+                    email=form.cleaned_data['email'],
+                    password=form.cleaned_data['password1'],
+                    is_active=False,
+                )
 
-            # Подтверждение по email.
-            ConfirmUserRegisterEmailSender(request, user).send_mail()
+                # Подтверждение по email.
+                ConfirmUserRegisterEmailSender(request, user).send_mail()
 
             return HttpResponseRedirect(reverse("login"))
 
@@ -43,3 +57,29 @@ def confirm_register_view(request: WSGIRequest, uidb64: str, token: str):
         return HttpResponseRedirect(reverse("login"))
 
     return render(request, "registration/invalid_email_confirm.html", {"username": user.username})
+
+
+class TokenLogoutAPIView(APIView):
+    """
+    Выход по JWT: отзывает access-токен запроса и переданный `refresh` (`revoke_token`). В этом процессе
+    токены перестают приниматься сразу, в остальных - не позже чем через `JWT_REVOCATION_REFRESH_SECONDS`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        tokens = [request.auth] if isinstance(request.auth, Token) else []
+        if request.data.get("refresh"):
+            try:
+                refresh = RefreshToken(request.data["refresh"])
+            except TokenError as error:
+                raise ValidationError({"refresh": [str(error)]})
+            if str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                raise ValidationError({"refresh": ["Токен выдан другому пользователю."]})
+            tokens.append(refresh)
+        if not tokens:
+            raise ValidationError({"refresh": ["Обязательное поле."]})
+
+        with transaction.atomic():
+            for token in tokens:
+                revoke_token(token)
+        return Response(status=status.HTTP_204_NO_CONTENT)